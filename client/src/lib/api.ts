@@ -10,6 +10,9 @@ import type {
 } from './types';
 import { config } from './config';
 
+// Largest page of trainings the server returns
+const TRAININGS_PAGE_SIZE = 500;
+
 class ApiClient {
     private token: string | null = null;
 
@@ -21,6 +24,14 @@ class ApiClient {
         endpoint: string,
         options: RequestInit = {}
     ): Promise<T> {
+        const response = await this.send(endpoint, options);
+        return response.json();
+    }
+
+    private async send(
+        endpoint: string,
+        options: RequestInit = {}
+    ): Promise<Response> {
         const headers: HeadersInit = {
             'Content-Type': 'application/json',
             ...(this.token ? { Authorization: `Bearer ${this.token}` } : {}),
@@ -36,7 +47,7 @@ class ApiClient {
             throw new Error(`API request failed: ${response.statusText}`);
         }
 
-        return response.json();
+        return response;
     }
 
     // User endpoints
@@ -105,8 +116,18 @@ class ApiClient {
         });
     }
 
+    // Trainings come a page at a time, the cursor of the next page is in the X-Next-Cursor header
     async listTrainings(): Promise<TrainingRead[]> {
-        return this.request<TrainingRead[]>('/trainings/');
+        const trainings: TrainingRead[] = [];
+        let cursor: string | null = null;
+        do {
+            const searchParams = new URLSearchParams({ limit: String(TRAININGS_PAGE_SIZE) });
+            if (cursor) searchParams.append('cursor', cursor);
+            const response = await this.send(`/trainings/?${searchParams.toString()}`);
+            trainings.push(...((await response.json()) as TrainingRead[]));
+            cursor = response.headers.get('X-Next-Cursor');
+        } while (cursor);
+        return trainings;
     }
 }
 
@@ -56,7 +56,9 @@ def upgrade() -> None:
         sa.ForeignKeyConstraint(["muscle_group_id"], ["musclegroup.id"]),
         sa.PrimaryKeyConstraint("id"),
     )
-    op.create_index(op.f("ix_exercise_aliases"), "exercise", ["aliases"], unique=False)
+    # PostgreSQL has no btree index on JSON, the GIN index on JSONB comes in fd8e48ea54c9
+    if op.get_context().dialect.name != "postgresql":
+        op.create_index(op.f("ix_exercise_aliases"), "exercise", ["aliases"], unique=False)
     op.create_index(op.f("ix_exercise_id"), "exercise", ["id"], unique=False)
     op.create_index(op.f("ix_exercise_muscle_group_id"), "exercise", ["muscle_group_id"], unique=False)
     op.create_index(op.f("ix_exercise_name"), "exercise", ["name"], unique=False)
@@ -100,7 +102,8 @@ def downgrade() -> None:
     op.drop_index(op.f("ix_exercise_name"), table_name="exercise")
     op.drop_index(op.f("ix_exercise_muscle_group_id"), table_name="exercise")
     op.drop_index(op.f("ix_exercise_id"), table_name="exercise")
-    op.drop_index(op.f("ix_exercise_aliases"), table_name="exercise")
+    if op.get_context().dialect.name != "postgresql":
+        op.drop_index(op.f("ix_exercise_aliases"), table_name="exercise")
     op.drop_table("exercise")
     op.drop_index(op.f("ix_user_username"), table_name="user")
     op.drop_index(op.f("ix_user_id"), table_name="user")
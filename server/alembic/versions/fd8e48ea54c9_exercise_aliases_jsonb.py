@@ -0,0 +1,38 @@
+"""exercise aliases jsonb
+
+Revision ID: fd8e48ea54c9
+Revises: 74455b55545e
+Create Date: 2026-10-18 12:04:51.318402
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "fd8e48ea54c9"
+down_revision: str | None = "74455b55545e"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Only PostgreSQL has JSONB and GIN indexes, SQLite keeps its JSON column and index
+    if op.get_context().dialect.name != "postgresql":
+        return
+    # The init revision creates no index on the JSON column on PostgreSQL
+    op.drop_index(op.f("ix_exercise_aliases"), table_name="exercise", if_exists=True)
+    op.alter_column("exercise", "aliases", type_=postgresql.JSONB(), existing_type=sa.JSON(), postgresql_using="aliases::jsonb", existing_nullable=False)
+    op.create_index(op.f("ix_exercise_aliases"), "exercise", ["aliases"], unique=False, postgresql_using="gin")
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        return
+    # JSON has no btree ordering on PostgreSQL, so the column goes back without an index
+    op.drop_index(op.f("ix_exercise_aliases"), table_name="exercise")
+    op.alter_column("exercise", "aliases", type_=sa.JSON(), existing_type=postgresql.JSONB(), postgresql_using="aliases::json", existing_nullable=False)
@@ -0,0 +1,30 @@
+import hashlib
+
+from fastapi import HTTPException, Request, status
+
+
+def make_etag(*parts: object) -> str:
+    """Build a strong entity tag from the values the representation is derived from."""
+    digest = hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Compare an `If-None-Match` header with the current entity tag, weakly as RFC 9110 requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def conditional_headers(request: Request, etag: str, cache_control: str) -> dict[str, str]:
+    """Return the validator headers of a representation, or answer 304 if the client already has it.
+
+    Call it before loading the representation, so that a client polling unchanged data costs
+    no more than computing the entity tag.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return headers
@@ -1,16 +1,20 @@
 from typing import Annotated, TypeVar
 
-from app.core.security import verify_token
-from app.db.session import get_db
+from app.core.config import settings
+from app.core.security import decode_token
+from app.db.session import get_db, get_read_db
 from app.models.models import User
+from app.schemas.token import Principal
 from app.services import user as user_service
+from app.services.token_cache import token_cache
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-__all__ = ["form_or_json", "get_current_user", "get_db"]
+__all__ = ["form_or_json", "get_admin_principal", "get_current_principal", "get_current_user", "get_db", "get_read_db"]
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/api/v1/users/login",
@@ -34,29 +38,56 @@ def form_or_json(model: type[_TModel]) -> _TModel:
     return Depends(form_or_json_inner)
 
 
-async def get_current_user(
+async def get_current_principal(
     token: Annotated[str | None, Depends(oauth2_scheme)],
-    db: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
-    """Get the current authenticated user."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+) -> Principal:
+    """Get the id of the current authenticated user, from the token cache if it was verified recently."""
     if token is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user_id = verify_token(token)
-    if user_id is None:
+    principal = token_cache.get(token)
+    if principal is not None:
+        return principal
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    payload = decode_token(token)
+    if payload is None or payload.get("sub") is None:
         raise credentials_exception
 
-    user = await user_service.get_user(db, int(user_id))
-    if user is None:
+    user_id = (await read_db.execute(select(User.id).where(User.id == int(payload["sub"])))).scalar_one_or_none()
+    if user_id is None:
         raise credentials_exception
 
+    principal = Principal(user_id=user_id)
+    token_cache.put(token, principal, payload["exp"])
+    return principal
+
+
+async def get_admin_principal(principal: Annotated[Principal, Depends(get_current_principal)]) -> Principal:
+    """Get the current authenticated user, if it is one of the admins."""
+    if principal.user_id not in settings.ADMIN_USER_IDS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not an admin")
+    return principal
+
+
+async def get_current_user(
+    principal: Annotated[Principal, Depends(get_current_principal)],
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+) -> User:
+    """Get the current authenticated user."""
+    user = await user_service.get_user(read_db, principal.user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
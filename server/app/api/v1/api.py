@@ -1,4 +1,4 @@
-from app.api.v1.endpoints import exercises, trainings, users
+from app.api.v1.endpoints import admin, exercises, trainings, users
 from fastapi import APIRouter
 
 
@@ -6,3 +6,4 @@ api_router = APIRouter()
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(exercises.router, prefix="/exercises", tags=["exercises"])
 api_router.include_router(trainings.router, prefix="/trainings", tags=["trainings"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
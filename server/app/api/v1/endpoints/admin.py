@@ -0,0 +1,34 @@
+from typing import Annotated
+
+from app.api.deps import get_admin_principal
+from app.core.config import settings
+from app.core.metrics import InstrumentedRoute
+from app.core.profiling import PROFILE_FORMATS, profiler
+from app.schemas.profile import ProfileParams
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+
+router = APIRouter(dependencies=[Depends(get_admin_principal)], route_class=InstrumentedRoute)
+
+
+@router.get(
+    "/profile",
+    response_class=Response,
+    responses={200: {"content": {"text/plain": {}, "application/json": {}}, "description": "Collapsed stacks, or a speedscope file"}},
+)
+async def read_profile(params: Annotated[ProfileParams, Query()]) -> Response:
+    """Get the stacks sampled from the requests handled by this process since the last reset, by route.
+
+    Collapsed stacks are weighted in microseconds of wall time, for flame graph tools. Needs
+    `PROFILING_ENABLED`.
+    """
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled")
+    media_type, render = PROFILE_FORMATS[params.format]
+    return Response(render(profiler.profile(params.route), params.route or "all routes"), media_type=media_type)
+
+
+@router.delete("/profile", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_profile() -> None:
+    """Forget the stacks sampled so far."""
+    profiler.reset()
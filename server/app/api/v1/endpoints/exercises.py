@@ -1,50 +1,85 @@
 from typing import Annotated
 
-from app.api.deps import get_current_user, get_db
-from app.models.models import Exercise, MuscleGroup
-from app.schemas.exercise import ExerciseDetail, ExerciseList, ExerciseSearchParams
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import bindparam, or_, select, text
+from app.api.caching import conditional_headers, make_etag
+from app.api.deps import get_current_principal, get_read_db
+from app.core.compression import choose_encoding, set_encoding_headers
+from app.core.config import settings
+from app.core.metrics import InstrumentedRoute
+from app.schemas.exercise import ExerciseDetail, ExerciseList, ExerciseSearchParams, ExerciseSuggestion, ExerciseSuggestParams
+from app.schemas.stats import ExerciseProgress, StatsParams
+from app.schemas.token import Principal
+from app.services.exercise_catalog import ExerciseCatalog, exercise_catalog
+from app.services.training_stats import TrainingStatsService
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 
-router = APIRouter(dependencies=[Depends(get_current_user)])
+router = APIRouter(dependencies=[Depends(get_current_principal)], route_class=InstrumentedRoute)
+
+
+def catalog_headers(request: Request, catalog: ExerciseCatalog) -> dict[str, str]:
+    """Answer 304 if the client has the response built from the current catalog, or return its validator headers."""
+    return conditional_headers(request, make_etag(catalog.content_hash), f"private, max-age={settings.CATALOG_CACHE_MAX_AGE}")
+
+
+@router.get("/suggest")
+async def suggest_exercises(
+    request: Request,
+    response: Response,
+    params: Annotated[ExerciseSuggestParams, Depends()],
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+) -> list[ExerciseSuggestion]:
+    """Autocomplete exercise names and aliases, tolerating small typos."""
+    catalog = await exercise_catalog.get(read_db)
+    response.headers.update(catalog_headers(request, catalog))
+    return [
+        ExerciseSuggestion(id=exercise.id, name=exercise.name, matched_alias=alias) for exercise, alias in catalog.search_index.suggest(params.q, params.limit)
+    ]
 
 
 @router.get("/{exercise_id}", response_model=ExerciseDetail)
 async def get_exercise(
+    request: Request,
     exercise_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-) -> Exercise:
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+) -> Response:
     """Get exercise details by ID."""
-    query = select(Exercise).options(selectinload(Exercise.muscle_group)).where(Exercise.id == exercise_id)
-    result = await db.execute(query)
-    exercise = result.scalar_one_or_none()
-    if not exercise:
+    catalog = await exercise_catalog.get(read_db)
+    content = catalog.json_by_id.get(exercise_id)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Exercise with id {exercise_id} not found")
+    return Response(content, media_type="application/json", headers=catalog_headers(request, catalog))
+
+
+@router.get("/{exercise_id}/progress")
+async def get_exercise_progress(
+    exercise_id: int,
+    params: Annotated[StatsParams, Query()],
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+    principal: Annotated[Principal, Depends(get_current_principal)],
+) -> ExerciseProgress:
+    """Get weekly totals and best lifts of an exercise in the current user trainings."""
+    catalog = await exercise_catalog.get(read_db)
+    if exercise_id not in catalog.by_id:
         raise HTTPException(status_code=404, detail=f"Exercise with id {exercise_id} not found")
-    return exercise
+    return await TrainingStatsService(read_db).get_exercise_progress(principal.user_id, exercise_id, params)
 
 
 @router.get("/", response_model=list[ExerciseList])
 async def list_exercises(
+    request: Request,
     search_params: Annotated[ExerciseSearchParams, Depends()],
-    db: Annotated[AsyncSession, Depends(get_db)],
-) -> list[Exercise]:
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+) -> Response:
     """List exercises with optional search and filtering."""
-    query = select(Exercise).options(selectinload(Exercise.muscle_group))
-
-    if search_params.search:
-        search_term = f"%{search_params.search}%"
-        # Search in name and aliases using JSON array contains
-        json_search = text("EXISTS (SELECT 1 FROM json_each(exercise.aliases) WHERE json_each.value LIKE :search_term)").bindparams(
-            bindparam("search_term", search_term)
-        )
-
-        query = query.where(or_(Exercise.name.ilike(search_term), json_search))
-
-    if search_params.muscle_group:
-        query = query.join(MuscleGroup).where(MuscleGroup.name.ilike(f"%{search_params.muscle_group}%"))
-
-    result = await db.execute(query.order_by(Exercise.name))
-    return list(result.scalars().all())
+    catalog = await exercise_catalog.get(read_db)
+    headers = catalog_headers(request, catalog)
+    if not search_params.search and not search_params.muscle_group:
+        encoding = choose_encoding(request.headers, len(catalog.list_json))
+        if encoding is None:
+            return Response(catalog.list_json, media_type="application/json", headers=headers)
+        response = Response(await catalog.encoded_list_json(encoding), media_type="application/json", headers=headers)
+        set_encoding_headers(response.headers, encoding)
+        return response
+    exercises = catalog.search(search_params.search, search_params.muscle_group)
+    return Response(catalog.dump_list(exercises), media_type="application/json", headers=headers)
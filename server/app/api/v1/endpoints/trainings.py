@@ -1,47 +1,166 @@
+from collections.abc import AsyncIterator
 from typing import Annotated
 
-from app.api.deps import get_current_user, get_db
-from app.models.models import User
-from app.schemas.training import TrainingCreate, TrainingRead, TrainingUpdate
+from app.api.caching import conditional_headers, make_etag
+from app.api.deps import get_current_principal, get_db, get_read_db
+from app.core.metrics import InstrumentedRoute, measure_serialization
+from app.schemas.token import Principal
+from app.schemas.training import (
+    TrainingChanges,
+    TrainingChangesParams,
+    TrainingCreate,
+    TrainingExportParams,
+    TrainingImportResult,
+    TrainingListParams,
+    TrainingPatch,
+    TrainingRead,
+    TrainingUpdate,
+    dump_trainings,
+)
+from app.services.exercise_catalog import exercise_catalog
+from app.services.training_export import EXPORT_WRITERS
+from app.services.training_import import CSV_FIELDS, IMPORT_READERS
 from app.services.training_service import TrainingService
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
+
+
+async def trainings_headers(request: Request, service: TrainingService, user_id: int, *selection: object) -> dict[str, str]:
+    """Answer 304 if the client has the response built from the current user trainings, or return its validator headers.
+
+    Responses name the exercises of the trainings, so the entity tag depends on the catalog as well,
+    and on the `selection` of trainings in the response, such as the page of a list.
+    """
+    count, updated_at = await service.get_trainings_version(user_id)
+    catalog = await exercise_catalog.get(service.read_db)
+    return conditional_headers(request, make_etag(user_id, count, updated_at, catalog.content_hash, *selection), "private, no-cache")
 
 
 @router.post("/")
 async def create_training(
     training: TrainingCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+    principal: Annotated[Principal, Depends(get_current_principal)],
 ) -> TrainingRead:
-    service = TrainingService(db)
-    db_training = await service.create_training(training, current_user.id)
-    db_training = await service.get_training_by_id(db_training.id, current_user.id)
-    return TrainingRead.from_orm(db_training)
+    service = TrainingService(db, read_db)
+    return await service.create_training(training, principal.user_id)
 
 
-@router.get("/")
-async def read_trainings(
+@router.post(
+    "/import",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/TrainingCreate"}}},
+                "application/x-ndjson": {"schema": {"$ref": "#/components/schemas/TrainingCreate"}},
+                "text/csv": {"schema": {"type": "string", "description": f"Columns: {', '.join(CSV_FIELDS)}"}},
+            },
+        },
+    },
+)
+async def import_trainings(
+    request: Request,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> list[TrainingRead]:
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+    principal: Annotated[Principal, Depends(get_current_principal)],
+) -> TrainingImportResult:
+    """Import trainings in bulk from a JSON array, NDJSON or CSV body.
+
+    NDJSON and CSV bodies are streamed, and every chunk of valid trainings is written in its own
+    transaction. Invalid rows are skipped and reported with their errors.
+    """
+    content_type = request.headers.get("Content-Type", "").split(";", 1)[0]
+    reader = IMPORT_READERS.get(content_type)
+    if reader is None:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}")
+    catalog = await exercise_catalog.get(read_db)
     service = TrainingService(db)
-    trainings = await service.get_user_trainings(current_user.id)
-    return [TrainingRead.from_orm(training) for training in trainings]
+    return await service.import_trainings(principal.user_id, reader(request.stream()), catalog.by_id.keys())
+
+
+@router.get("/", response_model=list[TrainingRead])
+async def read_trainings(
+    request: Request,
+    params: Annotated[TrainingListParams, Query()],
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+    principal: Annotated[Principal, Depends(get_current_principal)],
+) -> Response:
+    """List user trainings page by page, newest first.
+
+    The cursor of the next page is returned in the `X-Next-Cursor` header. A request whose
+    `If-None-Match` matches the `ETag` of the current trainings is answered with 304.
+    """
+    service = TrainingService(read_db)
+    cursor = params.cursor.encode() if params.cursor else None
+    headers = await trainings_headers(request, service, principal.user_id, cursor, params.date_from, params.date_to, params.limit)
+    trainings, next_cursor = await service.get_user_trainings(principal.user_id, params)
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor.encode()
+    # The trainings come from the database as plain dicts, so they skip the response model validation
+    with measure_serialization():
+        content = dump_trainings(trainings)
+    return Response(content, media_type="application/json", headers=headers)
+
+
+@router.get("/changes")
+async def read_training_changes(
+    params: Annotated[TrainingChangesParams, Query()],
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+    principal: Annotated[Principal, Depends(get_current_principal)],
+) -> TrainingChanges:
+    """Get the trainings created, updated or deleted after the `since` cursor, for clients keeping a local copy.
+
+    Start from 0 and pass the returned `cursor` as `since` next time. Deleted trainings are
+    listed by id.
+    """
+    service = TrainingService(read_db)
+    return await service.get_changes(principal.user_id, params)
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}},
+)
+async def export_trainings(
+    params: Annotated[TrainingExportParams, Query()],
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+    principal: Annotated[Principal, Depends(get_current_principal)],
+) -> StreamingResponse:
+    """Download the whole training history, oldest first, as NDJSON or CSV.
+
+    Trainings are streamed one at a time as they are read from the database.
+    """
+    media_type, writer = EXPORT_WRITERS[params.format]
+    user_id = principal.user_id
+
+    async def content() -> AsyncIterator[bytes]:
+        # The request session is closed before the response is streamed, so read through a session of its own
+        async with AsyncSession(read_db.bind) as session:
+            async for chunk in writer(TrainingService(session).stream_user_trainings(user_id)):
+                yield chunk
+
+    headers = {"Content-Disposition": f'attachment; filename="trainings.{params.format}"'}
+    return StreamingResponse(content(), media_type=media_type, headers=headers)
 
 
 @router.get("/{training_id}")
 async def read_training(
+    request: Request,
+    response: Response,
     training_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+    principal: Annotated[Principal, Depends(get_current_principal)],
 ) -> TrainingRead:
-    service = TrainingService(db)
-    training = await service.get_training_by_id(training_id, current_user.id)
-    return TrainingRead.from_orm(training)
+    service = TrainingService(read_db)
+    response.headers.update(await trainings_headers(request, service, principal.user_id, training_id))
+    return await service.get_training_read(training_id, principal.user_id)
 
 
 @router.put("/{training_id}")
@@ -49,20 +168,30 @@ async def update_training(
     training_id: int,
     training: TrainingUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    principal: Annotated[Principal, Depends(get_current_principal)],
+) -> TrainingRead:
+    service = TrainingService(db)
+    return await service.update_training(training_id, principal.user_id, training)
+
+
+@router.patch("/{training_id}")
+async def patch_training(
+    training_id: int,
+    training: TrainingPatch,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    principal: Annotated[Principal, Depends(get_current_principal)],
 ) -> TrainingRead:
+    """Update some fields of a training, leaving out those that did not change."""
     service = TrainingService(db)
-    await service.update_training(training_id, current_user.id, training)
-    db_training = await service.get_training_by_id(training_id, current_user.id)
-    return TrainingRead.from_orm(db_training)
+    return await service.update_training(training_id, principal.user_id, training)
 
 
 @router.delete("/{training_id}")
 async def delete_training(
     training_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    principal: Annotated[Principal, Depends(get_current_principal)],
 ) -> dict:
     service = TrainingService(db)
-    await service.delete_training(training_id, current_user.id)
+    await service.delete_training(training_id, principal.user_id)
     return {"message": "Training deleted successfully"}
@@ -1,16 +1,20 @@
 from typing import Annotated
 
-from app.api.deps import form_or_json, get_current_user, get_db
+from app.api.deps import form_or_json, get_current_principal, get_current_user, get_db, get_read_db
+from app.core.metrics import InstrumentedRoute
 from app.core.security import create_access_token
 from app.models.models import User
-from app.schemas.token import Token
+from app.schemas.stats import StatsParams, UserStats
+from app.schemas.token import Principal, Token
 from app.schemas.user import UserCreate, UserLogin, UserResponse
 from app.services import user as user_service
-from fastapi import APIRouter, Depends, HTTPException
+from app.services.exercise_catalog import exercise_catalog
+from app.services.training_stats import TrainingStatsService
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
 
 @router.post("/")
@@ -31,13 +35,24 @@ async def read_users_me(
     return UserResponse.model_validate(current_user)
 
 
+@router.get("/me/stats")
+async def read_users_me_stats(
+    params: Annotated[StatsParams, Query()],
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
+    principal: Annotated[Principal, Depends(get_current_principal)],
+) -> UserStats:
+    """Get weekly training totals of the current user, split by muscle group."""
+    catalog = await exercise_catalog.get(read_db)
+    return await TrainingStatsService(read_db).get_user_stats(principal.user_id, params, catalog)
+
+
 @router.get("/{user_id}")
 async def get_user(
     user_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
 ) -> UserResponse:
     """Get a user by ID."""
-    db_user = await user_service.get_user(db, user_id)
+    db_user = await user_service.get_user(read_db, user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return UserResponse.model_validate(db_user)
@@ -45,11 +60,11 @@ async def get_user(
 
 @router.post("/login")
 async def login(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    read_db: Annotated[AsyncSession, Depends(get_read_db)],
     user_data: UserLogin = form_or_json(UserLogin),  # noqa: B008
 ) -> Token:
     """Login a user with JSON data."""
-    user = await user_service.authenticate_user(db, user_data.username, user_data.password)
+    user = await user_service.authenticate_user(read_db, user_data.username, user_data.password)
     if not user:
         raise HTTPException(
             status_code=401,
@@ -0,0 +1,201 @@
+import zlib
+from collections.abc import Callable
+from typing import Protocol
+
+from app.core.config import settings
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+try:
+    import brotli  # type: ignore[import-untyped]
+except ImportError:  # the `compression` extra is not installed
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # the `compression` extra is not installed
+    zstandard = None  # type: ignore[assignment]
+
+
+# Media types worth compressing, other types are mostly compressed already
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/xml", "application/javascript")
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes:
+        """Return what is buffered, so that everything compressed so far can be decoded."""
+
+    def finish(self) -> bytes:
+        """Return the end of the compressed stream."""
+
+
+class GzipCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+COMPRESSORS: dict[str, Callable[[int], Compressor]] = {"gzip": GzipCompressor}
+if brotli is not None:
+    COMPRESSORS["br"] = BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS["zstd"] = ZstdCompressor
+
+# Encodings available, in the order of preference of the server
+ENCODINGS = [encoding for encoding in settings.COMPRESSION_LEVELS if encoding in COMPRESSORS]
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    """Compress a whole body at once."""
+    compressor = COMPRESSORS[encoding](level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick the encoding of a response from an `Accept-Encoding` header, by the client weights first and then by server preference."""
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    default = weights.get("*", 0.0)
+    # `max` keeps the first of equally weighted encodings, the one the server prefers
+    best = max(ENCODINGS, key=lambda encoding: weights.get(encoding, default), default=None)
+    if best is None or weights.get(best, default) <= 0:
+        return None
+    return best
+
+
+def choose_encoding(request_headers: Headers, size: int) -> str | None:
+    """Pick the encoding of a response body of `size` bytes, or None if it is too small to be worth compressing."""
+    if size < settings.COMPRESSION_MINIMUM_SIZE:
+        return None
+    return negotiate_encoding(request_headers.get("Accept-Encoding"))
+
+
+def set_encoding_headers(headers: MutableHeaders, encoding: str) -> None:
+    """Mark a response as compressed, and its entity tag as weak, since its bytes depend on the encoding."""
+    headers["Content-Encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+    etag = headers.get("ETag")
+    if etag is not None and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """Compress response bodies in the encoding the client prefers, chunk by chunk as they are sent.
+
+    Whole bodies smaller than `COMPRESSION_MINIMUM_SIZE` are sent as they are. Streamed bodies
+    are compressed from the first chunk, and every chunk is flushed so that the client can decode
+    it on arrival. Responses already encoded by the endpoint are passed through.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = negotiate_encoding(Headers(scope=scope).get("Accept-Encoding")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, CompressionResponder(send, encoding).send)
+
+
+class CompressionResponder:
+    """Send function of one response, compressing its body on the way."""
+
+    def __init__(self, send: Send, encoding: str) -> None:
+        self._send = send
+        self.encoding = encoding
+        # Start of the response, held until the first chunk of the body is sent
+        self.start: Message | None = None
+        self.compressor: Compressor | None = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_response(message)
+            if self.passthrough:
+                await self._send(message)
+        elif message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+        else:
+            await self.send_body(message)
+
+    def start_response(self, message: Message) -> None:
+        """Hold the start of the response until the first chunk of the body shows whether to compress it."""
+        self.start = message
+        headers = Headers(raw=message["headers"])
+        media_type = headers.get("Content-Type", "")
+        self.passthrough = "Content-Encoding" in headers or "no-transform" in headers.get("Cache-Control", "") or not media_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def send_body(self, message: Message) -> None:
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        start, self.start = self.start, None
+        if start is not None:
+            if not more_body and len(body) < settings.COMPRESSION_MINIMUM_SIZE:
+                self.passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+            self.compressor = COMPRESSORS[self.encoding](settings.COMPRESSION_LEVELS[self.encoding])
+
+        assert self.compressor is not None
+        data = self.compressor.compress(body) + (self.compressor.flush() if more_body else self.compressor.finish())
+        if start is not None:
+            start["headers"] = list(start["headers"])
+            headers = MutableHeaders(raw=start["headers"])
+            set_encoding_headers(headers, self.encoding)
+            del headers["Content-Length"]
+            if not more_body:
+                headers["Content-Length"] = str(len(data))
+            await self._send(start)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
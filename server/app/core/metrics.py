@@ -0,0 +1,262 @@
+import functools
+import inspect
+import logging
+import math
+import time
+from collections.abc import Callable, Coroutine, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from app.core.config import settings
+from app.core.security import password_hasher
+from app.core.timing import Timing
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the buckets of the histograms of durations in seconds, and of counts
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000)
+
+
+class Histogram:
+    """Prometheus histogram, with a series of cumulative buckets per combination of label values."""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str], buckets: Sequence[float]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = (*buckets, math.inf)
+        # Count per bucket, then the sum of the observed values, by label values
+        self.series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [0] * (len(self.buckets) + 1)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-1] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, series in sorted(self.series.items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labels, label_values, strict=True))
+            for bound, count in zip(self.buckets, series, strict=False):
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                yield f'{self.name}_bucket{{{labels},le="{le}"}} {count:g}'
+            yield f"{self.name}_sum{{{labels}}} {series[-1]:g}"
+            yield f"{self.name}_count{{{labels}}} {series[-2]:g}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+
+    def inc(self) -> None:
+        self.value += 1
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        yield f"{self.name} {self.value}"
+
+
+class Summary:
+    """Prometheus summary without quantiles, of the durations a `Timing` has observed."""
+
+    def __init__(self, name: str, documentation: str, timing: Timing) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.timing = timing
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} summary"
+        yield f"{self.name}_sum {self.timing.total:g}"
+        yield f"{self.name}_count {self.timing.count}"
+
+
+class CounterFunction:
+    """Prometheus counter of a count kept by another object, read when rendered."""
+
+    def __init__(self, name: str, documentation: str, value: Callable[[], int]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.value = value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        yield f"{self.name} {self.value()}"
+
+
+REQUEST_LABELS = ("route", "method")
+request_duration = Histogram(
+    "http_request_duration_seconds", "Time from the request to the end of the response.", (*REQUEST_LABELS, "status"), DURATION_BUCKETS
+)
+request_db_duration = Histogram("http_request_db_duration_seconds", "Time spent in database queries per request.", REQUEST_LABELS, DURATION_BUCKETS)
+request_queries = Histogram("http_request_db_queries", "Database queries per request.", REQUEST_LABELS, COUNT_BUCKETS)
+request_rows = Histogram("http_request_db_rows", "Rows fetched from the database per request.", REQUEST_LABELS, COUNT_BUCKETS)
+request_serialization = Histogram("http_request_serialization_seconds", "Time spent serializing response bodies per request.", REQUEST_LABELS, DURATION_BUCKETS)
+slow_queries = Counter("db_slow_queries_total", "Database queries slower than the slow query threshold.")
+
+password_hash_queue_wait = Summary("password_hash_queue_wait_seconds", "Time password checks waited for a bcrypt thread.", password_hasher.queue_wait)
+password_hash_duration = Summary("password_hash_duration_seconds", "Time bcrypt took per password check or hash.", password_hasher.hash_time)
+password_hash_rejected = CounterFunction(
+    "password_hash_rejected_total", "Password checks answered with 503 because the bcrypt queue was full.", lambda: password_hasher.rejected
+)
+
+METRICS: list[Histogram | Counter | Summary | CounterFunction] = [
+    request_duration,
+    request_db_duration,
+    request_queries,
+    request_rows,
+    request_serialization,
+    slow_queries,
+    password_hash_queue_wait,
+    password_hash_duration,
+    password_hash_rejected,
+]
+
+
+def render_metrics() -> str:
+    """Render all metrics in the Prometheus text format."""
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+class RequestMetrics:
+    """Where the time of one request went, filled in as it is handled."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.serialization_time = 0.0
+        # When the endpoint function returned, see `InstrumentedRoute`
+        self.endpoint_end: float | None = None
+
+    def server_timing(self) -> str:
+        """Format the metrics so far as a `Server-Timing` header, durations in milliseconds."""
+        total = (time.perf_counter() - self.start) * 1000
+        return (
+            f"app;dur={total:.1f}, "
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries, {self.rows} rows", '
+            f"serialize;dur={self.serialization_time * 1000:.1f}"
+        )
+
+    def observe(self, route: str, method: str, status: int) -> None:
+        request_duration.observe(time.perf_counter() - self.start, route, method, str(status))
+        request_db_duration.observe(self.db_time, route, method)
+        request_queries.observe(self.queries, route, method)
+        request_rows.observe(self.rows, route, method)
+        request_serialization.observe(self.serialization_time, route, method)
+
+
+_request_metrics: ContextVar[RequestMetrics | None] = ContextVar("request_metrics", default=None)
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> str:
+    """Describe the parameters bound to a statement by their types, leaving their values out of the logs."""
+    if executemany:
+        return f"{len(parameters)} x {parameter_shape(parameters[0], executemany=False)}" if parameters else "[]"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in parameters or ()) + ")"
+
+
+def record_query(statement: str, parameters: Any, executemany: bool, duration: float, rows: int) -> None:
+    """Add a query to the metrics of the current request, and log it if it is slow."""
+    metrics = _request_metrics.get()
+    if metrics is not None:
+        metrics.queries += 1
+        metrics.db_time += duration
+        metrics.rows += rows
+    if duration >= settings.SLOW_QUERY_THRESHOLD:
+        slow_queries.inc()
+        logger.warning("Slow query (%.1f ms, %d rows): %s; parameters: %s", duration * 1000, rows, statement, parameter_shape(parameters, executemany))
+
+
+@contextmanager
+def measure_serialization() -> Iterator[None]:
+    """Count the time of the block as serialization, for endpoints rendering their response body themselves."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _request_metrics.get()
+        if metrics is not None:
+            metrics.serialization_time += time.perf_counter() - start
+
+
+class InstrumentedRoute(APIRoute):
+    """Route that counts the time from the return of its endpoint to the response as serialization."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        call = self.dependant.call
+        # Sync endpoints run in a thread pool and are left as they are, without serialization time
+        if inspect.iscoroutinefunction(call):
+
+            @functools.wraps(call)
+            async def timed_call(**values: Any) -> Any:
+                result = await call(**values)
+                metrics = _request_metrics.get()
+                if metrics is not None:
+                    metrics.endpoint_end = time.perf_counter()
+                return result
+
+            self.dependant.call = timed_call
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            response = await handler(request)
+            metrics = _request_metrics.get()
+            if metrics is not None and metrics.endpoint_end is not None:
+                metrics.serialization_time += time.perf_counter() - metrics.endpoint_end
+            return response
+
+        return timed_handler
+
+
+class MetricsMiddleware:
+    """Collect the metrics of every request, and send them in the `Server-Timing` header.
+
+    The header is written when the response starts, so the database time of a streamed body is
+    only in the histograms, which are observed once the response has ended.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", metrics.server_timing())
+            await send(message)
+
+        token = _request_metrics.set(metrics)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_metrics.reset(token)
+            route = scope.get("route")
+            metrics.observe(getattr(route, "name", "unmatched"), scope["method"], status)
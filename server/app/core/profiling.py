@@ -0,0 +1,243 @@
+import asyncio
+import sys
+import threading
+import time
+from collections.abc import Callable
+from types import FrameType
+from typing import Any
+
+import orjson
+from app.core.config import settings
+from app.core.security import decode_token
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Stack of the samples that did not fit in the bounded stacks of a route
+TRUNCATED_STACK = "[truncated]"
+
+
+def frame_name(frame: FrameType) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+def task_stack(task: asyncio.Task, running: bool, thread_frame: FrameType | None) -> str:
+    """Collapse the stack of a task, root first, into names separated by ";".
+
+    The await chain of the task is followed from its coroutine down to what it is waiting for,
+    so a task waiting for the database is attributed to the coroutines waiting for it. If the task
+    is running, the functions called from its innermost coroutine are taken from the thread.
+    """
+    names: list[str] = []
+    innermost: FrameType | None = None
+    awaitable: Any = task.get_coro()
+    while awaitable is not None:
+        if isinstance(awaitable, asyncio.Task):
+            awaitable = awaitable.get_coro()
+            continue
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        names.append(frame_name(frame))
+        innermost = frame
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+
+    if not running:
+        if awaitable is not None:
+            names.append("[await]")
+        return ";".join(names)
+
+    called = []
+    frame = thread_frame
+    # Frames of the greenlets SQLAlchemy runs sync code in do not lead back to the coroutines, so
+    # such a stack is kept whole under the outer coroutine of the task
+    while frame is not None and frame is not innermost:
+        called.append(frame_name(frame))
+        frame = frame.f_back
+    names.extend(reversed(called))
+    return ";".join(names)
+
+
+def add_sample(stacks: dict[str, float], stack: str, seconds: float, max_stacks: int) -> None:
+    """Add the time of a sample to its stack, or to `TRUNCATED_STACK` once `max_stacks` stacks are kept."""
+    if stack not in stacks and len(stacks) >= max_stacks:
+        stack = TRUNCATED_STACK
+    stacks[stack] = stacks.get(stack, 0.0) + seconds
+
+
+class ProfiledRequest:
+    """Stacks sampled from the task handling one request."""
+
+    def __init__(self, task: asyncio.Task, interval: float) -> None:
+        self.task = task
+        self.loop = task.get_loop()
+        self.thread_id = threading.get_ident()
+        self.interval = interval
+        self.last_sample = time.perf_counter()
+        # Seconds of wall time by collapsed stack
+        self.stacks: dict[str, float] = {}
+
+
+class SamplingProfiler:
+    """Process-wide sampling profiler of the requests being handled, aggregated by route.
+
+    A thread samples the stack of every request every `PROFILE_INTERVAL` seconds, or every
+    `PROFILE_REQUEST_INTERVAL` seconds for requests profiled on their own. The time of a sample
+    is the wall time since the previous sample of the request, so time spent waiting for the
+    database counts as much as time spent computing.
+    """
+
+    def __init__(self) -> None:
+        self.requests: dict[int, ProfiledRequest] = {}
+        self.routes: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._next_interval()):
+            self.sample()
+
+    def _next_interval(self) -> float:
+        with self._lock:
+            return min((request.interval for request in self.requests.values()), default=settings.PROFILE_INTERVAL)
+
+    def sample(self) -> None:
+        """Sample every request due for a sample."""
+        now = time.perf_counter()
+        frames = sys._current_frames()  # noqa: SLF001
+        with self._lock:
+            for request in self.requests.values():
+                if now - request.last_sample < request.interval:
+                    continue
+                running = asyncio.current_task(request.loop) is request.task
+                stack = task_stack(request.task, running, frames.get(request.thread_id) if running else None)
+                add_sample(request.stacks, stack, now - request.last_sample, settings.PROFILE_MAX_STACKS)
+                request.last_sample = now
+
+    def enter(self, interval: float) -> ProfiledRequest:
+        """Start sampling the request handled by the current task."""
+        task = asyncio.current_task()
+        assert task is not None
+        request = ProfiledRequest(task, interval)
+        with self._lock:
+            self.requests[id(request)] = request
+        return request
+
+    def exit(self, request: ProfiledRequest, route: str) -> None:
+        """Stop sampling a request and add its stacks to those of its route."""
+        with self._lock:
+            del self.requests[id(request)]
+            stacks = self.routes.setdefault(route, {})
+            for stack, seconds in request.stacks.items():
+                add_sample(stacks, stack, seconds, settings.PROFILE_MAX_STACKS)
+
+    def profile(self, route: str | None = None) -> dict[str, float]:
+        """Get the stacks of a route, or of all routes with the route as their root."""
+        with self._lock:
+            if route is not None:
+                return dict(self.routes.get(route, {}))
+            return {f"{name};{stack}": seconds for name, stacks in self.routes.items() for stack, seconds in stacks.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.routes.clear()
+
+
+profiler = SamplingProfiler()
+
+
+def format_collapsed(stacks: dict[str, float]) -> bytes:
+    """Format stacks as collapsed stack lines for flame graph tools, weighted in microseconds."""
+    return "".join(f"{stack} {round(seconds * 1_000_000)}\n" for stack, seconds in sorted(stacks.items())).encode()
+
+
+def format_speedscope(stacks: dict[str, float], name: str) -> bytes:
+    """Format stacks as a sampled profile of https://www.speedscope.app, weighted in seconds."""
+    frames: dict[str, int] = {}
+    samples = [[frames.setdefault(frame, len(frames)) for frame in stack.split(";")] for stack in stacks]
+    total = sum(stacks.values())
+    return orjson.dumps(
+        {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": settings.PROJECT_NAME,
+            "shared": {"frames": [{"name": frame} for frame in frames]},
+            "profiles": [
+                {"type": "sampled", "name": name, "unit": "seconds", "startValue": 0, "endValue": total, "samples": samples, "weights": list(stacks.values())}
+            ],
+        }
+    )
+
+
+PROFILE_FORMATS: dict[str, tuple[str, Callable[[dict[str, float], str], bytes]]] = {
+    "collapsed": ("text/plain", lambda stacks, _name: format_collapsed(stacks)),
+    "speedscope": ("application/json", format_speedscope),
+}
+
+
+def is_admin(authorization: str | None) -> bool:
+    """Check that a request carries the valid token of an admin, without touching the database."""
+    scheme, _, token = (authorization or "").partition(" ")
+    payload = decode_token(token) if scheme.lower() == "bearer" else None
+    return payload is not None and payload.get("sub") in {str(user_id) for user_id in settings.ADMIN_USER_IDS}
+
+
+class ProfilingMiddleware:
+    """Sample every request for the profile of its route, when profiling is enabled.
+
+    An admin request with an `X-Profile: 1` header, or `X-Profile: speedscope`, is sampled
+    more often and answered with its own profile instead of its response, whose status is
+    in the `X-Profile-Status` header.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        profile_format = headers.get("X-Profile")
+        if profile_format is not None:
+            profile_format = "collapsed" if profile_format == "1" else profile_format
+            if profile_format not in PROFILE_FORMATS or not is_admin(headers.get("Authorization")):
+                profile_format = None
+
+        request = profiler.enter(settings.PROFILE_INTERVAL if profile_format is None else settings.PROFILE_REQUEST_INTERVAL)
+        status = 500
+
+        async def discard(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        try:
+            await self.app(scope, receive, send if profile_format is None else discard)
+        finally:
+            route = getattr(scope.get("route"), "name", "unmatched")
+            profiler.exit(request, route)
+        if profile_format is not None:
+            media_type, render = PROFILE_FORMATS[profile_format]
+            body = render(request.stacks, f"{scope['method']} {scope['path']} ({route})")
+            response_headers = [
+                (b"content-type", media_type.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profile-status", str(status).encode()),
+            ]
+            await send({"type": "http.response.start", "status": 200, "headers": response_headers})
+            await send({"type": "http.response.body", "body": body})
@@ -1,3 +1,7 @@
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
@@ -8,6 +12,8 @@ bcrypt.__about__ = bcrypt  # type: ignore[attr-defined]
 
 import jwt  # noqa: E402
 from app.core.config import settings  # noqa: E402
+from app.core.timing import Timing  # noqa: E402
+from fastapi import HTTPException, status  # noqa: E402
 from passlib.context import CryptContext  # noqa: E402
 
 
@@ -28,6 +34,64 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    """Runs bcrypt in a bounded thread pool, so that password checks do not block the event loop.
+
+    bcrypt releases the GIL while hashing, so the threads run in parallel with the event loop.
+    Once `workers + queue_size` checks are in flight, new ones are rejected with a 503.
+    """
+
+    def __init__(self, workers: int, queue_size: int) -> None:
+        self.workers = workers
+        self.limit = workers + queue_size
+        self.pending = 0
+        self.rejected = 0
+        self.queue_wait = Timing()
+        self.hash_time = Timing()
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash."""
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """Generate a password hash."""
+        return await self.run(get_password_hash, password)
+
+    async def run[T](self, function: Callable[..., T], *args: Any) -> T:
+        if self.pending >= self.limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password checks in progress",
+                headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER)},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="password-hasher")
+
+        def timed() -> tuple[T, float, float]:
+            started = time.perf_counter()
+            return function(*args), started, time.perf_counter()
+
+        self.pending += 1
+        submitted = time.perf_counter()
+        try:
+            result, started, finished = await asyncio.wrap_future(self._executor.submit(timed))
+        finally:
+            self.pending -= 1
+        self.queue_wait.observe(started - submitted)
+        self.hash_time.observe(finished - started)
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
+
+
 def create_access_token(subject: str | Any, expires_delta: timedelta | None = None) -> str:
     """Create a JWT access token."""
     if expires_delta:
@@ -39,10 +103,9 @@ def create_access_token(subject: str | Any, expires_delta: timedelta | None = No
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
 
 
-def verify_token(token: str) -> str | None:
-    """Verify a JWT token and return the subject."""
+def decode_token(token: str) -> dict[str, Any] | None:
+    """Verify a JWT token and return its claims."""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
     except jwt.InvalidTokenError:
         return None
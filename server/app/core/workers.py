@@ -0,0 +1,104 @@
+import asyncio
+import fcntl
+import logging
+import os
+import socket
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+
+logger = logging.getLogger(__name__)
+
+# Largest message a worker sends, well under the datagram size limit of Unix sockets
+MAX_MESSAGE_SIZE = 64 * 1024
+
+
+@asynccontextmanager
+async def file_lock(path: Path) -> AsyncIterator[None]:
+    """Hold an exclusive lock on a file, shared by the processes of a host, waiting for it in a thread."""
+    with path.open("a") as file:
+        await asyncio.to_thread(fcntl.flock, file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+class WorkerChannel:
+    """Messages between the worker processes of a host, over a Unix datagram socket per worker in a directory.
+
+    Caches kept in every worker subscribe to a topic, and publish to it when a write in their
+    worker makes them stale, so that the other workers drop their copies too. Delivery is best
+    effort: a message is lost if a worker is too busy to drain its socket, which is then logged.
+    """
+
+    def __init__(self) -> None:
+        self.directory: Path | None = None
+        self.handlers: dict[str, Callable[[Any], None]] = {}
+        self._socket: socket.socket | None = None
+        self._path: Path | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def subscribe(self, topic: str, handler: Callable[[Any], None]) -> None:
+        self.handlers[topic] = handler
+
+    def start(self, directory: Path, name: str | None = None) -> None:
+        """Receive the messages of the other workers on the running event loop, on a socket named after the process."""
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self._path = directory / f"{name or os.getpid()}.sock"
+        self._path.unlink(missing_ok=True)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+        self._socket.bind(str(self._path))
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._socket.fileno(), self._receive)
+
+    def stop(self) -> None:
+        if self._socket is not None:
+            if self._loop is not None:
+                self._loop.remove_reader(self._socket.fileno())
+            self._socket.close()
+            self._socket = None
+        if self._path is not None:
+            self._path.unlink(missing_ok=True)
+            self._path = None
+        self.directory = None
+
+    def _receive(self) -> None:
+        assert self._socket is not None
+        while True:
+            try:
+                data = self._socket.recv(MAX_MESSAGE_SIZE)
+            except BlockingIOError:
+                return
+            topic, payload = orjson.loads(data)
+            handler = self.handlers.get(topic)
+            if handler is not None:
+                handler(payload)
+
+    def publish(self, topic: str, payload: Any = None) -> None:
+        """Send a message to the handlers of the topic in every other worker, not in this one."""
+        if self.directory is None or self._socket is None:
+            return
+        data = orjson.dumps([topic, payload])
+        if len(data) > MAX_MESSAGE_SIZE:
+            raise ValueError(f"Message of {len(data)} bytes on {topic!r} exceeds {MAX_MESSAGE_SIZE} bytes")
+        for path in self.directory.glob("*.sock"):
+            if path == self._path:
+                continue
+            try:
+                self._socket.sendto(data, str(path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Left behind by a worker that did not stop cleanly
+                with suppress(FileNotFoundError):
+                    path.unlink()
+            except BlockingIOError:
+                logger.warning("Worker socket %s is full, dropped a message on %r", path.name, topic)
+
+
+worker_channel = WorkerChannel()
@@ -1,10 +1,43 @@
-from typing import TypedDict
+"""Sync the exercise catalog from a data file into the database.
 
-from app.models.models import Exercise, MuscleGroup
-from sqlalchemy import select
+Run from the server directory to sync a catalog file other than the configured one:
+
+    python -m app.db.seed_exercises path/to/exercises.csv.gz
+"""
+
+import argparse
+import asyncio
+import bz2
+import csv
+import gzip
+import hashlib
+import json
+import lzma
+from collections.abc import Callable, Iterable, Iterator
+from datetime import UTC, datetime
+from itertools import batched
+from pathlib import Path
+from typing import Any, TextIO, TypedDict
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, engine, upsert
+from app.models.models import AppState, Exercise, MuscleGroup
+from app.schemas.exercise import CatalogSyncResult
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+# Key of the `AppState` row holding the hash of the last synced catalog file
+CATALOG_HASH_KEY = "exercise_catalog_hash"
+
+# Characters read from a catalog file at a time
+READ_SIZE = 64 * 1024
+
+# Separator of the aliases in the `aliases` column of a CSV catalog
+CSV_ALIAS_SEPARATOR = "|"
+
+
 class ExerciseData(TypedDict):
     name: str
     description: str
@@ -12,148 +45,210 @@ class ExerciseData(TypedDict):
     aliases: list[str]
 
 
-async def get_or_create_muscle_group(db: AsyncSession, name: str) -> MuscleGroup:
-    """Get existing muscle group or create a new one."""
-    stmt = select(MuscleGroup).where(MuscleGroup.name == name)
-    result = await db.execute(stmt)
-    muscle_group = result.scalar_one_or_none()
-
-    if muscle_group is None:
-        muscle_group = MuscleGroup(name=name)
-        db.add(muscle_group)
-        await db.commit()
-        await db.refresh(muscle_group)
-
-    return muscle_group
-
-
-async def get_or_create_exercise(
-    db: AsyncSession,
-    name: str,
-    description: str,
-    muscle_group_name: str,
-    aliases: list[str],
-) -> Exercise:
-    """Get existing exercise or create a new one."""
-    stmt = select(Exercise).where(Exercise.name == name)
-    result = await db.execute(stmt)
-    exercise = result.scalar_one_or_none()
-
-    if exercise is None:
-        muscle_group = await get_or_create_muscle_group(db, muscle_group_name)
-        exercise = Exercise(
-            name=name,
-            description=description,
-            muscle_group_id=muscle_group.id,
-            aliases=aliases,
-        )
-        db.add(exercise)
-        await db.commit()
-        await db.refresh(exercise)
-
-    return exercise
-
-
-async def seed_exercises(db: AsyncSession) -> None:
-    """Seed the database with common gym exercises."""
-    exercises_data: list[ExerciseData] = [
-        {
-            "name": "Жим лежа",
-            "description": "Базовое упражнение, которое в первую очередь нацелено на грудные мышцы, а также прорабатывает плечи и трицепсы.",
-            "muscle_group": "грудь",
-            "aliases": ["Barbell Bench Press", "Flat Bench Press", "Жим лежа"],
-        },
-        {
-            "name": "Приседания со штангой",
-            "description": "Базовое упражнение, которое нацелено на квадрицепсы, бицепс бедра и ягодичные мышцы.",
-            "muscle_group": "ноги",
-            "aliases": ["Barbell Squat", "Back Squat", "Приседания со штангой"],
-        },
-        {
-            "name": "Становая тяга",
-            "description": "Базовое упражнение, которое прорабатывает всю заднюю цепь, включая спину, ягодицы и бицепс бедра.",
-            "muscle_group": "спина",
-            "aliases": ["Conventional Deadlift", "Становая тяга"],
-        },
-        {
-            "name": "Подтягивания",
-            "description": "Упражнение с собственным весом, которое в первую очередь нацелено на спину и бицепс.",
-            "muscle_group": "спина",
-            "aliases": ["Chin-up", "Подтягивания"],
-        },
-        {
-            "name": "Жим штанги стоя",
-            "description": "Базовое упражнение, которое нацелено на плечи и трицепсы.",
-            "muscle_group": "плечи",
-            "aliases": ["Military Press", "Standing Press", "Жим штанги стоя"],
-        },
-        {
-            "name": "Тяга штанги в наклоне",
-            "description": "Базовое упражнение, которое нацелено на мышцы спины.",
-            "muscle_group": "спина",
-            "aliases": ["Bent Over Row", "Тяга штанги в наклоне"],
-        },
-        {
-            "name": "Жим гантелей лежа",
-            "description": "Упражнение для груди, которое позволяет выполнять движение с большей амплитудой, чем жим штанги лежа.",
-            "muscle_group": "грудь",
-            "aliases": ["Dumbbell Bench Press", "Жим гантелей лежа"],
-        },
-        {
-            "name": "Румынская тяга",
-            "description": "Вариация становой тяги, которая больше фокусируется на бицепсе бедра и ягодичных мышцах.",
-            "muscle_group": "ноги",
-            "aliases": ["RDL", "Румынская тяга"],
-        },
-        {
-            "name": "Выпады",
-            "description": "Одностороннее упражнение для ног, которое нацелено на квадрицепсы, бицепс бедра и ягодичные мышцы.",
-            "muscle_group": "ноги",
-            "aliases": ["Walking Lunges", "Static Lunges", "Выпады"],
-        },
-        {
-            "name": "Сгибание рук на бицепс",
-            "description": "Изолирующее упражнение, которое нацелено на бицепс.",
-            "muscle_group": "руки",
-            "aliases": ["Dumbbell Curl", "Barbell Curl", "Сгибание рук на бицепс"],
-        },
-        {
-            "name": "Разгибание рук на блоке",
-            "description": "Изолирующее упражнение, которое нацелено на трицепс.",
-            "muscle_group": "руки",
-            "aliases": ["Cable Pushdown", "Разгибание рук на блоке"],
-        },
-        {
-            "name": "Жим ногами",
-            "description": "Базовое упражнение, которое нацелено на квадрицепсы, бицепс бедра и ягодичные мышцы.",
-            "muscle_group": "ноги",
-            "aliases": ["Squat Press", "Жим ногами"],
-        },
-        {
-            "name": "Тяга верхнего блока",
-            "description": "Базовое упражнение, которое нацелено на широчайшие мышцы спины и другие мышцы спины.",
-            "muscle_group": "спина",
-            "aliases": ["Wide Grip Pulldown", "Тяга верхнего блока"],
-        },
-        {
-            "name": "Жим гантелей сидя",
-            "description": "Базовое упражнение, которое нацелено на дельтовидные мышцы и трицепсы.",
-            "muscle_group": "плечи",
-            "aliases": ["Dumbbell Shoulder Press", "Жим гантелей сидя"],
-        },
-        {
-            "name": "Подъемы на носки",
-            "description": "Изолирующее упражнение, которое нацелено на икроножные мышцы.",
-            "muscle_group": "ноги",
-            "aliases": ["Standing Calf Raise", "Подъемы на носки", "Единорог"],
-        },
-    ]
-
-    for exercise_data in exercises_data:
-        await get_or_create_exercise(
-            db,
-            name=exercise_data["name"],
-            description=exercise_data["description"],
-            muscle_group_name=exercise_data["muscle_group"],
-            aliases=exercise_data["aliases"],
-        )
+_exercises_adapter = TypeAdapter(list[ExerciseData])
+
+
+class JsonStream:
+    """Text of a JSON file read a buffer at a time, from which values are decoded one after another."""
+
+    def __init__(self, file: TextIO) -> None:
+        self.file = file
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def read(self) -> None:
+        """Append the next buffer of the file to the text not yet consumed."""
+        data = self.file.read(READ_SIZE)
+        self.buffer, self.position, self.eof = self.buffer[self.position :] + data, 0, not data
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, without consuming it."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.eof:
+                raise ValueError("Unexpected end of JSON")
+            self.read()
+
+    def next_char(self) -> str:
+        """Consume the next character that is not whitespace."""
+        char = self.peek()
+        self.position += 1
+        return char
+
+    def next_value(self) -> Any:
+        """Consume the next JSON value, reading on while it may continue past the buffer."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                end = len(self.buffer)
+            if end < len(self.buffer) or self.eof:
+                self.position = end
+                return value
+            self.read()
+
+
+def read_json(file: TextIO) -> Iterator[Any]:
+    """Read the items of a JSON array one at a time, without loading the array whole."""
+    stream = JsonStream(file)
+    if stream.next_char() != "[":
+        raise ValueError("Expected a JSON array of exercises")
+    if stream.peek() == "]":
+        return
+    while True:
+        yield stream.next_value()
+        char = stream.next_char()
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError(f"Expected ',' or ']' in the JSON array, got {char!r}")
+
+
+def read_ndjson(file: TextIO) -> Iterator[Any]:
+    """Read one exercise per line, skipping blank lines."""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(file: TextIO) -> Iterator[Any]:
+    """Read one exercise per row, with the aliases joined by `CSV_ALIAS_SEPARATOR` in their column."""
+    for row in csv.DictReader(file):
+        aliases = row.get("aliases") or ""
+        yield {**row, "aliases": [alias.strip() for alias in aliases.split(CSV_ALIAS_SEPARATOR) if alias.strip()]}
+
+
+CATALOG_READERS: dict[str, Callable[[TextIO], Iterator[Any]]] = {
+    ".json": read_json,
+    ".ndjson": read_ndjson,
+    ".jsonl": read_ndjson,
+    ".csv": read_csv,
+}
+
+CATALOG_OPENERS: dict[str, Callable[..., Any]] = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+
+def open_catalog(path: Path) -> tuple[TextIO, Callable[[TextIO], Iterator[Any]]]:
+    """Open a catalog file as text, decompressing it on the fly, with the reader of its format."""
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    opener = CATALOG_OPENERS.get(suffixes[-1]) if suffixes else None
+    if opener is not None:
+        suffixes.pop()
+    reader = CATALOG_READERS.get(suffixes[-1]) if suffixes else None
+    if reader is None:
+        raise ValueError(f"{path}: expected a {', '.join(CATALOG_READERS)} file, optionally {', '.join(CATALOG_OPENERS)} compressed")
+    file = (opener or open)(path, "rt", encoding="utf-8-sig", newline="" if reader is read_csv else None)
+    return file, reader
+
+
+def read_catalog(path: Path, chunk_size: int = settings.CATALOG_CHUNK_SIZE) -> Iterator[list[ExerciseData]]:
+    """Stream the exercises of a catalog file in validated chunks, holding one chunk in memory at a time."""
+    file, reader = open_catalog(path)
+    with file:
+        offset = 0
+        for chunk in batched(reader(file), chunk_size, strict=False):
+            try:
+                yield _exercises_adapter.validate_python(chunk)
+            except ValidationError as e:
+                error = e.errors()[0]
+                entry, *field = error["loc"]
+                raise ValueError(f"{path}: entry {offset + int(entry) + 1}: {'.'.join(map(str, field))}: {error['msg']}") from e
+            offset += len(chunk)
+
+
+def file_hash(path: Path) -> str:
+    """Hash the content of a file as stored, without reading it whole."""
+    with path.open("rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+async def sync_exercises(db: AsyncSession, chunks: Iterable[list[ExerciseData]]) -> CatalogSyncResult:
+    """Insert the new exercises and update the changed ones, matched by name, chunk by chunk.
+
+    Exercises missing from the catalog are left alone, as trainings may refer to them. Nothing is committed.
+    """
+    result = CatalogSyncResult()
+    muscle_group_ids = dict((await db.execute(select(MuscleGroup.name, MuscleGroup.id))).tuples().all())
+    for chunk in chunks:
+        # A later entry of the same name wins
+        entries = {entry["name"]: entry for entry in chunk}
+
+        new_muscle_groups = sorted({entry["muscle_group"] for entry in entries.values()} - muscle_group_ids.keys())
+        if new_muscle_groups:
+            rows = await db.execute(insert(MuscleGroup).returning(MuscleGroup.name, MuscleGroup.id), [{"name": name} for name in new_muscle_groups])
+            muscle_group_ids.update(rows.tuples().all())
+
+        columns = (Exercise.id, Exercise.name, Exercise.description, Exercise.muscle_group_id, Exercise.aliases)
+        existing = {row.name: row for row in await db.execute(select(*columns).where(Exercise.name.in_(entries)))}
+        new, changed = [], []
+        for name, entry in entries.items():
+            values = {
+                "name": name,
+                "description": entry["description"],
+                "muscle_group_id": muscle_group_ids[entry["muscle_group"]],
+                "aliases": entry["aliases"],
+            }
+            row = existing.get(name)
+            if row is None:
+                new.append(values)
+            elif (row.description, row.muscle_group_id, row.aliases) != (values["description"], values["muscle_group_id"], values["aliases"]):
+                changed.append({**values, "id": row.id, "updated_at": datetime.now(UTC)})
+            else:
+                result.unchanged += 1
+        if new:
+            await db.execute(insert(Exercise), new)
+        if changed:
+            await db.execute(update(Exercise), changed)
+        result.inserted += len(new)
+        result.updated += len(changed)
+    return result
+
+
+async def seed_exercises(db: AsyncSession, path: Path = settings.EXERCISE_CATALOG_PATH, *, force: bool = False) -> CatalogSyncResult | None:
+    """Sync the exercises of a catalog file into the database in a single transaction.
+
+    The hash of the synced file is stored in the database, so an unchanged file costs one query
+    and returns None, unless `force` is set.
+    """
+    content_hash = file_hash(path)
+    stored_hash = await db.scalar(select(AppState.value).where(AppState.key == CATALOG_HASH_KEY))
+    if stored_hash == content_hash and not force:
+        return None
+
+    result = await sync_exercises(db, read_catalog(path))
+    insert_state = upsert(db, AppState)
+    await db.execute(
+        insert_state.on_conflict_do_update(index_elements=[AppState.key], set_={"value": insert_state.excluded.value, "updated_at": datetime.now(UTC)}),
+        {"key": CATALOG_HASH_KEY, "value": content_hash},
+    )
+    await db.commit()
+    # The statements bypass the identity map, so objects the session has loaded are stale
+    db.expire_all()
+    return result
+
+
+async def main(path: Path, force: bool) -> None:
+    async with AsyncSessionLocal() as db:
+        result = await seed_exercises(db, path, force=force)
+    await engine.dispose()
+    print("Catalog unchanged" if result is None else f"Inserted {result.inserted}, updated {result.updated}, unchanged {result.unchanged} exercises")  # noqa: T201
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", type=Path, nargs="?", default=settings.EXERCISE_CATALOG_PATH)
+    parser.add_argument("--force", action="store_true", help="sync even if the file has not changed since the last sync")
+    args = parser.parse_args()
+    asyncio.run(main(args.path, args.force))
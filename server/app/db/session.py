@@ -1,13 +1,104 @@
+import time
 from collections.abc import AsyncGenerator
+from typing import Any
 
 from app.core.config import settings
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.core.metrics import record_query
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import ConnectionPoolEntry
 
 
-engine = create_async_engine(
-    settings.SQLITE_DATABASE_URL,
-    echo=False,
-)
+_QUERY_START = "query_start"
+
+
+def create_engine(url: str, *, writer: bool) -> AsyncEngine:
+    """Create the engine of the writer connection, or of the reader connections.
+
+    SQLite allows one writer at a time, so writes are serialized on one connection in the
+    process rather than retried on "database is locked", and in WAL mode readers do not wait
+    for it. A server database gets a single pool shared by reads and writes, see `read_engine`.
+    """
+    if not url.startswith("sqlite"):
+        engine = create_async_engine(
+            url,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    elif writer:
+        engine = create_async_engine(url, pool_size=1, max_overflow=0, pool_timeout=settings.SQLITE_WRITE_TIMEOUT)
+    else:
+        engine = create_async_engine(url, pool_size=settings.SQLITE_READ_POOL_SIZE, max_overflow=0)
+    if engine.dialect.name == "sqlite":
+        apply_sqlite_profile(engine, writer=writer)
+    instrument_engine(engine)
+    return engine
+
+
+def apply_sqlite_profile(engine: AsyncEngine, *, writer: bool) -> None:
+    """Set the configured pragmas on every new connection, and make the writer take its lock upfront.
+
+    Readers stay in autocommit mode, so every statement sees the last commit, including those
+    of the same request, and no read transaction keeps the WAL from being checkpointed.
+    """
+    pragmas: dict[str, Any] = {**settings.SQLITE_PRAGMAS, "query_only": not writer}
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def receive_connect(dbapi_connection: Any, _connection_record: ConnectionPoolEntry) -> None:
+        # Run in autocommit mode unless SQLAlchemy emits BEGIN itself, see `receive_begin`
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {int(value) if isinstance(value, bool) else value}")
+        cursor.close()
+
+    if writer:
+
+        @event.listens_for(engine.sync_engine, "begin")
+        def receive_begin(conn: Connection) -> None:
+            # A deferred transaction that reads before writing fails instead of waiting if another
+            # process writes meanwhile, so the writer takes the write lock when it begins
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Add the time and rows of every query to the metrics of the request running it, see `record_query`."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def receive_before_cursor_execute(conn: Connection, *_args: Any) -> None:
+        # Statements of one connection run one at a time
+        conn.info[_QUERY_START] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def receive_after_cursor_execute(
+        conn: Connection, cursor: Any, statement: str, parameters: Any, _context: ExecutionContext | None, executemany: bool
+    ) -> None:
+        duration = time.perf_counter() - conn.info.pop(_QUERY_START)
+        record_query(statement, parameters, executemany, duration, buffered_rows(cursor))
+
+
+def buffered_rows(cursor: Any) -> int:
+    """Count the rows of the result of a cursor, before any of them is fetched.
+
+    The asyncio adapters of SQLAlchemy buffer the whole result in `_rows` on execute, except
+    for server-side cursors. There is no public API for it, so `test_buffered_rows` pins it for
+    every supported driver.
+    """
+    return len(cursor._rows)  # noqa: SLF001
+
+
+def upsert(db: AsyncSession, model: type[Any]) -> postgresql.Insert | sqlite.Insert:
+    """Start an INSERT statement of the database dialect, which supports ON CONFLICT clauses."""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
+
+
+engine = create_engine(settings.database_url, writer=True)
+read_engine = create_engine(settings.database_url, writer=False) if engine.dialect.name == "sqlite" else engine
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -15,6 +106,12 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession]:
     async with AsyncSessionLocal() as session:
@@ -22,3 +119,12 @@ async def get_db() -> AsyncGenerator[AsyncSession]:
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession]:
+    """Session on the reader connections, which cannot write."""
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
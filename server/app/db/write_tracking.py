@@ -0,0 +1,83 @@
+from collections.abc import Callable
+from itertools import chain
+from typing import Any
+
+from app.models.base import Base
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction
+
+
+# Called with the ids of the written rows, or None if a statement may have written any of them
+type WritesCallback = Callable[[set[Any] | None], None]
+
+
+class WriteTracker:
+    """Collect the writes of a session to the tables of some models, and call back once they are committed.
+
+    Writes go through the unit of work or through INSERT, UPDATE and DELETE statements, and are
+    forgotten if the session rolls back. Inserts can be left out, for caches of existing rows only.
+    """
+
+    def __init__(self, models: tuple[type[Base], ...], on_commit: WritesCallback, *, inserts: bool = True) -> None:
+        self.models = models
+        self.tables = frozenset(model.__table__.name for model in models)
+        self.on_commit = on_commit
+        self.inserts = inserts
+
+    def mark(self, session: Session, ids: set[Any] | None) -> None:
+        # The tracker is the key of its writes in the session info
+        changed = session.info.get(self, set())
+        session.info[self] = None if changed is None or ids is None else changed | ids
+
+    def flushed(self, session: Session) -> None:
+        objects = chain(session.new, session.dirty, session.deleted) if self.inserts else chain(session.dirty, session.deleted)
+        ids = {obj.id for obj in objects if isinstance(obj, self.models)}
+        if ids:
+            self.mark(session, ids)
+
+    def executed(self, orm_execute_state: ORMExecuteState) -> None:
+        if orm_execute_state.is_update or orm_execute_state.is_delete or (self.inserts and orm_execute_state.is_insert):
+            table: Any = getattr(orm_execute_state.statement, "table", None)
+            if getattr(table, "name", None) in self.tables:
+                self.mark(orm_execute_state.session, None)
+
+    def committed(self, session: Session) -> None:
+        if self in session.info:
+            self.on_commit(session.info.pop(self))
+
+
+_trackers: list[WriteTracker] = []
+
+
+def track_writes(models: tuple[type[Base], ...], on_commit: WritesCallback, *, inserts: bool = True) -> WriteTracker:
+    """Call `on_commit` once a session commits writes to the tables of `models`, see `WriteTracker`."""
+    tracker = WriteTracker(models, on_commit, inserts=inserts)
+    _trackers.append(tracker)
+    return tracker
+
+
+@event.listens_for(Session, "after_flush")
+def receive_after_flush(session: Session, _flush_context: UOWTransaction) -> None:
+    """Remember the rows the session has written through the unit of work."""
+    for tracker in _trackers:
+        tracker.flushed(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def receive_do_orm_execute(orm_execute_state: ORMExecuteState) -> None:
+    """Remember that the session has written rows with an INSERT, UPDATE or DELETE statement."""
+    for tracker in _trackers:
+        tracker.executed(orm_execute_state)
+
+
+@event.listens_for(Session, "after_commit")
+def receive_after_commit(session: Session) -> None:
+    """Call back the trackers of the written tables once the writes are visible to other connections."""
+    for tracker in _trackers:
+        tracker.committed(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def receive_after_rollback(session: Session) -> None:
+    for tracker in _trackers:
+        session.info.pop(tracker, None)
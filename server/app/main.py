@@ -1,24 +1,43 @@
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.v1.api import api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.profiling import ProfilingMiddleware, profiler
+from app.core.security import password_hasher
+from app.core.workers import file_lock, worker_channel
 from app.db.seed_exercises import seed_exercises
-from app.db.session import AsyncSessionLocal
+from app.db.session import AsyncSessionLocal, engine, read_engine
+from app.services.exercise_catalog import exercise_catalog
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None]:  # noqa: ARG001
     """Lifespan context manager for startup and shutdown events."""
     # Startup
-    async with AsyncSessionLocal() as session:
+    if settings.WORKER_CHANNEL_DIR is not None:
+        worker_channel.start(settings.WORKER_CHANNEL_DIR)
+    # Workers starting together sync the catalog one at a time, the others then find it unchanged
+    async with file_lock(settings.SEED_LOCK_PATH), AsyncSessionLocal() as session:
         await seed_exercises(session)
+    async with AsyncSessionLocal() as session:
+        await exercise_catalog.load(session)
+    if settings.PROFILING_ENABLED:
+        profiler.start()
     yield
     # Shutdown
-    # Add any cleanup code here if needed
+    profiler.stop()
+    password_hasher.shutdown()
+    worker_channel.stop()
+    # Closing the last connection checkpoints the WAL of SQLite into the database file
+    await read_engine.dispose()
+    await engine.dispose()
 
 
 app = FastAPI(
@@ -26,6 +45,7 @@ app = FastAPI(
     version=settings.VERSION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Set up CORS middleware
@@ -35,8 +55,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "X-Next-Cursor"],
 )
 
+# Compress responses in the encoding the client accepts
+app.add_middleware(CompressionMiddleware)
+
+# Sample the stacks of requests when profiling is enabled
+app.add_middleware(ProfilingMiddleware)
+
+# Time every request, outermost to include the other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -44,3 +74,9 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 @app.get("/")
 async def root() -> dict[str, str]:
     return {"message": "Welcome to Fitness Tracker API"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Request and database metrics of this process, in the Prometheus text format."""
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
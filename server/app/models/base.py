@@ -1,7 +1,7 @@
 from datetime import UTC, datetime
-from typing import Any
+from typing import Any, ClassVar
 
-from sqlalchemy import DateTime, event, func
+from sqlalchemy import DateTime, Table, event, func
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
@@ -9,6 +9,7 @@ from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 class Base(DeclarativeBase):
     id: Mapped[Any]
     __name__: str  # type: ignore[misc]
+    __table__: ClassVar[Table]
 
     # Generate __tablename__ automatically
     @declared_attr  # type: ignore[arg-type]
@@ -1,4 +1,7 @@
-from sqlalchemy import JSON, DateTime, Float, ForeignKey, Integer, String
+from datetime import date
+
+from sqlalchemy import JSON, Date, DateTime, Float, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -21,28 +24,63 @@ class MuscleGroup(Base):
 
 
 class Exercise(Base):
+    # GIN indexes JSONB containment (`aliases @> '["alias"]'`) on PostgreSQL, where JSON has no btree ordering
+    __table_args__ = (Index("ix_exercise_aliases", "aliases", postgresql_using="gin"),)
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    name: Mapped[str] = mapped_column(String, index=True)
+    name: Mapped[str] = mapped_column(String, unique=True, index=True)
     description: Mapped[str] = mapped_column(String)
     muscle_group_id: Mapped[int] = mapped_column(Integer, ForeignKey("musclegroup.id"), index=True)
-    aliases: Mapped[list[str]] = mapped_column(JSON, default=list, index=True)
+    aliases: Mapped[list[str]] = mapped_column(JSON().with_variant(JSONB(), "postgresql"), default=list)
 
     training_exercises: Mapped[list["TrainingExercise"]] = relationship("TrainingExercise", back_populates="exercise")
     muscle_group: Mapped["MuscleGroup"] = relationship("MuscleGroup", back_populates="exercises")
 
 
 class Training(Base):
+    __table_args__ = (
+        Index("ix_training_user_id_date_id", "user_id", "date", "id"),
+        # Covers the count and last update of the user trainings their ETag is built from
+        Index("ix_training_user_id_updated_at", "user_id", "updated_at"),
+        Index("ix_training_user_id_change_seq", "user_id", "change_seq"),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"))
     date: Mapped[DateTime] = mapped_column(DateTime(timezone=True), index=True)
+    # Position of the last change to the training among the changes to the user trainings, see `ChangeSequence`
+    change_seq: Mapped[int] = mapped_column(Integer, default=0)
 
     user: Mapped["User"] = relationship("User", back_populates="trainings")
     exercises: Mapped[list["TrainingExercise"]] = relationship("TrainingExercise", back_populates="training", cascade="all, delete-orphan")
 
 
+class TrainingTombstone(Base):
+    """Record of a deleted training, so that clients syncing changes learn about the deletion."""
+
+    __table_args__ = (Index("ix_trainingtombstone_user_id_change_seq", "user_id", "change_seq"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"))
+    training_id: Mapped[int] = mapped_column(Integer)
+    change_seq: Mapped[int] = mapped_column(Integer)
+
+
+class ChangeSequence(Base):
+    """Last change number given to the trainings of a user.
+
+    Kept apart from `User`, whose writes drop the cached tokens of the user. Its row is locked by
+    the transaction that takes the next numbers, so numbers are committed in increasing order.
+    """
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"), unique=True)
+    value: Mapped[int] = mapped_column(Integer)
+
+
 class TrainingExercise(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    training_id: Mapped[int] = mapped_column(Integer, ForeignKey("training.id"))
+    training_id: Mapped[int] = mapped_column(Integer, ForeignKey("training.id"), index=True)
     exercise_id: Mapped[int] = mapped_column(Integer, ForeignKey("exercise.id"))
     sets: Mapped[int] = mapped_column(Integer)
     reps: Mapped[int] = mapped_column(Integer)
@@ -50,3 +88,29 @@ class TrainingExercise(Base):
 
     training: Mapped["Training"] = relationship("Training", back_populates="exercises")
     exercise: Mapped["Exercise"] = relationship("Exercise", back_populates="training_exercises")
+
+
+class TrainingStat(Base):
+    """Weekly totals of one exercise in the trainings of one user, kept up to date by `TrainingService`."""
+
+    __table_args__ = (Index("ix_trainingstat_user_id_exercise_id_week", "user_id", "exercise_id", "week", unique=True),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"))
+    exercise_id: Mapped[int] = mapped_column(Integer, ForeignKey("exercise.id"))
+    # Monday of the week
+    week: Mapped[date] = mapped_column(Date)
+    trainings: Mapped[int] = mapped_column(Integer)
+    sets: Mapped[int] = mapped_column(Integer)
+    reps: Mapped[int] = mapped_column(Integer)
+    volume: Mapped[float] = mapped_column(Float)
+    max_weight: Mapped[float] = mapped_column(Float)
+    estimated_1rm: Mapped[float] = mapped_column(Float)
+
+
+class AppState(Base):
+    """Named values the application keeps about the database itself, such as the hash of the seeded catalog."""
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    key: Mapped[str] = mapped_column(String, unique=True)
+    value: Mapped[str] = mapped_column(String)
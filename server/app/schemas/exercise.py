@@ -1,5 +1,5 @@
 from app.schemas.base import NoWhitespaceString, PositiveInt
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class MuscleGroupBase(BaseModel):
@@ -26,3 +26,20 @@ class ExerciseList(ExerciseBase):
 class ExerciseSearchParams(BaseModel):
     search: NoWhitespaceString | None = None
     muscle_group: NoWhitespaceString | None = None
+
+
+class ExerciseSuggestParams(BaseModel):
+    q: NoWhitespaceString
+    limit: int = Field(default=10, ge=1, le=50)
+
+
+class ExerciseSuggestion(BaseModel):
+    id: PositiveInt
+    name: str
+    matched_alias: str | None
+
+
+class CatalogSyncResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
@@ -0,0 +1,9 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class ProfileParams(BaseModel):
+    # Endpoint name, e.g. read_trainings, all routes if not set
+    route: str | None = None
+    format: Literal["collapsed", "speedscope"] = "collapsed"
@@ -0,0 +1,51 @@
+from datetime import date
+
+from app.schemas.base import PositiveInt
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class StatsParams(BaseModel):
+    date_from: date | None = Field(default=None, alias="from")
+    date_to: date | None = Field(default=None, alias="to")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class MuscleGroupLoad(BaseModel):
+    muscle_group: str
+    sets: int
+    # Repetitions of all sets
+    reps: int
+    # Sum of sets * reps * weight
+    volume: float
+
+
+class WeeklyStats(BaseModel):
+    # Monday of the week
+    week: date
+    sets: int
+    reps: int
+    volume: float
+    muscle_groups: list[MuscleGroupLoad]
+
+
+class UserStats(BaseModel):
+    weeks: list[WeeklyStats]
+
+
+class ExerciseWeek(BaseModel):
+    week: date
+    trainings: int
+    sets: int
+    reps: int
+    volume: float
+    max_weight: float
+    # Best estimated one repetition maximum, with the Epley formula
+    estimated_1rm: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ExerciseProgress(BaseModel):
+    exercise_id: PositiveInt
+    weeks: list[ExerciseWeek]
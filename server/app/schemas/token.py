@@ -10,3 +10,9 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     user_id: str | None = None
+
+
+class Principal(BaseModel):
+    """Authenticated user, for endpoints that need only its id."""
+
+    user_id: int
@@ -1,9 +1,14 @@
+import base64
+import binascii
+from collections.abc import Iterable
 from datetime import datetime
-from typing import Self
+from typing import Annotated, Any, Literal, Self
 
+import orjson
 from app.models.models import Exercise, Training, TrainingExercise
 from app.schemas.base import PositiveFloat, PositiveInt
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, WithJsonSchema, field_validator
+from sqlalchemy import Row
 
 
 class TrainingExerciseBase(BaseModel):
@@ -21,6 +26,10 @@ class TrainingExerciseBase(BaseModel):
             weight=obj.weight,
         )
 
+    def row_values(self) -> dict[str, Any]:
+        """Column values of the training exercise row."""
+        return {"exercise_id": self.exercise_id, "sets": self.sets, "reps": self.reps, "weight": self.weight}
+
 
 class TrainingExerciseCreate(TrainingExerciseBase):
     pass
@@ -90,6 +99,13 @@ class TrainingUpdate(TrainingBase):
         )
 
 
+class TrainingPatch(BaseModel):
+    """Partial training update, fields left out keep their current value."""
+
+    date: datetime | None = None
+    exercises: list[TrainingExerciseCreate] | None = None
+
+
 class TrainingRead(TrainingBase):
     id: PositiveInt
     user_id: PositiveInt
@@ -105,3 +121,110 @@ class TrainingRead(TrainingBase):
             date=obj.date,  # type: ignore[arg-type]
             exercises=[TrainingExerciseRead.from_orm(te) for te in obj.exercises],
         )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Row]) -> list[Self]:
+        """Group flat training rows joined with their exercises into trainings, keeping row order."""
+        return [cls.model_validate(training) for training in group_training_rows(rows)]
+
+
+def group_training_rows(rows: Iterable[Row]) -> list[dict[str, Any]]:
+    """Group flat training rows joined with their exercises into dicts shaped like `TrainingRead`, keeping row order.
+
+    Rows are unpacked by position, in the column order of `TrainingService.get_training_rows_query`.
+    Building no models, this is the fast way to a response from rows the database has already validated.
+    """
+    trainings: dict[int, dict[str, Any]] = {}
+    for id_, user_id, date, training_exercise_id, exercise_id, sets, reps, weight, exercise_name, muscle_group_name in rows:
+        training = trainings.get(id_)
+        if training is None:
+            # Keys in the order of the fields, as `TrainingRead` would serialize them
+            training = trainings[id_] = {"date": date, "id": id_, "user_id": user_id, "exercises": []}
+        if training_exercise_id is not None:
+            training["exercises"].append(
+                {
+                    "exercise_id": exercise_id,
+                    "sets": sets,
+                    "reps": reps,
+                    "weight": weight,
+                    "id": training_exercise_id,
+                    "training_id": id_,
+                    "exercise": {"name": exercise_name, "muscle_group": muscle_group_name},
+                }
+            )
+    return list(trainings.values())
+
+
+def dump_trainings(trainings: list[dict[str, Any]]) -> bytes:
+    """Serialize trainings grouped by `group_training_rows` to the same JSON as a list of `TrainingRead`."""
+    # Pydantic writes UTC as "Z" rather than "+00:00"
+    return orjson.dumps(trainings, option=orjson.OPT_UTC_Z)
+
+
+class TrainingCursor(BaseModel):
+    """Keyset position in the training history, ordered by `(date, id)` descending."""
+
+    date: datetime
+    id: PositiveInt
+
+    def encode(self) -> str:
+        raw = f"{self.date.isoformat()}|{self.id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, value: str) -> Self:
+        try:
+            raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        except (binascii.Error, UnicodeDecodeError) as e:
+            raise ValueError("Invalid cursor") from e
+        date, sep, id_ = raw.rpartition("|")
+        if not sep:
+            raise ValueError("Invalid cursor")
+        return cls(date=date, id=id_)  # type: ignore[arg-type]
+
+
+class TrainingListParams(BaseModel):
+    cursor: Annotated[TrainingCursor, WithJsonSchema({"type": "string"})] | None = None
+    date_from: datetime | None = Field(default=None, alias="from")
+    date_to: datetime | None = Field(default=None, alias="to")
+    limit: int = Field(default=50, ge=1, le=500)
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    @field_validator("cursor", mode="before")
+    @classmethod
+    def decode_cursor(cls, value: Any) -> Any:
+        if isinstance(value, str):
+            return TrainingCursor.decode(value)
+        return value
+
+
+class TrainingChangesParams(BaseModel):
+    since: int = Field(default=0, ge=0)
+    limit: int = Field(default=500, ge=1, le=1000)
+
+
+class TrainingChanges(BaseModel):
+    """Trainings created or updated and ids of trainings deleted after the `since` cursor.
+
+    Pass `cursor` as `since` to get the next changes, and again while `has_more` is true.
+    """
+
+    trainings: list[TrainingRead]
+    deleted: list[int]
+    cursor: int
+    has_more: bool
+
+
+class TrainingImportError(BaseModel):
+    row: PositiveInt
+    detail: str
+
+
+class TrainingImportResult(BaseModel):
+    imported: int
+    errors: list[TrainingImportError]
+
+
+class TrainingExportParams(BaseModel):
+    format: Literal["ndjson", "csv"] = "ndjson"
@@ -0,0 +1,47 @@
+"""Serve the app from several worker processes, by default one per core of the host.
+
+Run from the server directory:
+
+    python -m app.serve --host 0.0.0.0 --port 8000 --workers 4
+
+The workers share what must be the same in all of them before they are started: the key
+signing the access tokens, generated once here if none is configured, and the directory of
+the sockets they tell each other about cache invalidations through. Replicas on other hosts
+need the same `SECRET_KEY` or `SECRET_KEY_FILE`.
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+
+import uvicorn
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def share_worker_settings() -> None:
+    """Set the environment the workers read their settings from, for what they must agree on."""
+    if settings.secret_key_generated:
+        logger.warning("No SECRET_KEY or SECRET_KEY_FILE configured, tokens will not be valid after a restart")
+        os.environ["SECRET_KEY"] = settings.SECRET_KEY
+    if settings.WORKER_CHANNEL_DIR is None:
+        os.environ["WORKER_CHANNEL_DIR"] = tempfile.mkdtemp(prefix="fit-track-workers-")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    share_worker_settings()
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers, proxy_headers=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+
+from app.core.compression import compress
+from app.core.config import settings
+from app.core.workers import worker_channel
+from app.db.write_tracking import track_writes
+from app.models.models import Exercise, MuscleGroup
+from app.schemas.exercise import ExerciseDetail
+from app.services.exercise_search import ExerciseSearchIndex, normalize
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+
+# Topic of the worker channel the other workers are told about catalog writes on
+CATALOG_TOPIC = "exercise_catalog"
+
+
+class ExerciseCatalog:
+    """Immutable in-memory snapshot of all exercises with their pre-serialized JSON."""
+
+    def __init__(self, exercises: list[ExerciseDetail], version: int) -> None:
+        self.version = version
+        self.exercises = exercises
+        self.by_id = {exercise.id: exercise for exercise in exercises}
+        self.json_by_id = {exercise.id: exercise.model_dump_json().encode() for exercise in exercises}
+        self.list_json = self.dump_list(exercises)
+        # Unlike `version`, the same in every process serving the same catalog
+        self.content_hash = hashlib.sha256(self.list_json).hexdigest()
+        self.search_index = ExerciseSearchIndex(exercises)
+        self._encoded_list_json: dict[str, bytes] = {}
+
+    def dump_list(self, exercises: list[ExerciseDetail]) -> bytes:
+        """Serialize exercises of this catalog as a JSON array, reusing their pre-serialized JSON."""
+        return b"[" + b",".join(self.json_by_id[exercise.id] for exercise in exercises) + b"]"
+
+    async def encoded_list_json(self, encoding: str) -> bytes:
+        """Get the list of all exercises compressed in `encoding`, compressed once per catalog in a worker thread."""
+        content = self._encoded_list_json.get(encoding)
+        if content is None:
+            content = await asyncio.to_thread(compress, self.list_json, encoding, settings.PRECOMPRESSION_LEVELS[encoding])
+            self._encoded_list_json[encoding] = content
+        return content
+
+    def search(self, search: str | None = None, muscle_group: str | None = None) -> list[ExerciseDetail]:
+        """Find exercises by a case-insensitive substring of name or alias, ranked, and of muscle group name."""
+        exercises = self.search_index.search(search) if search else self.exercises
+        if muscle_group:
+            term = normalize(muscle_group)
+            exercises = [e for e in exercises if term in normalize(e.muscle_group.name)]
+        return exercises
+
+
+class ExerciseCatalogCache:
+    """Process-wide exercise catalog, reloaded lazily once a write to the catalog tables is committed."""
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._catalog: ExerciseCatalog | None = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self.version += 1
+
+    async def load(self, db: AsyncSession) -> ExerciseCatalog:
+        """Load the catalog from the database."""
+        async with self._lock:
+            # Loaded by the request that held the lock before this one
+            if self._catalog is not None and self._catalog.version == self.version:
+                return self._catalog
+            # Capture the version first so a write committed during the load triggers another one
+            version = self.version
+            query = select(Exercise).options(selectinload(Exercise.muscle_group)).order_by(Exercise.name, Exercise.id)
+            result = await db.execute(query)
+            exercises = [ExerciseDetail.model_validate(exercise, from_attributes=True) for exercise in result.scalars()]
+            self._catalog = ExerciseCatalog(exercises, version)
+            return self._catalog
+
+    async def get(self, db: AsyncSession) -> ExerciseCatalog:
+        """Get the current catalog, touching the database only if it has changed since the last load."""
+        catalog = self._catalog
+        if catalog is None or catalog.version != self.version:
+            catalog = await self.load(db)
+        return catalog
+
+
+exercise_catalog = ExerciseCatalogCache()
+worker_channel.subscribe(CATALOG_TOPIC, lambda _payload: exercise_catalog.invalidate())
+
+
+def receive_catalog_writes(_ids: set[int] | None) -> None:
+    """Invalidate the catalog, in this worker and the others, once catalog writes are committed."""
+    exercise_catalog.invalidate()
+    worker_channel.publish(CATALOG_TOPIC)
+
+
+track_writes((Exercise, MuscleGroup), receive_catalog_writes)
@@ -0,0 +1,201 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+
+from app.schemas.exercise import ExerciseDetail
+
+
+NGRAM_SIZE = 3
+FUZZY_PREFIX_LENGTH = 1
+
+# Sorts after any character that can follow a prefix
+_PREFIX_END = "\U0010ffff"
+
+
+def normalize(text: str) -> str:
+    """Fold case and the Cyrillic `ё` so that names match however they are typed."""
+    return text.casefold().replace("ё", "е")
+
+
+def ngrams(text: str, size: int) -> set[str]:
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+def word_starts(text: str) -> list[int]:
+    """Offsets of all words of the text but the first one."""
+    return [i for i in range(1, len(text)) if text[i].isalnum() and not text[i - 1].isalnum()]
+
+
+def max_typos(query: str) -> int:
+    """How many typos to tolerate in a query: none in very short ones, where almost anything would match."""
+    if len(query) < 3:  # noqa: PLR2004
+        return 0
+    if len(query) < 6:  # noqa: PLR2004
+        return 1
+    return 2
+
+
+def fuzzy_prefixes(keys: list[str], query: str, max_distance: int) -> list[tuple[int, int, int]]:
+    """Ranges of sorted keys starting with a prefix within `max_distance` edits of the query, with that distance.
+
+    Walks the trie implied by the sorted keys, jumping between siblings with bisect and pruning
+    branches once no extension of their prefix can get within `max_distance` of the query.
+    The first `FUZZY_PREFIX_LENGTH` characters must match exactly, which keeps the walk from
+    visiting every short prefix of the catalog.
+    """
+
+    def step(row: list[int], char: str) -> list[int]:
+        next_row = [row[0] + 1]
+        for i, query_char in enumerate(query, 1):
+            next_row.append(min(next_row[i - 1] + 1, row[i] + 1, row[i - 1] + (query_char != char)))
+        return next_row
+
+    root = query[:FUZZY_PREFIX_LENGTH]
+    root_row = list(range(len(query) + 1))
+    for char in root:
+        root_row = step(root_row, char)
+    root_low = bisect_left(keys, root)
+
+    ranges = []
+    stack = [(root, root_low, bisect_left(keys, root + _PREFIX_END, root_low), root_row)]
+    while stack:
+        prefix, low, high, row = stack.pop()
+        distance = row[-1]
+        if distance <= max_distance:
+            ranges.append((distance, low, high))
+        if min(row) > max_distance or min(row) >= distance:
+            # Longer prefixes cannot get any closer to the query
+            continue
+        depth = len(prefix)
+        while low < high:
+            key = keys[low]
+            if len(key) <= depth:
+                low += 1
+                continue
+            child = prefix + key[depth]
+            child_high = bisect_left(keys, child + _PREFIX_END, low, high)
+            stack.append((child, low, child_high, step(row, key[depth])))
+            low = child_high
+    return ranges
+
+
+class _TermIndex:
+    """Sorted keys with the positions of their exercises plus an n-gram index of the same terms.
+
+    Keys are normalized terms and, separately, their word suffixes. `originals` and
+    `word_originals` hold the term as it was given for each key.
+    """
+
+    def __init__(self, terms: Iterable[tuple[str, int]]) -> None:
+        self.terms: defaultdict[int, list[str]] = defaultdict(list)
+        self.postings: defaultdict[str, set[int]] = defaultdict(set)
+        keys: list[tuple[str, int, str]] = []
+        words: list[tuple[str, int, str]] = []
+        for original, position in terms:
+            term = normalize(original)
+            self.terms[position].append(term)
+            keys.append((term, position, original))
+            words.extend((term[start:], position, original) for start in word_starts(term))
+            for size in range(1, NGRAM_SIZE + 1):
+                for gram in ngrams(term, size):
+                    self.postings[gram].add(position)
+        keys.sort()
+        words.sort()
+        self.keys = [key for key, _, _ in keys]
+        self.positions = [position for _, position, _ in keys]
+        self.originals = [original for _, _, original in keys]
+        self.word_keys = [key for key, _, _ in words]
+        self.word_positions = [position for _, position, _ in words]
+        self.word_originals = [original for _, _, original in words]
+
+    def find(self, query: str) -> tuple[list[int], list[int], list[int], set[int]]:
+        """Positions of exercises with a term equal to, starting with, having a word starting with and containing the query."""
+        low = bisect_left(self.keys, query)
+        equal = bisect_right(self.keys, query, low)
+        high = bisect_left(self.keys, query + _PREFIX_END, equal)
+        word_low = bisect_left(self.word_keys, query)
+        word_high = bisect_left(self.word_keys, query + _PREFIX_END, word_low)
+
+        grams = sorted(ngrams(query, min(len(query), NGRAM_SIZE)), key=lambda gram: len(self.postings.get(gram, ())))
+        contains = set(self.postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not contains:
+                break
+            contains &= self.postings.get(gram, set())
+        if len(query) > NGRAM_SIZE:
+            # Sharing all n-grams does not guarantee containing the query, check whatever was not matched already
+            unverified = contains.difference(self.positions[low:high], self.word_positions[word_low:word_high])
+            contains -= {position for position in unverified if not any(query in term for term in self.terms[position])}
+
+        return self.positions[low:equal], self.positions[equal:high], self.word_positions[word_low:word_high], contains
+
+
+class ExerciseSearchIndex:
+    """Index over exercise names and aliases for ranked substring search and autocomplete.
+
+    Whole terms and word suffixes are kept sorted, so exact, prefix and word start matches are
+    bisected. Any other substring match comes from an index of every n-gram of up to
+    `NGRAM_SIZE` characters. A query never scans the whole catalog.
+    """
+
+    def __init__(self, exercises: Sequence[ExerciseDetail]) -> None:
+        self.exercises = exercises
+        self.names = _TermIndex((exercise.name, position) for position, exercise in enumerate(exercises))
+        self.aliases = _TermIndex((alias, position) for position, exercise in enumerate(exercises) for alias in exercise.aliases)
+        # Sorted keys with their exercise positions and aliases, in the order of suggestion preference
+        self.prefix_keys = [
+            (self.names.keys, self.names.positions, None),
+            (self.aliases.keys, self.aliases.positions, self.aliases.originals),
+            (self.names.word_keys, self.names.word_positions, None),
+            (self.aliases.word_keys, self.aliases.word_positions, self.aliases.word_originals),
+        ]
+
+    def search(self, query: str) -> list[ExerciseDetail]:
+        """Find exercises whose name or alias contains the query, best matches first.
+
+        Exact matches rank above prefix matches, then matches at a word start, then any other
+        substring. Name matches rank above alias matches, and ties keep the catalog order.
+        """
+        query = normalize(query)
+        if not query:
+            return list(self.exercises)
+
+        ranked: dict[int, None] = {}
+        for name_matches, alias_matches in zip(self.names.find(query), self.aliases.find(query), strict=True):
+            ranked.update(dict.fromkeys(sorted(name_matches)))
+            ranked.update(dict.fromkeys(sorted(alias_matches)))
+        return [self.exercises[position] for position in ranked]
+
+    def suggest(self, query: str, limit: int) -> list[tuple[ExerciseDetail, str | None]]:
+        """Suggest up to `limit` exercises whose name or alias starts with the query, with the matched alias if any.
+
+        Names, then aliases, starting with the query come first, then those with a word starting with it.
+        If that is not enough, prefixes within a few typos of the query follow, closest first.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        suggestions: dict[int, str | None] = {}
+
+        def add(positions: list[int], originals: list[str] | None, low: int, high: int) -> None:
+            for i in range(low, high):
+                if len(suggestions) >= limit:
+                    return
+                suggestions.setdefault(positions[i], originals[i] if originals is not None else None)
+
+        for keys, positions, originals in self.prefix_keys:
+            low = bisect_left(keys, query)
+            add(positions, originals, low, bisect_left(keys, query + _PREFIX_END, low))
+
+        # Widen the search one typo at a time, as each one makes the walk much longer
+        for max_distance in range(1, max_typos(query) + 1):
+            if len(suggestions) >= limit:
+                break
+            ranges = [
+                (distance, i, low, high) for i, (keys, _, _) in enumerate(self.prefix_keys) for distance, low, high in fuzzy_prefixes(keys, query, max_distance)
+            ]
+            for _, i, low, high in sorted(ranges):
+                _, positions, originals = self.prefix_keys[i]
+                add(positions, originals, low, high)
+
+        return [(self.exercises[position], alias) for position, alias in suggestions.items()]
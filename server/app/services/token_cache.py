@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+from app.core.workers import worker_channel
+from app.db.write_tracking import track_writes
+from app.models.models import User
+from app.schemas.token import Principal
+
+
+# Topic of the worker channel the other workers are told about user writes on
+USERS_TOPIC = "token_cache_users"
+# Users written at once above which the other workers drop all their tokens, keeping messages small
+MAX_PUBLISHED_USERS = 1000
+
+
+class TokenCache:
+    """Bounded LRU cache of verified access tokens and the principal they authenticate.
+
+    An entry lives until the token expires or for `ttl` seconds, whichever comes first,
+    and is dropped as soon as a write to its user is committed.
+    """
+
+    def __init__(self, size: int, ttl: float) -> None:
+        self.size = size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[Principal, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Principal | None:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        principal, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return principal
+
+    def put(self, token: str, principal: Principal, exp: float) -> None:
+        """Cache a verified token until its `exp` claim, a Unix timestamp, at the latest."""
+        self._entries[token] = (principal, min(exp, time.time() + self.ttl))
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def invalidate_users(self, user_ids: set[int] | None = None) -> None:
+        """Drop the tokens of the given users, or all tokens."""
+        if user_ids is None:
+            self._entries.clear()
+            return
+        for token in [token for token, (principal, _) in self._entries.items() if principal.user_id in user_ids]:
+            del self._entries[token]
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+worker_channel.subscribe(USERS_TOPIC, lambda user_ids: token_cache.invalidate_users(None if user_ids is None else set(user_ids)))
+
+
+def receive_user_writes(user_ids: set[int] | None) -> None:
+    """Drop the cached tokens of the written users, in this worker and the others, once the writes are committed."""
+    token_cache.invalidate_users(user_ids)
+    worker_channel.publish(USERS_TOPIC, None if user_ids is None or len(user_ids) > MAX_PUBLISHED_USERS else sorted(user_ids))
+
+
+# New users have no tokens yet
+track_writes((User,), receive_user_writes, inserts=False)
@@ -0,0 +1,275 @@
+import json
+import shutil
+from collections.abc import Iterable, Sequence
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Self
+
+import numpy as np
+import numpy.typing as npt
+from app.models.models import Training, TrainingExercise
+from sqlalchemy import Select, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Column layout of a training exercise row, days are counted from the Unix epoch
+COLUMNS: dict[str, type[np.generic]] = {
+    "id": np.int32,
+    "user_id": np.int32,
+    "exercise_id": np.int32,
+    "day": np.int32,
+    "sets": np.int32,
+    "reps": np.int32,
+    "weight": np.float32,
+}
+
+# Rows changed this long before the last refresh are read again, in case their transaction committed late
+REFRESH_OVERLAP = timedelta(minutes=1)
+
+LOAD_BATCH_SIZE = 100_000
+
+KEY_BITS = 64
+
+
+class TrainingColumns:
+    """Training exercise rows of all users as one NumPy array per column, sorted by id."""
+
+    def __init__(self, columns: dict[str, npt.NDArray[Any]]) -> None:
+        self.columns = columns
+        self.id = columns["id"]
+        self.user_id = columns["user_id"]
+        self.exercise_id = columns["exercise_id"]
+        self.day = columns["day"]
+        self.sets = columns["sets"]
+        self.reps = columns["reps"]
+        self.weight = columns["weight"]
+
+    @classmethod
+    def empty(cls) -> Self:
+        return cls({name: np.empty(0, dtype) for name, dtype in COLUMNS.items()})
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[Any]]) -> Self:
+        """Build columns from `(id, user_id, exercise_id, date, sets, reps, weight)` rows."""
+        if not rows:
+            return cls.empty()
+        ids, user_ids, exercise_ids, dates, sets, reps, weights = zip(*rows, strict=True)
+        days = np.array([value.date() for value in dates], dtype="datetime64[D]").astype(np.int32)
+        values = (ids, user_ids, exercise_ids, days, sets, reps, weights)
+        return cls({name: np.asarray(column, dtype) for (name, dtype), column in zip(COLUMNS.items(), values, strict=True)})
+
+    @classmethod
+    def concatenate(cls, parts: Iterable[Self]) -> Self:
+        parts = list(parts)
+        if not parts:
+            return cls.empty()
+        return cls({name: np.concatenate([part.columns[name] for part in parts]) for name in COLUMNS})
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def take(self, indices: npt.NDArray[Any]) -> Self:
+        """Rows at the given indices or boolean mask."""
+        return type(self)({name: column[indices] for name, column in self.columns.items()})
+
+    def merge(self, changed: Self, ids: npt.NDArray[np.int32] | None = None) -> Self:
+        """Replace rows by their changed version, and keep only the rows with the given ids if any."""
+        rows = self.take(~np.isin(self.id, changed.id))
+        if ids is not None:
+            rows = rows.take(np.isin(rows.id, ids))
+        merged = type(self).concatenate([rows, changed])
+        return merged.take(np.argsort(merged.id, kind="stable"))
+
+    def volume(self) -> npt.NDArray[np.float32]:
+        """Sets * reps * weight of every row."""
+        return (self.sets * self.reps).astype(np.float32) * self.weight
+
+    def estimated_1rm(self) -> npt.NDArray[np.float32]:
+        """One repetition maximum of every row estimated with the Epley formula, the weight itself for singles."""
+        return np.where(self.reps == 1, self.weight, self.weight * (1 + self.reps.astype(np.float32) / 30))
+
+    def percentiles(self, values: npt.NDArray[Any], by: npt.NDArray[np.int32], q: Sequence[float]) -> tuple[npt.NDArray[np.int32], npt.NDArray[np.float64]]:
+        """Percentiles `q` of the values of every group of rows with the same `by` key, e.g. `exercise_id`.
+
+        Returns the sorted keys and a `(keys, q)` array of percentiles.
+        """
+        # Sorting one packed key is several times faster than `np.lexsort` of the key and the values
+        packed = np.sort(pack(by, float_bits(values.astype(np.float32))))
+        sorted_by = (packed >> np.uint64(32)).astype(np.int32)
+        sorted_values = unpack_float(packed).astype(np.float64)
+        starts = np.flatnonzero(np.r_[True, sorted_by[1:] != sorted_by[:-1]])
+        counts = np.diff(np.r_[starts, len(packed)])
+        # Linear interpolation between the closest ranks, like `np.percentile`, for all groups at once
+        ranks = (counts[:, None] - 1) * (np.asarray(q, np.float64)[None, :] / 100)
+        low = np.floor(ranks).astype(np.int64)
+        high = np.minimum(low + 1, counts[:, None] - 1)
+        fraction = ranks - low
+        low_values = sorted_values[starts[:, None] + low]
+        high_values = sorted_values[starts[:, None] + high]
+        return sorted_by[starts], low_values + (high_values - low_values) * fraction
+
+    def daily_volume(self, user_id: int) -> tuple[npt.NDArray[np.int32], npt.NDArray[np.float64]]:
+        """Total volume of a user on every day from their first training to their last one."""
+        mask = self.user_id == user_id
+        days = self.day[mask]
+        if not len(days):
+            return np.empty(0, np.int32), np.empty(0, np.float64)
+        first = days.min()
+        totals = np.bincount(days - first, weights=self.volume()[mask])
+        return np.arange(first, first + len(totals), dtype=np.int32), totals
+
+    def rolling_volume(self, user_id: int, window: int) -> tuple[npt.NDArray[np.int32], npt.NDArray[np.float64]]:
+        """Average daily volume of a user over the `window` days up to every day, rest days included."""
+        days, totals = self.daily_volume(user_id)
+        sums = np.cumsum(totals)
+        sums[window:] = sums[window:] - sums[:-window]
+        return days, sums / np.minimum(np.arange(1, len(sums) + 1), window)
+
+    def personal_records(self) -> npt.NDArray[np.int64]:
+        """Indices of the rows, in date order, that lift more than any earlier row of the same user and exercise."""
+        # Rows are sorted by id, so ties on the day keep the id order
+        order = sort_order(self.user_id, self.exercise_id, self.day)
+        user_id, exercise_id, weight = self.user_id[order], self.exercise_id[order], self.weight[order].astype(np.float64)
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (user_id[1:] != user_id[:-1]) | (exercise_id[1:] != exercise_id[:-1])
+        # Lift every group above all previous ones, so that one running maximum serves every group
+        group = np.cumsum(first)
+        lifted = weight + group * (weight.max(initial=0) + 1)
+        previous_best = np.maximum.accumulate(lifted)
+        record = first.copy()
+        record[1:] |= lifted[1:] > previous_best[:-1]
+        return order[record]
+
+
+def pack(high: npt.NDArray[np.int32], low: npt.NDArray[Any]) -> npt.NDArray[np.uint64]:
+    """Pack two non-negative 32-bit columns into one key that sorts like the pair."""
+    return (high.astype(np.uint64) << np.uint64(32)) | low.astype(np.uint32)
+
+
+def sort_order(*columns: npt.NDArray[np.int32]) -> npt.NDArray[np.int64]:
+    """Indices that sort the rows by the given columns, most significant first, then by position.
+
+    When the columns and the position fit in 64 bits they are packed into one key, as sorting
+    plain integers is several times faster than `np.lexsort` or stable argsorts.
+    """
+    length = len(columns[0])
+    if not length:
+        return np.empty(0, np.int64)
+    offsets = [int(column.min()) for column in columns]
+    widths = [(int(column.max()) - offset).bit_length() for column, offset in zip(columns, offsets, strict=True)]
+    position_width = (length - 1).bit_length()
+    if sum(widths) + position_width > KEY_BITS:
+        keys: list[npt.NDArray[Any]] = [np.arange(length), *reversed(columns)]
+        return np.lexsort(keys)
+    key = np.arange(length, dtype=np.uint64)
+    shift = position_width
+    for column, offset, width in zip(reversed(columns), reversed(offsets), reversed(widths), strict=True):
+        key |= (column.astype(np.int64) - offset).astype(np.uint64) << np.uint64(shift)
+        shift += width
+    return (np.sort(key) & np.uint64((1 << position_width) - 1)).astype(np.int64)
+
+
+def float_bits(values: npt.NDArray[np.float32]) -> npt.NDArray[np.uint32]:
+    """Bits of float32 values as unsigned integers in the same order as the values."""
+    bits = values.view(np.uint32)
+    return np.where(bits >> np.uint32(31), ~bits, bits | np.uint32(1 << 31))
+
+
+def unpack_float(packed: npt.NDArray[np.uint64]) -> npt.NDArray[np.float32]:
+    """Float32 values from the low half of packed keys, the inverse of `float_bits`."""
+    bits = packed.astype(np.uint32)
+    return np.where(bits >> np.uint32(31), bits & np.uint32(0x7FFFFFFF), ~bits).view(np.float32)
+
+
+def rows_query() -> Select:
+    training = Training.__table__
+    training_exercise = TrainingExercise.__table__
+    return (
+        select(
+            training_exercise.c.id,
+            training.c.user_id,
+            training_exercise.c.exercise_id,
+            training.c.date,
+            training_exercise.c.sets,
+            training_exercise.c.reps,
+            training_exercise.c.weight,
+        )
+        .select_from(training_exercise.join(training, training.c.id == training_exercise.c.training_id))
+        .order_by(training_exercise.c.id)
+    )
+
+
+async def load_columns(db: AsyncSession, since: datetime | None = None) -> TrainingColumns:
+    """Load all training exercise rows, or only those whose row or training changed since a date, in batches."""
+    query = rows_query()
+    if since is not None:
+        query = query.where(or_(TrainingExercise.__table__.c.updated_at >= since, Training.__table__.c.updated_at >= since))
+    result = await db.stream(query.execution_options(yield_per=LOAD_BATCH_SIZE))
+    return TrainingColumns.concatenate([TrainingColumns.from_rows(rows) async for rows in result.partitions()])
+
+
+class TrainingSnapshot:
+    """Memory-mapped on-disk copy of the training columns, refreshed incrementally by `updated_at`.
+
+    Every refresh writes a new generation directory and then switches `meta.json` to it, so
+    readers never see a half written snapshot and keep their mapped files until they are done.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def read_meta(self) -> dict[str, Any] | None:
+        try:
+            return json.loads((self.path / "meta.json").read_text())
+        except FileNotFoundError:
+            return None
+
+    def load(self) -> TrainingColumns | None:
+        """Map the current snapshot into memory without reading it."""
+        meta = self.read_meta()
+        if meta is None:
+            return None
+        return self.load_generation(meta["generation"])
+
+    def load_generation(self, generation: str) -> TrainingColumns:
+        return TrainingColumns({name: np.load(self.path / generation / f"{name}.npy", mmap_mode="r") for name in COLUMNS})
+
+    def save(self, columns: TrainingColumns, refreshed_at: datetime) -> str:
+        """Write the columns as a new generation and make it current, returning its name."""
+        meta = self.read_meta()
+        version = meta["version"] + 1 if meta is not None else 1
+        generation = f"gen-{version}"
+        (self.path / generation).mkdir(parents=True, exist_ok=True)
+        for name, column in columns.columns.items():
+            np.save(self.path / generation / f"{name}.npy", column)
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps({"version": version, "generation": generation, "refreshed_at": refreshed_at.isoformat()}))
+        tmp.replace(self.path / "meta.json")
+        if meta is not None:
+            shutil.rmtree(self.path / meta["generation"], ignore_errors=True)
+        return generation
+
+    async def refresh(self, db: AsyncSession) -> TrainingColumns:
+        """Bring the snapshot up to date, reading only the rows changed since the last refresh.
+
+        Deleted rows leave no trace but a row count lower than the snapshot one, in which case
+        the ids of all rows are read to find them.
+        """
+        refreshed_at = datetime.now(UTC)
+        meta = self.read_meta()
+        if meta is None:
+            columns = await load_columns(db)
+        else:
+            since = datetime.fromisoformat(meta["refreshed_at"]) - REFRESH_OVERLAP
+            changed = await load_columns(db, since)
+            columns = self.load_generation(meta["generation"]).merge(changed)
+            count = (await db.execute(select(func.count()).select_from(TrainingExercise.__table__))).scalar_one()
+            if count != len(columns):
+                ids = (await db.execute(select(TrainingExercise.__table__.c.id))).scalars().all()
+                columns = columns.merge(TrainingColumns.empty(), np.asarray(ids, np.int32))
+        return self.load_generation(self.save(columns, refreshed_at))
+
+
+def to_date(day: int) -> date:
+    """Date of a `day` column value."""
+    return date(1970, 1, 1) + timedelta(days=int(day))
@@ -0,0 +1,41 @@
+import csv
+import io
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+
+from app.schemas.training import TrainingRead
+from app.services.training_import import CSV_FIELDS
+
+
+# The import columns first, so that an export can be imported back
+CSV_EXPORT_FIELDS = [*CSV_FIELDS, "training_id", "exercise", "muscle_group"]
+
+
+async def write_ndjson(trainings: AsyncIterable[TrainingRead]) -> AsyncIterator[bytes]:
+    """Serialize one training per line."""
+    async for training in trainings:
+        yield training.model_dump_json().encode() + b"\n"
+
+
+async def write_csv(trainings: AsyncIterable[TrainingRead]) -> AsyncIterator[bytes]:
+    """Serialize one training exercise per line, or a line with only the date for a training without exercises."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_EXPORT_FIELDS)
+    yield buffer.getvalue().encode()
+    async for training in trainings:
+        buffer.seek(0)
+        buffer.truncate()
+        date = training.date.isoformat()
+        if not training.exercises:
+            writer.writerow([date, "", "", "", "", training.id, "", ""])
+        for exercise in training.exercises:
+            writer.writerow(
+                [date, exercise.exercise_id, exercise.sets, exercise.reps, exercise.weight, training.id, exercise.exercise.name, exercise.exercise.muscle_group]
+            )
+        yield buffer.getvalue().encode()
+
+
+EXPORT_WRITERS: dict[str, tuple[str, Callable[[AsyncIterable[TrainingRead]], AsyncIterator[bytes]]]] = {
+    "ndjson": ("application/x-ndjson", write_ndjson),
+    "csv": ("text/csv", write_csv),
+}
@@ -0,0 +1,93 @@
+import codecs
+import csv
+import json
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+from typing import Any
+
+from fastapi import HTTPException
+
+
+# A 1-based row number with the raw training: JSON bytes to validate or already parsed data
+type ImportRow = tuple[int, bytes | dict[str, Any]]
+
+CSV_FIELDS = ["date", "exercise_id", "sets", "reps", "weight"]
+
+
+async def iter_lines(stream: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into lines without reading it whole."""
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def read_json(stream: AsyncIterable[bytes]) -> AsyncIterator[ImportRow]:
+    """Read trainings from a JSON array, which has to be loaded whole."""
+    try:
+        data = json.loads(b"".join([chunk async for chunk in stream]))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of trainings")
+    for row, item in enumerate(data, 1):
+        yield row, item
+
+
+async def read_ndjson(stream: AsyncIterable[bytes]) -> AsyncIterator[ImportRow]:
+    """Read one training per line as it is streamed in, skipping blank lines."""
+    row = 0
+    async for line in iter_lines(stream):
+        row += 1
+        if line.strip():
+            yield row, line
+
+
+async def read_csv(stream: AsyncIterable[bytes]) -> AsyncIterator[ImportRow]:
+    """Read training exercises, one per line, as they are streamed in.
+
+    The header must name the `CSV_FIELDS` columns, any others are ignored. Consecutive lines with the same
+    `training_id`, as in exports, or else with the same date, make up one training, reported at the row of its
+    first line. A line with a `training_id` and no exercise fields is a training without exercises.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+
+    async def decode() -> AsyncIterator[str]:
+        async for line in iter_lines(stream):
+            yield decoder.decode(line)
+
+    lines = decode()
+    header = next(csv.reader([await anext(lines, "")]), [])
+    if not set(CSV_FIELDS).issubset(header):
+        raise HTTPException(status_code=400, detail=f"Expected CSV columns: {', '.join(CSV_FIELDS)}")
+
+    row = 1
+    training: dict[str, Any] | None = None
+    training_key = ""
+    training_row = 0
+    async for line in lines:
+        row += 1
+        if not line.strip():
+            continue
+        values = dict(zip(header, next(csv.reader([line])), strict=False))
+        date = values.pop("date", "")
+        training_id = values.pop("training_id", "")
+        key = training_id or date
+        if training is None or training_key != key:
+            if training is not None:
+                yield training_row, training
+            training, training_key, training_row = {"date": date, "exercises": []}, key, row
+        if not training_id or any(values.get(field) for field in CSV_FIELDS[1:]):
+            training["exercises"].append(values)
+    if training is not None:
+        yield training_row, training
+
+
+IMPORT_READERS: dict[str, Callable[[AsyncIterable[bytes]], AsyncIterator[ImportRow]]] = {
+    "application/json": read_json,
+    "application/x-ndjson": read_ndjson,
+    "text/csv": read_csv,
+}
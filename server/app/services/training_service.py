@@ -1,21 +1,130 @@
-from typing import cast
+from collections.abc import AsyncIterable, AsyncIterator, Collection, Sequence
+from datetime import UTC, datetime
+from typing import Any
 
-from app.models.models import Exercise, Training, TrainingExercise
-from app.schemas.training import TrainingCreate, TrainingUpdate
+from app.core.config import settings
+from app.db.session import upsert
+from app.models.models import ChangeSequence, Exercise, MuscleGroup, Training, TrainingExercise, TrainingTombstone
+from app.schemas.training import (
+    ExerciseInfo,
+    TrainingChanges,
+    TrainingChangesParams,
+    TrainingCreate,
+    TrainingCursor,
+    TrainingExerciseBase,
+    TrainingExerciseRead,
+    TrainingImportError,
+    TrainingImportResult,
+    TrainingListParams,
+    TrainingPatch,
+    TrainingRead,
+    TrainingUpdate,
+    group_training_rows,
+)
+from app.services.exercise_catalog import exercise_catalog
+from app.services.training_import import ImportRow
+from app.services.training_stats import TrainingStatsService, week_of
 from fastapi import HTTPException
-from sqlalchemy import Select, delete, select
+from pydantic import ValidationError
+from sqlalchemy import FromClause, Select, delete, false, func, insert, select, true, tuple_, union_all, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 
+def align_exercises(existing: Sequence[TrainingExerciseBase], incoming: Sequence[TrainingExerciseBase]) -> tuple[list[tuple[int, int]], int]:
+    """Pair incoming exercises with existing rows so that saving them takes the fewest writes.
+
+    A paired row is updated unless it is already equal, unpaired rows are deleted and the
+    exercises from the returned index on get new rows. Rows are read back in id order and new
+    rows get the highest ids, so pairs keep their order and new rows only take the tail.
+    Returns the `(existing index, incoming index)` pairs and the index of the first new row.
+    """
+    existing_values = [exercise.row_values() for exercise in existing]
+    incoming_values = [exercise.row_values() for exercise in incoming]
+    unreachable = len(existing) + len(incoming) + 1
+    # cost[i][j]: fewest writes to pair the first j incoming exercises with some of the first i rows, deleting the others
+    cost = [[0] + [unreachable] * len(incoming)]
+    for i, old in enumerate(existing_values, 1):
+        cost.append([i] + [min(cost[i - 1][j] + 1, cost[i - 1][j - 1] + (old != new)) for j, new in enumerate(incoming_values, 1)])
+
+    # Fewest writes counting the inserts of the tail, preferring to reuse rows on ties
+    first_new = min(range(min(len(existing), len(incoming)) + 1), key=lambda j: (cost[-1][j] + len(incoming) - j, -j))
+    pairs = []
+    j = first_new
+    for i in range(len(existing), 0, -1):
+        if j > 0 and cost[i][j] == cost[i - 1][j - 1] + (existing_values[i - 1] != incoming_values[j - 1]):
+            j -= 1
+            pairs.append((i - 1, j))
+    return pairs[::-1], first_new
+
+
+def same_instant(stored: datetime, value: datetime) -> bool:
+    """Compare a stored date with a new one, given that SQLite keeps the wall time only."""
+    if stored.tzinfo is None:
+        value = value.replace(tzinfo=None)
+    return stored == value
+
+
 class TrainingService:
-    def __init__(self, db: AsyncSession) -> None:
+    """Training reads and writes, on separate sessions if given a read session.
+
+    Writes, and the reads they depend on, go through `db`. Reads of committed data, like
+    listings or reading a training back after its commit, go through `read_db`.
+    """
+
+    def __init__(self, db: AsyncSession, read_db: AsyncSession | None = None) -> None:
         self.db = db
+        self.read_db = read_db if read_db is not None else db
+        self.stats = TrainingStatsService(db)
 
     def get_training_query(self) -> Select:
         """Returns a base query for training with all necessary joins."""
         return select(Training).options(selectinload(Training.exercises).selectinload(TrainingExercise.exercise).selectinload(Exercise.muscle_group))
 
+    def get_training_rows_query(self, trainings: FromClause, newest_first: bool = True) -> Select:
+        """Returns a Core query of plain rows for the given trainings joined with their exercises.
+
+        Rows are ordered by training date, newest first unless `newest_first` is false, and can be
+        grouped with `TrainingRead.from_rows` without building any ORM instances.
+        """
+        training_exercise = TrainingExercise.__table__
+        exercise = Exercise.__table__
+        muscle_group = MuscleGroup.__table__
+        return (
+            select(
+                trainings.c.id,
+                trainings.c.user_id,
+                trainings.c.date,
+                training_exercise.c.id.label("training_exercise_id"),
+                training_exercise.c.exercise_id,
+                training_exercise.c.sets,
+                training_exercise.c.reps,
+                training_exercise.c.weight,
+                exercise.c.name.label("exercise_name"),
+                muscle_group.c.name.label("muscle_group_name"),
+            )
+            .select_from(
+                trainings.outerjoin(training_exercise, training_exercise.c.training_id == trainings.c.id)
+                .outerjoin(exercise, exercise.c.id == training_exercise.c.exercise_id)
+                .outerjoin(muscle_group, muscle_group.c.id == exercise.c.muscle_group_id)
+            )
+            .order_by(
+                trainings.c.date.desc() if newest_first else trainings.c.date,
+                trainings.c.id.desc() if newest_first else trainings.c.id,
+                training_exercise.c.id,
+            )
+        )
+
+    async def get_training_read(self, training_id: int, user_id: int, db: AsyncSession | None = None) -> TrainingRead:
+        """Get a training by ID as a read schema, bypassing the ORM, from the read session unless given another one."""
+        training = Training.__table__
+        trainings = select(training.c.id, training.c.user_id, training.c.date).where(training.c.id == training_id, training.c.user_id == user_id).subquery()
+        result = await (db or self.read_db).execute(self.get_training_rows_query(trainings))
+        reads = TrainingRead.from_rows(result.all())
+        if not reads:
+            raise HTTPException(status_code=404, detail="Training not found")
+        return reads[0]
+
     async def get_training_by_id(
         self,
         training_id: int,
@@ -34,55 +143,262 @@ class TrainingService:
             raise HTTPException(status_code=404, detail="Training not found")
         return training
 
-    async def create_training(self, training: TrainingCreate, user_id: int) -> Training:
-        db_training = Training(
-            user_id=user_id,
-            date=training.date,
+    async def create_training(self, training: TrainingCreate, user_id: int) -> TrainingRead:
+        catalog = await exercise_catalog.get(self.db)
+        for exercise in training.exercises:
+            if exercise.exercise_id not in catalog.by_id:
+                raise HTTPException(status_code=404, detail=f"Exercise with id {exercise.exercise_id} not found")
+        (training_id,) = await self.insert_trainings([training], user_id)
+        return await self.get_training_read(training_id, user_id)
+
+    async def insert_trainings(self, trainings: list[TrainingCreate], user_id: int) -> list[int]:
+        """Insert trainings with their exercises and update the stats in one transaction, using one batched INSERT per table."""
+        # Ids are assigned in the order of the rows, though RETURNING may list them in any order.
+        # Pairing them up here avoids `sort_by_parameter_order`, which SQLite runs row by row.
+        training = Training.__table__
+        # Set with sub-second precision, unlike the server default, so that the version of the trainings changes
+        now = datetime.now(UTC)
+        first_seq = await self.next_change_seq(user_id, len(trainings)) - len(trainings) + 1
+        result = await self.db.execute(
+            insert(training).returning(training.c.id, training.c.date),
+            [
+                {"user_id": user_id, "date": training_create.date, "change_seq": first_seq + i, "created_at": now, "updated_at": now}
+                for i, training_create in enumerate(trainings)
+            ],
         )
-        self.db.add(db_training)
-        await self.db.flush()
+        inserted = sorted(result.tuples())
+        exercises = [
+            {"training_id": training_id, **exercise.row_values()}
+            for (training_id, _), training_create in zip(inserted, trainings, strict=True)
+            for exercise in training_create.exercises
+        ]
+        if exercises:
+            await self.db.execute(insert(TrainingExercise.__table__), exercises)
+        weeks = [week_of(date) for _, date in inserted]
+        await self.stats.refresh(
+            user_id, {(exercise.exercise_id, week) for week, training_create in zip(weeks, trainings, strict=True) for exercise in training_create.exercises}
+        )
+        await self.db.commit()
+        return [training_id for training_id, _ in inserted]
 
-        for exercise in training.exercises:
-            db_exercise = TrainingExercise(
-                training_id=db_training.id,
-                exercise_id=exercise.exercise_id,
-                sets=exercise.sets,
-                reps=exercise.reps,
-                weight=exercise.weight,
+    async def import_trainings(self, user_id: int, rows: AsyncIterable[ImportRow], exercise_ids: Collection[int]) -> TrainingImportResult:
+        """Validate and insert trainings in chunks of `IMPORT_CHUNK_SIZE`, collecting the errors of invalid rows."""
+        imported = 0
+        errors = []
+        chunk: list[TrainingCreate] = []
+        async for row, data in rows:
+            try:
+                training = TrainingCreate.model_validate_json(data) if isinstance(data, bytes) else TrainingCreate.model_validate(data)
+            except ValidationError as e:
+                detail = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+                errors.append(TrainingImportError(row=row, detail=detail))
+                continue
+
+            unknown = sorted({exercise.exercise_id for exercise in training.exercises}.difference(exercise_ids))
+            if unknown:
+                errors.append(TrainingImportError(row=row, detail=f"Unknown exercise_id: {', '.join(map(str, unknown))}"))
+                continue
+
+            chunk.append(training)
+            if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+                await self.insert_trainings(chunk, user_id)
+                imported += len(chunk)
+                chunk = []
+
+        if chunk:
+            await self.insert_trainings(chunk, user_id)
+            imported += len(chunk)
+        return TrainingImportResult(imported=imported, errors=errors)
+
+    async def get_user_trainings(self, user_id: int, params: TrainingListParams | None = None) -> tuple[list[dict[str, Any]], TrainingCursor | None]:
+        """Get one page of user trainings, newest first, and the cursor of the next page.
+
+        Trainings are returned as dicts shaped like `TrainingRead`, to be serialized with `dump_trainings`.
+        """
+        params = params or TrainingListParams()
+        training = Training.__table__
+        query = select(training.c.id, training.c.user_id, training.c.date).where(training.c.user_id == user_id)
+        if params.date_from is not None:
+            query = query.where(training.c.date >= params.date_from)
+        if params.date_to is not None:
+            query = query.where(training.c.date < params.date_to)
+        if params.cursor is not None:
+            query = query.where(tuple_(training.c.date, training.c.id) < (params.cursor.date, params.cursor.id))
+
+        # Fetch one extra training to find out whether there is a next page
+        page = query.order_by(training.c.date.desc(), training.c.id.desc()).limit(params.limit + 1).subquery()
+        result = await self.read_db.execute(self.get_training_rows_query(page))
+        trainings = group_training_rows(result.all())
+
+        next_cursor = None
+        if len(trainings) > params.limit:
+            trainings = trainings[: params.limit]
+            last = trainings[-1]
+            next_cursor = TrainingCursor(date=last["date"], id=last["id"])
+        return trainings, next_cursor
+
+    async def get_trainings_version(self, user_id: int) -> tuple[int, datetime | None]:
+        """Get the number of user trainings and the last time one of them changed.
+
+        Creating, updating or deleting a training changes one or the other, so together they
+        identify the current state of the trainings, from an index alone.
+        """
+        training = Training.__table__
+        query = select(func.count(), func.max(training.c.updated_at)).where(training.c.user_id == user_id)
+        count, updated_at = (await self.read_db.execute(query)).one()
+        return count, updated_at
+
+    async def next_change_seq(self, user_id: int, count: int = 1) -> int:
+        """Take the next `count` change numbers of the user trainings and return the last one.
+
+        The sequence of the user stays locked until the transaction ends, so that changes are
+        committed in the order of their numbers and a client never skips one that commits late.
+        """
+        statement = upsert(self.db, ChangeSequence).values(user_id=user_id, value=count)
+        result = await self.db.execute(
+            statement.on_conflict_do_update(index_elements=[ChangeSequence.user_id], set_={"value": ChangeSequence.value + statement.excluded.value}).returning(
+                ChangeSequence.value
             )
-            self.db.add(db_exercise)
+        )
+        return result.scalar_one()
 
-        await self.db.commit()
-        await self.db.refresh(db_training)
-        return db_training
+    async def get_changes(self, user_id: int, params: TrainingChangesParams) -> TrainingChanges:
+        """Get the trainings changed and the ids of those deleted after the `since` change, up to `limit` changes.
 
-    async def get_user_trainings(self, user_id: int) -> list[Training]:
-        query = self.get_training_query().filter(Training.user_id == user_id)
-        result = await self.db.execute(query.order_by(Training.date.desc()))
-        return cast("list[Training]", result.scalars().all())
+        Every change moves a training to the end of the sequence, so a training changed several
+        times is returned once, in its current state.
+        """
+        training = Training.__table__
+        tombstone = TrainingTombstone.__table__
+        # One statement, so that both tables are read from the same snapshot: readers autocommit, and a
+        # change committed between two reads could fall behind a later one the cursor has moved past
+        changed = (
+            select(training.c.change_seq, training.c.id, false().label("is_deleted"))
+            .where(training.c.user_id == user_id, training.c.change_seq > params.since)
+            .order_by(training.c.change_seq)
+            .limit(params.limit + 1)
+        )
+        deleted = (
+            select(tombstone.c.change_seq, tombstone.c.training_id, true())
+            .where(tombstone.c.user_id == user_id, tombstone.c.change_seq > params.since)
+            .order_by(tombstone.c.change_seq)
+            .limit(params.limit + 1)
+        )
+        # Each side is limited on its own index before they are merged
+        union = union_all(select(changed.subquery()), select(deleted.subquery())).subquery()
+        result = await self.read_db.execute(select(union).order_by(union.c.change_seq).limit(params.limit + 1))
+        changes = [(seq, id_, bool(is_deleted)) for seq, id_, is_deleted in result]
+        page = changes[: params.limit]
 
-    async def update_training(self, training_id: int, user_id: int, training: TrainingUpdate) -> Training:
-        db_training = await self.get_training_by_id(training_id, user_id)
-        db_training.date = training.date  # type: ignore[assignment]
+        trainings = []
+        training_ids = [id_ for _, id_, is_deleted in page if not is_deleted]
+        if training_ids:
+            selected = select(training.c.id, training.c.user_id, training.c.date).where(training.c.id.in_(training_ids)).subquery()
+            trainings = TrainingRead.from_rows((await self.read_db.execute(self.get_training_rows_query(selected))).all())
+        return TrainingChanges(
+            trainings=trainings,
+            deleted=[id_ for _, id_, is_deleted in page if is_deleted],
+            cursor=page[-1][0] if page else params.since,
+            has_more=len(changes) > params.limit,
+        )
 
-        delete_query = delete(TrainingExercise).filter(TrainingExercise.training_id == training_id)
-        await self.db.execute(delete_query)
+    async def stream_user_trainings(self, user_id: int) -> AsyncIterator[TrainingRead]:
+        """Stream all user trainings, oldest first, in batches of `EXPORT_BATCH_SIZE` trainings.
 
-        for exercise in training.exercises:
-            db_exercise = TrainingExercise(
-                training_id=db_training.id,
-                exercise_id=exercise.exercise_id,
-                sets=exercise.sets,
-                reps=exercise.reps,
-                weight=exercise.weight,
+        Every batch continues after the date and id of the last one, and the connection goes back
+        to the pool in between, so that slow downloads do not hold the reader connections.
+        """
+        training = Training.__table__
+        after: tuple[datetime, int] | None = None
+        while True:
+            trainings = select(training.c.id, training.c.user_id, training.c.date).where(training.c.user_id == user_id)
+            if after is not None:
+                trainings = trainings.where(tuple_(training.c.date, training.c.id) > after)
+            batch = trainings.order_by(training.c.date, training.c.id).limit(settings.EXPORT_BATCH_SIZE).subquery()
+            rows = (await self.read_db.execute(self.get_training_rows_query(batch, newest_first=False))).all()
+            await self.read_db.close()
+            reads = TrainingRead.from_rows(rows)
+            for read in reads:
+                yield read
+            if len(reads) < settings.EXPORT_BATCH_SIZE:
+                return
+            # The stored date of the last training, which its read schema may have normalized
+            after = (rows[-1].date, rows[-1].id)
+
+    async def update_training(self, training_id: int, user_id: int, training: TrainingUpdate | TrainingPatch) -> TrainingRead:
+        """Update a training, writing only the rows that differ from the stored ones.
+
+        Fields left out of a `TrainingPatch` keep their value. The result is built from the request
+        and the exercise catalog instead of being read back.
+        """
+        current = await self.get_training_read(training_id, user_id, self.db)
+        catalog = await exercise_catalog.get(self.db)
+        exercises = current.exercises if training.exercises is None else training.exercises
+        for exercise in exercises:
+            if exercise.exercise_id not in catalog.by_id:
+                raise HTTPException(status_code=404, detail=f"Exercise with id {exercise.exercise_id} not found")
+
+        pairs, first_new = align_exercises(current.exercises, exercises)
+        now = datetime.now(UTC)
+        updated = [
+            {"id": current.exercises[i].id, **exercises[j].row_values(), "updated_at": now}
+            for i, j in pairs
+            if current.exercises[i].row_values() != exercises[j].row_values()
+        ]
+        ids = [current.exercises[i].id for i, _ in pairs]
+        kept = set(ids)
+        deleted = [exercise.id for exercise in current.exercises if exercise.id not in kept]
+
+        if updated:
+            await self.db.execute(update(TrainingExercise), updated)
+        if deleted:
+            await self.db.execute(delete(TrainingExercise).where(TrainingExercise.id.in_(deleted)))
+        if first_new < len(exercises):
+            training_exercise = TrainingExercise.__table__
+            result = await self.db.execute(
+                insert(training_exercise).returning(training_exercise.c.id),
+                [{"training_id": training_id, **exercise.row_values()} for exercise in exercises[first_new:]],
             )
-            self.db.add(db_exercise)
+            # Ids are assigned in the order of the rows, though RETURNING may list them in any order
+            ids.extend(sorted(result.scalars()))
 
-        await self.db.commit()
-        await self.db.refresh(db_training)
-        return db_training
+        # Child rows count as changes to the training, so that its `updated_at` reflects them
+        values: dict[str, Any] = {"updated_at": now} if updated or deleted or first_new < len(exercises) else {}
+        if training.date is not None and not same_instant(current.date, training.date):
+            values.update(date=training.date, updated_at=now)
+        date = current.date
+        if values:
+            values["change_seq"] = await self.next_change_seq(user_id)
+            result = await self.db.execute(update(Training).where(Training.id == training_id).values(values).returning(Training.date))
+            date = result.scalar_one()
+            await self.stats.refresh(
+                user_id,
+                [(exercise.exercise_id, week_of(current.date)) for exercise in current.exercises]
+                + [(exercise.exercise_id, week_of(date)) for exercise in exercises],
+            )
+            await self.db.commit()
+
+        return TrainingRead(
+            id=training_id,
+            user_id=user_id,
+            date=date,
+            exercises=[
+                TrainingExerciseRead(
+                    id=id_,
+                    training_id=training_id,
+                    **exercise.row_values(),
+                    exercise=ExerciseInfo(name=catalog.by_id[exercise.exercise_id].name, muscle_group=catalog.by_id[exercise.exercise_id].muscle_group.name),
+                )
+                for id_, exercise in zip(ids, exercises, strict=True)
+            ],
+        )
 
     async def delete_training(self, training_id: int, user_id: int) -> None:
-        training = await self.get_training_by_id(training_id, user_id, include_exercises=False)
+        training = await self.get_training_by_id(training_id, user_id)
+        week = week_of(training.date)  # type: ignore[arg-type]
+        keys = [(exercise.exercise_id, week) for exercise in training.exercises]
+        self.db.add(TrainingTombstone(user_id=user_id, training_id=training_id, change_seq=await self.next_change_seq(user_id)))
         await self.db.delete(training)
+        await self.db.flush()
+        await self.stats.refresh(user_id, keys)
         await self.db.commit()
@@ -0,0 +1,134 @@
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+from app.models.models import Training, TrainingExercise, TrainingStat
+from app.schemas.stats import ExerciseProgress, ExerciseWeek, MuscleGroupLoad, StatsParams, UserStats, WeeklyStats
+from app.services.exercise_catalog import ExerciseCatalog
+from sqlalchemy import Select, and_, delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# An exercise in a week of the trainings of a user
+type StatKey = tuple[int, date]
+
+
+def week_of(value: datetime) -> date:
+    """Monday of the week of a date, as stored in the database."""
+    return value.date() - timedelta(days=value.weekday())
+
+
+def estimate_1rm(weight: float, reps: int) -> float:
+    """One repetition maximum estimated with the Epley formula."""
+    return weight if reps == 1 else weight * (1 + reps / 30)
+
+
+def date_ranges(weeks: Iterable[date]) -> list[tuple[datetime, datetime]]:
+    """Merge weeks into as few `[start, end)` date ranges as possible."""
+    ranges: list[tuple[datetime, datetime]] = []
+    for week in sorted(weeks):
+        start, end = datetime.combine(week, time.min), datetime.combine(week + timedelta(weeks=1), time.min)
+        if ranges and ranges[-1][1] == start:
+            start = ranges.pop()[0]
+        ranges.append((start, end))
+    return ranges
+
+
+def filter_weeks(query: Select, params: StatsParams) -> Select:
+    """Restrict a stats query to the weeks overlapping the requested dates, in week order."""
+    if params.date_from is not None:
+        query = query.where(TrainingStat.week > params.date_from - timedelta(weeks=1))
+    if params.date_to is not None:
+        query = query.where(TrainingStat.week < params.date_to)
+    return query.order_by(TrainingStat.week)
+
+
+class TrainingStatsService:
+    """Weekly per exercise totals of user trainings, recomputed for the weeks a write touches."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def refresh(self, user_id: int, keys: Iterable[StatKey]) -> None:
+        """Recompute the stats of the given exercises and weeks from the training rows, in the current transaction.
+
+        Only the rows of the touched weeks are read, so the cost does not grow with the history.
+        Every touched exercise is recomputed in every touched week, which keeps the statements small.
+        """
+        keys = set(keys)
+        if not keys:
+            return
+        exercise_ids = {exercise_id for exercise_id, _ in keys}
+        weeks = {week for _, week in keys}
+        training = Training.__table__
+        training_exercise = TrainingExercise.__table__
+        query = (
+            select(
+                training.c.id, training.c.date, training_exercise.c.exercise_id, training_exercise.c.sets, training_exercise.c.reps, training_exercise.c.weight
+            )
+            .select_from(training.join(training_exercise, training_exercise.c.training_id == training.c.id))
+            .where(
+                training.c.user_id == user_id,
+                training_exercise.c.exercise_id.in_(exercise_ids),
+                or_(*(and_(training.c.date >= start, training.c.date < end) for start, end in date_ranges(weeks))),
+            )
+        )
+        result = await self.db.execute(query)
+
+        trainings: defaultdict[StatKey, set[int]] = defaultdict(set)
+        stats: dict[StatKey, dict[str, Any]] = {}
+        training_weeks: dict[int, date] = {}
+        for training_id, training_date, exercise_id, sets, reps, weight in result:
+            week = training_weeks.get(training_id)
+            if week is None:
+                week = training_weeks[training_id] = week_of(training_date)
+            key = (exercise_id, week)
+            trainings[key].add(training_id)
+            stat = stats.setdefault(key, {"sets": 0, "reps": 0, "volume": 0.0, "max_weight": 0.0, "estimated_1rm": 0.0})
+            stat["sets"] += sets
+            stat["reps"] += sets * reps
+            stat["volume"] += sets * reps * weight
+            stat["max_weight"] = max(stat["max_weight"], weight)
+            stat["estimated_1rm"] = max(stat["estimated_1rm"], estimate_1rm(weight, reps))
+
+        await self.db.execute(
+            delete(TrainingStat).where(TrainingStat.user_id == user_id, TrainingStat.exercise_id.in_(exercise_ids), TrainingStat.week.in_(weeks))
+        )
+        if stats:
+            await self.db.execute(
+                insert(TrainingStat.__table__),
+                [
+                    {"user_id": user_id, "exercise_id": exercise_id, "week": week, "trainings": len(trainings[exercise_id, week]), **stat}
+                    for (exercise_id, week), stat in stats.items()
+                ],
+            )
+
+    async def get_user_stats(self, user_id: int, params: StatsParams, catalog: ExerciseCatalog) -> UserStats:
+        """Weekly totals of all user trainings, split by muscle group."""
+        query = select(TrainingStat.week, TrainingStat.exercise_id, TrainingStat.sets, TrainingStat.reps, TrainingStat.volume)
+        result = await self.db.execute(filter_weeks(query.where(TrainingStat.user_id == user_id), params))
+
+        weeks: dict[date, WeeklyStats] = {}
+        loads: dict[tuple[date, str], MuscleGroupLoad] = {}
+        for week, exercise_id, sets, reps, volume in result:
+            weekly = weeks.get(week)
+            if weekly is None:
+                weekly = weeks[week] = WeeklyStats(week=week, sets=0, reps=0, volume=0.0, muscle_groups=[])
+            exercise = catalog.by_id.get(exercise_id)
+            muscle_group = exercise.muscle_group.name if exercise is not None else ""
+            load = loads.get((week, muscle_group))
+            if load is None:
+                load = loads[week, muscle_group] = MuscleGroupLoad(muscle_group=muscle_group, sets=0, reps=0, volume=0.0)
+                weekly.muscle_groups.append(load)
+            for total in (weekly, load):
+                total.sets += sets
+                total.reps += reps
+                total.volume += volume
+        return UserStats(weeks=list(weeks.values()))
+
+    async def get_exercise_progress(self, user_id: int, exercise_id: int, params: StatsParams) -> ExerciseProgress:
+        """Weekly totals and best lifts of one exercise in the user trainings."""
+        query = select(TrainingStat).where(TrainingStat.user_id == user_id, TrainingStat.exercise_id == exercise_id)
+        result = await self.db.execute(filter_weeks(query, params))
+        return ExerciseProgress(exercise_id=exercise_id, weeks=[ExerciseWeek.model_validate(stat) for stat in result.scalars()])
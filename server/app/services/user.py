@@ -1,6 +1,6 @@
 from datetime import UTC, datetime
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import password_hasher
 from app.models.models import User
 from app.schemas.user import UserCreate
 from sqlalchemy import or_, select
@@ -12,7 +12,7 @@ async def create_user(db: AsyncSession, user_data: UserCreate) -> User:
     user = User(
         email=user_data.email,
         username=user_data.username,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await password_hasher.hash(user_data.password),
         updated_at=datetime.now(UTC),
     )
     db.add(user)
@@ -38,6 +38,6 @@ async def authenticate_user(db: AsyncSession, username: str, password: str) -> U
     user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return None
     return user
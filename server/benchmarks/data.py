@@ -0,0 +1,178 @@
+"""Seeded synthetic data for benchmarks: users with trainings of several exercises each.
+
+The same arguments always create the same data. Run from the server directory to fill the
+database of a server, e.g. for load tests:
+
+    python -m benchmarks.data --users 100 --trainings 200 --exercises 5 --database bench.db
+
+Users are named user0, user1, ... and all log in with the password in `PASSWORD`.
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
+from itertools import batched
+from pathlib import Path
+from typing import Any
+
+from app.core.security import get_password_hash, password_hasher
+from app.db.session import create_engine, get_db, get_read_db
+from app.main import app
+from app.models.base import Base
+from app.models.models import Exercise, MuscleGroup, Training, TrainingExercise, User
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+
+PASSWORD = "benchpassword"
+
+# Words exercise names are made of, so that searches match several of them
+MOVES = ["Press", "Row", "Squat", "Curl", "Deadlift", "Raise", "Extension", "Fly", "Pulldown", "Lunge", "Shrug", "Dip"]
+EQUIPMENT = ["Barbell", "Dumbbell", "Cable", "Machine", "Kettlebell", "Band", "Smith"]
+MUSCLE_GROUPS = ["Chest", "Back", "Legs", "Shoulders", "Biceps", "Triceps", "Core", "Glutes"]
+
+# Rows inserted per statement
+INSERT_BATCH_SIZE = 10_000
+
+
+class DataSpec:
+    """How much data to generate, and the seed of the random choices."""
+
+    def __init__(self, users: int, trainings: int, exercises: int, catalog: int = 200, seed: int = 0) -> None:
+        self.users = users
+        # Per user
+        self.trainings = trainings
+        # Per training
+        self.exercises = exercises
+        # Exercises in the catalog
+        self.catalog = catalog
+        self.seed = seed
+
+
+class Dataset:
+    """Ids of the generated rows, for benchmarks to pick requests from."""
+
+    def __init__(self, user_ids: list[int], training_ids: dict[int, list[int]], exercise_ids: list[int]) -> None:
+        self.user_ids = user_ids
+        self.training_ids = training_ids
+        self.exercise_ids = exercise_ids
+
+    @staticmethod
+    def username(index: int) -> str:
+        return f"user{index}"
+
+
+async def generate(session: AsyncSession, spec: DataSpec) -> Dataset:
+    """Create a catalog of exercises, and users with trainings of exercises from it."""
+    rng = random.Random(spec.seed)
+    now = datetime(2025, 1, 1, tzinfo=UTC)
+
+    muscle_group_ids = (await session.execute(insert(MuscleGroup).returning(MuscleGroup.id), [{"name": name} for name in MUSCLE_GROUPS])).scalars().all()
+    exercise_rows = [
+        {
+            "name": f"{rng.choice(EQUIPMENT)} {rng.choice(MOVES)} {i}",
+            "description": f"Synthetic exercise {i}",
+            "muscle_group_id": rng.choice(muscle_group_ids),
+            "aliases": [f"{rng.choice(MOVES)} {i}"],
+        }
+        for i in range(spec.catalog)
+    ]
+    exercise_ids = list((await session.execute(insert(Exercise).returning(Exercise.id, sort_by_parameter_order=True), exercise_rows)).scalars())
+
+    hashed_password = get_password_hash(PASSWORD)
+    user_rows = [
+        {"email": f"{Dataset.username(i)}@example.com", "username": Dataset.username(i), "hashed_password": hashed_password} for i in range(spec.users)
+    ]
+    user_ids = list((await session.execute(insert(User).returning(User.id, sort_by_parameter_order=True), user_rows)).scalars())
+
+    training_ids: dict[int, list[int]] = {user_id: [] for user_id in user_ids}
+    training_rows = [{"user_id": user_id, "date": now - timedelta(days=day, hours=rng.randint(6, 21))} for user_id in user_ids for day in range(spec.trainings)]
+    for batch in batched(training_rows, INSERT_BATCH_SIZE, strict=False):
+        result = await session.execute(insert(Training).returning(Training.id, Training.user_id, sort_by_parameter_order=True), batch)
+        for training_id, user_id in result:
+            training_ids[user_id].append(training_id)
+
+    exercise_rows = [
+        {
+            "training_id": training_id,
+            "exercise_id": rng.choice(exercise_ids),
+            "sets": rng.randint(1, 5),
+            "reps": rng.randint(1, 12),
+            "weight": round(rng.uniform(5, 200), 1),
+        }
+        for ids in training_ids.values()
+        for training_id in ids
+        for _ in range(spec.exercises)
+    ]
+    for batch in batched(exercise_rows, INSERT_BATCH_SIZE, strict=False):
+        await session.execute(insert(TrainingExercise), batch)
+    await session.commit()
+    return Dataset(user_ids, training_ids, exercise_ids)
+
+
+@asynccontextmanager
+async def asgi_client(spec: DataSpec) -> AsyncIterator[tuple[AsyncClient, Dataset]]:
+    """Serve the app from a temporary SQLite database filled with generated data, through a client calling it in process."""
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        engine = create_engine(url, writer=True)
+        read_engine = create_engine(url, writer=False)
+        sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        read_sessionmaker = async_sessionmaker(read_engine, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        start = time.perf_counter()
+        async with sessionmaker() as session:
+            dataset = await generate(session, spec)
+        print(f"generated data in {time.perf_counter() - start:.1f} s")
+
+        async def override_get_db() -> Any:
+            async with sessionmaker() as session:
+                yield session
+
+        async def override_get_read_db() -> Any:
+            async with read_sessionmaker() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_read_db
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+                yield client, dataset
+        finally:
+            app.dependency_overrides.clear()
+            password_hasher.shutdown()
+            await engine.dispose()
+            await read_engine.dispose()
+
+
+async def populate(database: str, spec: DataSpec) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{database}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        dataset = await generate(session, spec)
+    await engine.dispose()
+    print(f"Created {len(dataset.user_ids)} users with {sum(map(len, dataset.training_ids.values()))} trainings in {database}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", required=True, help="SQLite file to create the tables and data in")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--trainings", type=int, default=100, help="trainings per user")
+    parser.add_argument("--exercises", type=int, default=5, help="exercises per training")
+    parser.add_argument("--catalog", type=int, default=200, help="exercises in the catalog")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(populate(args.database, DataSpec(args.users, args.trainings, args.exercises, args.catalog, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Measure exercise search and suggestion latency on a large synthetic catalog.
+
+Run from the server directory:
+
+    python -m benchmarks.exercise_search --exercises 50000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from app.schemas.exercise import ExerciseDetail, MuscleGroupBase
+from app.services.exercise_search import ExerciseSearchIndex
+
+
+SYLLABLES = [
+    "жи",
+    "тя",
+    "при",
+    "раз",
+    "ве",
+    "де",
+    "ни",
+    "под",
+    "ъем",
+    "шта",
+    "нга",
+    "ган",
+    "тел",
+    "ле",
+    "жа",
+    "ба",
+    "ben",
+    "ch",
+    "pre",
+    "ss",
+    "ro",
+    "cu",
+    "rl",
+    "squ",
+    "at",
+    "dead",
+    "lift",
+    "ka",
+    "mo",
+    "tri",
+]
+QUERIES = ["Жим", "жим лежа", "тяга", "curl", "ра", "squat 12", "гантел", "nothing like this"]
+# Keystrokes of a user typing with typos
+SUGGEST_QUERIES = ["ж", "жм", "жми", "жмил", "тяг", "тчга", "gfynt", "squt", "dedlift", "прмсед"]
+
+
+def make_catalog(size: int) -> list[ExerciseDetail]:
+    """Make a catalog with names and aliases of two to four words out of a large vocabulary, plus some real names."""
+    rng = random.Random(size)
+    vocabulary = ["".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(size // 5)]
+    vocabulary += ["жим", "лежа", "тяга", "гантели", "curl", "squat", "bench", "press"]
+    groups = [MuscleGroupBase.model_construct(id=i, name=f"group {i}") for i in range(1, 11)]
+    exercises = [
+        ExerciseDetail.model_construct(
+            id=i,
+            name=" ".join(rng.sample(vocabulary, rng.randint(2, 4))),
+            description="",
+            aliases=[" ".join(rng.sample(vocabulary, rng.randint(2, 4))) for _ in range(2)],
+            muscle_group=rng.choice(groups),
+        )
+        for i in range(1, size + 1)
+    ]
+    return sorted(exercises, key=lambda exercise: exercise.name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exercises", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.exercises)
+    start = time.perf_counter()
+    index = ExerciseSearchIndex(catalog)
+    print(f"{args.exercises} exercises, index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            hits = index.search(query)
+            timings.append(time.perf_counter() - start)
+        print(f"  search  {query!r:22} {len(hits):6} hits  median {statistics.median(timings) * 1000:8.3f} ms")
+
+    for query in SUGGEST_QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            suggestions = index.suggest(query, 10)
+            timings.append(time.perf_counter() - start)
+        p99 = statistics.quantiles(timings, n=100)[98]
+        print(f"  suggest {query!r:22} {len(suggestions):6} hits  median {statistics.median(timings) * 1000:8.3f} ms  p99 {p99 * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
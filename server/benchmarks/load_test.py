@@ -0,0 +1,355 @@
+"""Replay a weighted mix of API requests from many concurrent clients, and report latency and errors by endpoint.
+
+Run from the server directory, against the app in process on generated data:
+
+    python -m benchmarks.load_test --concurrency 16 --duration 30
+
+or against a running server, on data from `benchmarks.data`:
+
+    python -m benchmarks.data --users 50 --trainings 200 --database bench.db
+    SQLITE_DATABASE_URL=sqlite+aiosqlite:///./bench.db uvicorn app.main:app --workers 1 &
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --users 50 --rate 200 --duration 30
+
+By default every client sends its next request as soon as the previous one is answered
+(`--concurrency`). With `--rate`, requests arrive at that many per second whether or not the
+server keeps up, at most `--concurrency` at a time, and their latency counts from when they
+were due, so a stalled server is not hidden by clients that stopped sending. `--sweep 1,4,16,64`
+runs the closed loop at each concurrency to find where throughput stops growing; engine
+settings such as SQLITE_READ_POOL_SIZE are read from the environment as usual.
+
+The mix defaults to `DEFAULT_MIX`. `--mix` reads it from a JSON lines file of
+`{"method": "GET", "path": "/api/v1/trainings/{training_id}", "weight": 5, "params": {...}}`,
+or from an access log, counting every "METHOD /path HTTP/1.1" request line. Numeric ids in
+logged paths become placeholders, filled with ids of the client's own trainings, of the catalog
+exercises or of the client's user.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import random
+import re
+import statistics
+import time
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+import orjson
+from benchmarks.data import PASSWORD, Dataset, DataSpec, asgi_client
+from httpx import AsyncClient, HTTPError, Limits, Response
+
+
+# Request line of an access log, e.g. `"GET /api/v1/trainings/?limit=20 HTTP/1.1"`
+ACCESS_LOG_REQUEST = re.compile(r'"(GET|POST|PUT|PATCH|DELETE) (\S+) HTTP/[\d.]+"')
+# Placeholder of a numeric path segment by the segment before it
+ID_PLACEHOLDERS = {"trainings": "{training_id}", "exercises": "{exercise_id}", "users": "{user_id}"}
+# A concurrency level whose throughput is not this much above the best so far is past saturation
+SATURATION_GAIN = 0.1
+
+
+class RequestTemplate:
+    """A kind of request in the mix, with a path that may hold id placeholders."""
+
+    def __init__(self, method: str, path: str, weight: float = 1, params: dict[str, str] | None = None) -> None:
+        self.method = method.upper()
+        self.path = path
+        self.weight = weight
+        self.params = params or {}
+
+    @property
+    def label(self) -> str:
+        query = "&".join(f"{name}={value}" for name, value in self.params.items())
+        return f"{self.method} {self.path}?{query}" if query else f"{self.method} {self.path}"
+
+
+DEFAULT_MIX = [
+    RequestTemplate("GET", "/api/v1/trainings/", 30),
+    RequestTemplate("GET", "/api/v1/trainings/{training_id}", 10),
+    RequestTemplate("GET", "/api/v1/exercises/", 8),
+    RequestTemplate("GET", "/api/v1/exercises/", 8, {"search": "press"}),
+    RequestTemplate("GET", "/api/v1/users/me", 10),
+    RequestTemplate("GET", "/api/v1/users/me/stats", 4),
+    RequestTemplate("POST", "/api/v1/trainings/", 10),
+    RequestTemplate("PUT", "/api/v1/trainings/{training_id}", 6),
+    RequestTemplate("DELETE", "/api/v1/trainings/{training_id}", 3),
+    RequestTemplate("POST", "/api/v1/users/login", 2),
+    RequestTemplate("GET", "/api/v1/trainings/export", 1),
+]
+
+
+def template_path(path: str) -> str:
+    """Replace the numeric ids in a logged path by placeholders."""
+    segments = path.split("/")
+    for i, segment in enumerate(segments[1:], start=1):
+        if segment.isdigit():
+            segments[i] = ID_PLACEHOLDERS.get(segments[i - 1], segment)
+    return "/".join(segments)
+
+
+def load_mix(path: Path) -> list[RequestTemplate]:
+    """Read a mix from a JSON lines file, or count the requests of an access log into one."""
+    if path.suffix in {".jsonl", ".ndjson"}:
+        return [RequestTemplate(**orjson.loads(line)) for line in path.read_text().splitlines() if line.strip()]
+    counts: Counter[tuple[str, str, tuple[tuple[str, str], ...]]] = Counter()
+    for line in path.read_text().splitlines():
+        match = ACCESS_LOG_REQUEST.search(line)
+        if match is not None:
+            url = urlsplit(match[2])
+            counts[match[1], template_path(url.path), tuple(sorted(parse_qsl(url.query)))] += 1
+    return [RequestTemplate(method, path, count, dict(params)) for (method, path, params), count in counts.most_common()]
+
+
+class VirtualUser:
+    """A signed in user the clients send requests as, with the trainings it has."""
+
+    def __init__(self, user_id: int, username: str, token: str, training_ids: list[int]) -> None:
+        self.user_id = user_id
+        self.username = username
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.training_ids = training_ids
+
+
+async def sign_in(client: AsyncClient, users: int) -> tuple[list[VirtualUser], list[int]]:
+    """Log in the generated users, and fetch their trainings and the exercise catalog to fill placeholders from."""
+    virtual_users = []
+    for i in range(users):
+        username = Dataset.username(i)
+        response = await client.post("/api/v1/users/login", json={"username": username, "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        user_id = (await client.get("/api/v1/users/me", headers=headers)).json()["id"]
+        trainings = (await client.get("/api/v1/trainings/", params={"limit": 500}, headers=headers)).json()
+        virtual_users.append(VirtualUser(user_id, username, response.json()["access_token"], [training["id"] for training in trainings]))
+    exercises = (await client.get("/api/v1/exercises/", headers=virtual_users[0].headers)).json()
+    return virtual_users, [exercise["id"] for exercise in exercises]
+
+
+class EndpointStats:
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.statuses: Counter[int] = Counter()
+
+    def summary(self, elapsed: float) -> dict[str, Any]:
+        """Summarize the requests of a run of `elapsed` seconds, latencies in ms."""
+        if len(self.latencies) > 1:
+            percentiles = statistics.quantiles(self.latencies, n=100, method="inclusive")
+            p50, p95, p99 = percentiles[49], percentiles[94], percentiles[98]
+        else:
+            p50 = p95 = p99 = self.latencies[0] if self.latencies else 0.0
+        requests = len(self.latencies)
+        return {
+            "requests": requests,
+            "throughput": requests / elapsed,
+            "error_rate": self.errors / requests if requests else 0.0,
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+            # Status 0 is a request that got no response
+            "statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+        }
+
+
+class LoadRun:
+    """Sends the requests of a run, and records how they went by endpoint."""
+
+    def __init__(self, client: AsyncClient, mix: list[RequestTemplate], users: list[VirtualUser], exercise_ids: list[int], seed: int) -> None:
+        self.client = client
+        self.mix = mix
+        self.weights = [template.weight for template in mix]
+        self.users = users
+        self.exercise_ids = exercise_ids
+        self.rng = random.Random(seed)
+        self.stats: dict[str, EndpointStats] = {}
+        # Requests whose placeholders could not be filled, e.g. deleting a training of a user with none left
+        self.skipped = 0
+        self.requests = 0
+
+    def training_body(self) -> dict[str, Any]:
+        return {
+            "date": (datetime(2025, 6, 1, tzinfo=UTC) + timedelta(minutes=self.requests)).isoformat(),
+            "exercises": [
+                {"exercise_id": self.rng.choice(self.exercise_ids), "sets": self.rng.randint(1, 5), "reps": self.rng.randint(1, 12), "weight": 20.0}
+                for _ in range(self.rng.randint(1, 6))
+            ],
+        }
+
+    def build(self, template: RequestTemplate, user: VirtualUser) -> dict[str, Any] | None:
+        """Fill in a request of the template as the user, or return None if the user has nothing to fill it with."""
+        path = template.path
+        if "{training_id}" in path:
+            if not user.training_ids:
+                return None
+            # A deleted training leaves the pool, so later requests do not get 404
+            index = self.rng.randrange(len(user.training_ids))
+            training_id = user.training_ids.pop(index) if template.method == "DELETE" else user.training_ids[index]
+            path = path.replace("{training_id}", str(training_id))
+        path = path.replace("{exercise_id}", str(self.rng.choice(self.exercise_ids))).replace("{user_id}", str(user.user_id))
+
+        request: dict[str, Any] = {"method": template.method, "url": path, "params": template.params, "headers": user.headers}
+        if path.endswith("/login"):
+            request["json"] = {"username": user.username, "password": PASSWORD}
+            del request["headers"]
+        elif template.method in {"POST", "PUT", "PATCH"} and "/trainings" in path:
+            request["json"] = self.training_body()
+        return request
+
+    async def send(self, template: RequestTemplate, user: VirtualUser, due: float | None = None) -> None:
+        """Send one request, its latency counted from `due` if it was due earlier than now."""
+        request = self.build(template, user)
+        if request is None:
+            self.skipped += 1
+            return
+        self.requests += 1
+        start = time.perf_counter() if due is None else due
+        response: Response | None = None
+        with contextlib.suppress(HTTPError):
+            response = await self.client.request(**request)
+        latency = (time.perf_counter() - start) * 1000
+        status_code = 0 if response is None else response.status_code
+
+        stats = self.stats.setdefault(template.label, EndpointStats())
+        stats.latencies.append(latency)
+        stats.statuses[status_code] += 1
+        if response is None or response.is_error:
+            stats.errors += 1
+        elif template.method == "POST" and request["url"].rstrip("/").endswith("/trainings"):
+            user.training_ids.append(response.json()["id"])
+
+    def pick(self) -> RequestTemplate:
+        return self.rng.choices(self.mix, self.weights)[0]
+
+    async def closed_loop(self, concurrency: int, duration: float) -> float:
+        """Run `concurrency` clients sending requests back to back for `duration` seconds, and return the elapsed time."""
+        start = time.perf_counter()
+        deadline = start + duration
+
+        async def client(n: int) -> None:
+            user = self.users[n % len(self.users)]
+            while time.perf_counter() < deadline:
+                await self.send(self.pick(), user)
+
+        await asyncio.gather(*(client(n) for n in range(concurrency)))
+        return time.perf_counter() - start
+
+    async def open_loop(self, rate: float, concurrency: int, duration: float) -> float:
+        """Send requests arriving at `rate` per second for `duration` seconds, at most `concurrency` at a time."""
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = []
+
+        async def arrive(template: RequestTemplate, user: VirtualUser, due: float) -> None:
+            async with semaphore:
+                await self.send(template, user, due)
+
+        start = time.perf_counter()
+        due = start
+        while due < start + duration:
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            tasks.append(asyncio.create_task(arrive(self.pick(), self.rng.choice(self.users), due)))
+            due += self.rng.expovariate(rate)
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        total = EndpointStats()
+        for stats in self.stats.values():
+            total.latencies.extend(stats.latencies)
+            total.errors += stats.errors
+            total.statuses.update(stats.statuses)
+        return {
+            "elapsed": elapsed,
+            "skipped": self.skipped,
+            "total": total.summary(elapsed),
+            "endpoints": {label: stats.summary(elapsed) for label, stats in sorted(self.stats.items())},
+        }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(f"{'endpoint':<48} {'requests':>8} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, summary in [*report["endpoints"].items(), ("total", report["total"])]:
+        print(
+            f"{label:<48} {summary['requests']:8d} {summary['throughput']:8.1f} {summary['error_rate']:7.1%} "
+            f"{summary['p50_ms']:8.1f} {summary['p95_ms']:8.1f} {summary['p99_ms']:8.1f}"
+        )
+    if report["skipped"]:
+        print(f"{report['skipped']} requests skipped for want of ids to fill their paths with")
+
+
+def print_sweep(reports: dict[int, dict[str, Any]]) -> None:
+    """Print the totals of every concurrency level, and the level throughput stopped growing at."""
+    print(f"{'concurrency':>11} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    best = 0.0
+    saturation = None
+    for concurrency, report in reports.items():
+        total = report["total"]
+        print(f"{concurrency:11d} {total['throughput']:8.1f} {total['error_rate']:7.1%} {total['p50_ms']:8.1f} {total['p99_ms']:8.1f}")
+        if saturation is None and best and total["throughput"] < best * (1 + SATURATION_GAIN):
+            saturation = concurrency
+        best = max(best, total["throughput"])
+    if saturation is None:
+        print("throughput still grows at the highest concurrency")
+    else:
+        print(f"saturated at concurrency {saturation}: throughput grew less than {SATURATION_GAIN:.0%} over the best before it")
+
+
+async def load_test(args: argparse.Namespace, client: AsyncClient) -> dict[str, Any]:
+    mix = load_mix(Path(args.mix)) if args.mix else DEFAULT_MIX
+    users, exercise_ids = await sign_in(client, args.users)
+    if args.sweep:
+        reports = {}
+        for concurrency in args.sweep:
+            load_run = LoadRun(client, mix, users, exercise_ids, args.seed)
+            reports[concurrency] = load_run.report(await load_run.closed_loop(concurrency, args.duration))
+        print_sweep(reports)
+        return {"sweep": reports}
+
+    load_run = LoadRun(client, mix, users, exercise_ids, args.seed)
+    if args.rate:
+        elapsed = await load_run.open_loop(args.rate, args.concurrency, args.duration)
+    else:
+        elapsed = await load_run.closed_loop(args.concurrency, args.duration)
+    report = load_run.report(elapsed)
+    print_report(report)
+    return report
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.url:
+        limits = Limits(max_connections=max([args.concurrency, *(args.sweep or [])]))
+        async with AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+            report = await load_test(args, client)
+    else:
+        async with asgi_client(DataSpec(args.users, args.trainings, args.exercises, seed=args.seed)) as (client, _):
+            report = await load_test(args, client)
+
+    if args.output:
+        report["parameters"] = {name: value for name, value in vars(args).items() if name != "output"}
+        Path(args.output).write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        print(f"results written to {args.output}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running server, instead of the app in process on generated data")
+    parser.add_argument("--users", type=int, default=20, help="users to send requests as, user0 to userN-1 of `benchmarks.data`")
+    parser.add_argument("--trainings", type=int, default=100, help="trainings per generated user, without --url")
+    parser.add_argument("--exercises", type=int, default=5, help="exercises per generated training, without --url")
+    parser.add_argument("--mix", help="JSON lines file of request templates, or access log to replay")
+    parser.add_argument("--concurrency", type=int, default=8, help="clients, or with --rate the most requests in flight")
+    parser.add_argument("--rate", type=float, help="requests per second arriving independently of the responses")
+    parser.add_argument("--sweep", type=lambda value: [int(level) for level in value.split(",")], help="comma separated concurrency levels to run in turn")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to send requests for, per concurrency level")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait for a response from --url")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file to write the results to")
+    args = parser.parse_args()
+    if args.sweep and args.rate:
+        parser.error("--sweep runs closed loops, without --rate")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Measure the latency of the training list while many users log in at the same time.
+
+Run from the server directory:
+
+    python -m benchmarks.login_storm --logins 32 --requests 200
+
+With `--inline` bcrypt runs on the event loop, as it did before the password hasher pool,
+which shows how a login storm stalls every other request.
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from app.core.security import create_access_token, get_password_hash, password_hasher
+from app.db.session import get_db
+from app.main import app
+from app.models.base import Base
+from app.models.models import Exercise, MuscleGroup, Training, TrainingExercise, User
+from fastapi import status
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+
+PASSWORD = "benchpassword"
+TRAININGS = 50
+
+
+async def populate(session: AsyncSession) -> int:
+    """Create a user with some trainings, and return the user id."""
+    muscle_group_id = (await session.execute(insert(MuscleGroup).values(name="bench").returning(MuscleGroup.id))).scalar_one()
+    exercise_id = (
+        await session.execute(insert(Exercise).values(name="bench", description="", muscle_group_id=muscle_group_id, aliases=[]).returning(Exercise.id))
+    ).scalar_one()
+    hashed_password = get_password_hash(PASSWORD)
+    user_id = (
+        await session.execute(insert(User).values(email="bench@example.com", username="bench", hashed_password=hashed_password).returning(User.id))
+    ).scalar_one()
+    now = datetime.now(UTC)
+    training_ids = (
+        await session.execute(insert(Training).returning(Training.id), [{"user_id": user_id, "date": now - timedelta(days=i)} for i in range(TRAININGS)])
+    ).scalars()
+    await session.execute(
+        insert(TrainingExercise),
+        [{"training_id": training_id, "exercise_id": exercise_id, "sets": 3, "reps": 10, "weight": 50.0} for training_id in training_ids],
+    )
+    await session.commit()
+    return user_id
+
+
+async def list_trainings(client: AsyncClient, token: str, requests: int) -> list[float]:
+    """Request the training list one request at a time, and return the latencies in ms."""
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get("/api/v1/trainings/", headers={"Authorization": f"Bearer {token}"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == status.HTTP_200_OK, response.text
+    return latencies
+
+
+async def login_storm(client: AsyncClient, logins: int, stop: asyncio.Event) -> dict[int, int]:
+    """Log in from `logins` concurrent clients until stopped, and count the response statuses."""
+    statuses: dict[int, int] = {}
+
+    async def login() -> None:
+        while not stop.is_set():
+            response = await client.post("/api/v1/users/login", json={"username": "bench", "password": PASSWORD})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                await asyncio.sleep(float(response.headers["Retry-After"]))
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+    return statuses
+
+
+def report(name: str, latencies: list[float]) -> None:
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    print(f"{name:>14}: p50 {percentiles[49]:7.1f} ms, p95 {percentiles[94]:7.1f} ms, max {max(latencies):7.1f} ms")
+
+
+async def run(logins: int, requests: int, inline: bool) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with sessionmaker() as session:
+            user_id = await populate(session)
+
+        async def override_get_db() -> Any:
+            async with sessionmaker() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        if inline:
+
+            async def run_inline(function: Callable[..., Any], *args: Any) -> Any:
+                return function(*args)
+
+            password_hasher.run = run_inline  # type: ignore[method-assign]
+
+        token = create_access_token(subject=user_id)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            report("idle", await list_trainings(client, token, requests))
+
+            stop = asyncio.Event()
+            storm = asyncio.create_task(login_storm(client, logins, stop))
+            start = time.perf_counter()
+            latencies = await list_trainings(client, token, requests)
+            stop.set()
+            statuses = await storm
+            elapsed = time.perf_counter() - start
+            report("login storm", latencies)
+
+        app.dependency_overrides.clear()
+        password_hasher.shutdown()
+        await engine.dispose()
+
+    print(f"logins: {statuses.get(200, 0) / elapsed:.1f}/s, statuses {statuses}")
+    if not inline:
+        print(
+            f"queue wait: mean {password_hasher.queue_wait.mean * 1000:.1f} ms, max {password_hasher.queue_wait.max * 1000:.1f} ms; "
+            f"hash time: mean {password_hasher.hash_time.mean * 1000:.1f} ms; rejected {password_hasher.rejected}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32, help="concurrent login clients")
+    parser.add_argument("--requests", type=int, default=200, help="training list requests per phase")
+    parser.add_argument("--inline", action="store_true", help="run bcrypt on the event loop")
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.requests, args.inline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Compare the default and the tuned SQLite engine profiles under mixed read/write traffic.
+
+Every client creates a training or lists a page of its trainings, each time in its own
+sessions, like a request does. Run from the server directory:
+
+    python -m benchmarks.sqlite_concurrency --clients 32 --operations 50 --write-ratio 0.2
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from app.db.session import create_engine
+from app.models.base import Base
+from app.models.models import Exercise, MuscleGroup, User
+from app.schemas.training import TrainingCreate, TrainingExerciseCreate
+from app.services.training_service import TrainingService
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+
+CATALOG_SIZE = 50
+
+
+async def populate(engine: AsyncEngine, clients: int) -> None:
+    """Create the tables, the exercise catalog and one user per client."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        muscle_group_id = (await conn.execute(insert(MuscleGroup).values(name="bench").returning(MuscleGroup.id))).scalar_one()
+        await conn.execute(
+            insert(Exercise),
+            [{"name": f"exercise {i}", "description": "", "muscle_group_id": muscle_group_id, "aliases": []} for i in range(CATALOG_SIZE)],
+        )
+        await conn.execute(insert(User), [{"email": f"bench{i}@example.com", "username": f"bench{i}", "hashed_password": "-"} for i in range(clients)])
+
+
+def make_training(rng: random.Random) -> TrainingCreate:
+    return TrainingCreate(
+        date=datetime.now(UTC) - timedelta(days=rng.randint(0, 365)),
+        exercises=[
+            TrainingExerciseCreate(exercise_id=rng.randint(1, CATALOG_SIZE), sets=rng.randint(1, 5), reps=rng.randint(1, 12), weight=rng.uniform(10, 200))
+            for _ in range(5)
+        ],
+    )
+
+
+async def run(profile: str, clients: int, operations: int, write_ratio: float) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        if profile == "tuned":
+            engine, read_engine = create_engine(url, writer=True), create_engine(url, writer=False)
+        else:
+            engine = read_engine = create_async_engine(url)
+        await populate(engine, clients)
+        sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        read_sessionmaker = async_sessionmaker(read_engine, expire_on_commit=False)
+
+        latencies: dict[str, list[float]] = {"read": [], "write": []}
+        errors: list[str] = []
+
+        async def client(user_id: int) -> None:
+            rng = random.Random(user_id)
+            for _ in range(operations):
+                kind = "write" if rng.random() < write_ratio else "read"
+                start = time.perf_counter()
+                try:
+                    async with sessionmaker() as db, read_sessionmaker() as read_db:
+                        service = TrainingService(db, read_db)
+                        if kind == "write":
+                            await service.create_training(make_training(rng), user_id)
+                        else:
+                            await service.get_user_trainings(user_id)
+                except OperationalError as e:
+                    errors.append(str(e.orig))
+                    continue
+                latencies[kind].append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(user_id) for user_id in range(1, clients + 1)))
+        elapsed = time.perf_counter() - start
+        await engine.dispose()
+        await read_engine.dispose()
+
+    done = len(latencies["read"]) + len(latencies["write"])
+    print(f"{profile:>7}: {done / elapsed:7.0f} ops/s, {len(errors)} errors{f' ({errors[0]})' if errors else ''}")
+    for kind, values in latencies.items():
+        if len(values) > 1:
+            percentiles = statistics.quantiles(values, n=100, method="inclusive")
+            print(f"{kind:>14}: p50 {percentiles[49]:7.1f} ms, p95 {percentiles[94]:7.1f} ms, p99 {percentiles[98]:7.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--operations", type=int, default=50, help="operations per client")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--profile", choices=["default", "tuned"], nargs="+", default=["default", "tuned"])
+    args = parser.parse_args()
+    for profile in args.profile:
+        asyncio.run(run(profile, args.clients, args.operations, args.write_ratio))
+
+
+if __name__ == "__main__":
+    main()
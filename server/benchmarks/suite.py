@@ -0,0 +1,222 @@
+"""Time the main API scenarios on seeded synthetic data, and compare the results of two runs.
+
+Run from the server directory:
+
+    python -m benchmarks.suite run --users 20 --trainings 200 --output base.json
+    # change something
+    python -m benchmarks.suite run --users 20 --trainings 200 --output new.json
+    python -m benchmarks.suite compare base.json new.json --threshold 0.2
+
+Every scenario sends its requests one at a time through the ASGI app, on a SQLite database
+filled by `benchmarks.data` with the same seed, so two runs of the same arguments on the same
+machine are comparable. `compare` exits with status 1 when a scenario got slower than the
+threshold allows, so it can gate a change in CI.
+"""
+
+import argparse
+import asyncio
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import orjson
+from app.core.security import create_access_token
+from benchmarks.data import EQUIPMENT, MOVES, PASSWORD, Dataset, DataSpec, asgi_client
+from fastapi import status
+from httpx import AsyncClient, Response
+
+
+# Arguments of `DataSpec`, recorded with the results
+DATA_PARAMETERS = ("users", "trainings", "exercises", "catalog", "seed")
+
+# Response statuses a scenario may get, others fail the run
+OK_STATUSES = {status.HTTP_200_OK}
+
+
+class Context:
+    """What the scenarios of a run share: the client, the generated data and the trainings created so far."""
+
+    def __init__(self, client: AsyncClient, dataset: Dataset, exercises: int) -> None:
+        self.client = client
+        self.dataset = dataset
+        self.exercises = exercises
+        self.tokens = {user_id: create_access_token(subject=user_id) for user_id in dataset.user_ids}
+        # Trainings created by `create_training`, deleted by `delete_training`
+        self.created: list[tuple[int, int]] = []
+
+    def user(self, i: int) -> tuple[int, dict[str, str]]:
+        """Pick the user of the i-th request, and the headers to authenticate as them."""
+        user_id = self.dataset.user_ids[i % len(self.dataset.user_ids)]
+        return user_id, {"Authorization": f"Bearer {self.tokens[user_id]}"}
+
+    def training_body(self, i: int) -> dict[str, Any]:
+        exercise_ids = self.dataset.exercise_ids
+        return {
+            "date": (datetime(2025, 6, 1, tzinfo=UTC) + timedelta(hours=i)).isoformat(),
+            "exercises": [{"exercise_id": exercise_ids[(i + j) % len(exercise_ids)], "sets": 3, "reps": 10, "weight": 20.0 + j} for j in range(self.exercises)],
+        }
+
+
+async def login(context: Context, i: int) -> Response:
+    return await context.client.post("/api/v1/users/login", json={"username": Dataset.username(i % len(context.dataset.user_ids)), "password": PASSWORD})
+
+
+async def list_trainings(context: Context, i: int) -> Response:
+    _, headers = context.user(i)
+    return await context.client.get("/api/v1/trainings/", headers=headers)
+
+
+async def search_exercises(context: Context, i: int) -> Response:
+    _, headers = context.user(i)
+    terms = [*MOVES, *EQUIPMENT]
+    return await context.client.get("/api/v1/exercises/", params={"search": terms[i % len(terms)].lower()}, headers=headers)
+
+
+async def export_trainings(context: Context, i: int) -> Response:
+    _, headers = context.user(i)
+    return await context.client.get("/api/v1/trainings/export", headers=headers)
+
+
+async def create_training(context: Context, i: int) -> Response:
+    user_id, headers = context.user(i)
+    response = await context.client.post("/api/v1/trainings/", json=context.training_body(i), headers=headers)
+    if response.status_code == status.HTTP_200_OK:
+        context.created.append((user_id, response.json()["id"]))
+    return response
+
+
+async def update_training(context: Context, i: int) -> Response:
+    user_id, headers = context.user(i)
+    training_ids = context.dataset.training_ids[user_id]
+    training_id = training_ids[(i // len(context.dataset.user_ids)) % len(training_ids)]
+    return await context.client.put(f"/api/v1/trainings/{training_id}", json=context.training_body(i), headers=headers)
+
+
+async def delete_training(context: Context, _i: int) -> Response:
+    user_id, training_id = context.created.pop()
+    return await context.client.delete(f"/api/v1/trainings/{training_id}", headers={"Authorization": f"Bearer {context.tokens[user_id]}"})
+
+
+# In the order they run, deleting the trainings last leaves as many trainings as there were for the scenarios before it
+SCENARIOS: dict[str, Callable[[Context, int], Awaitable[Response]]] = {
+    "login": login,
+    "list_trainings": list_trainings,
+    "search_exercises": search_exercises,
+    "export_trainings": export_trainings,
+    "create_training": create_training,
+    "update_training": update_training,
+    "delete_training": delete_training,
+}
+
+
+def summarize(latencies: list[float]) -> dict[str, float]:
+    """Summarize latencies in ms."""
+    return {
+        "median_ms": statistics.median(latencies),
+        "p95_ms": statistics.quantiles(latencies, n=20, method="inclusive")[18],
+        "mean_ms": statistics.fmean(latencies),
+        "min_ms": min(latencies),
+        "max_ms": max(latencies),
+    }
+
+
+async def time_scenario(context: Context, name: str, iterations: int, warmup: int) -> dict[str, float]:
+    scenario = SCENARIOS[name]
+    latencies = []
+    for i in range(warmup + iterations):
+        start = time.perf_counter()
+        response = await scenario(context, i)
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code not in OK_STATUSES:
+            raise RuntimeError(f"{name} got {response.status_code}: {response.text}")
+        if i >= warmup:
+            latencies.append(elapsed)
+    return summarize(latencies)
+
+
+async def run(parameters: dict[str, int], scenarios: list[str], output: str) -> None:
+    results = {}
+    async with asgi_client(DataSpec(**{name: parameters[name] for name in DATA_PARAMETERS})) as (client, dataset):
+        context = Context(client, dataset, parameters["exercises"])
+        for name in scenarios:
+            results[name] = await time_scenario(context, name, parameters["iterations"], parameters["warmup"])
+            print(f"{name:>18}: median {results[name]['median_ms']:7.2f} ms, p95 {results[name]['p95_ms']:7.2f} ms")
+
+    report = {
+        "created_at": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "scenarios": results,
+    }
+    Path(output).write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    print(f"results written to {output}")
+
+
+def compare(base_path: str, new_path: str, threshold: float, metric: str) -> int:
+    """Print the change of every scenario between two runs, and return 1 if any got slower than the threshold."""
+    base = orjson.loads(Path(base_path).read_bytes())
+    new = orjson.loads(Path(new_path).read_bytes())
+    if base["parameters"] != new["parameters"]:
+        print(f"warning: the runs have different parameters, {base['parameters']} and {new['parameters']}")
+
+    regressions = []
+    print(f"{'scenario':>18} {'base':>10} {'new':>10} {'change':>8}")
+    for name, base_result in base["scenarios"].items():
+        if name not in new["scenarios"]:
+            print(f"{name:>18} {base_result[metric]:10.2f} {'-':>10}")
+            continue
+        before, after = base_result[metric], new["scenarios"][name][metric]
+        change = after / before - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:>18} {before:10.2f} {after:10.2f} {change:+8.1%}{flag}")
+
+    if regressions:
+        print(f"{len(regressions)} scenario(s) slower by more than {threshold:.0%} in {metric}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the scenarios and write the results as JSON")
+    run_parser.add_argument("--users", type=int, default=20)
+    run_parser.add_argument("--trainings", type=int, default=200, help="trainings per user")
+    run_parser.add_argument("--exercises", type=int, default=5, help="exercises per training")
+    run_parser.add_argument("--catalog", type=int, default=200, help="exercises in the catalog")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--iterations", type=int, default=50, help="timed requests per scenario")
+    run_parser.add_argument("--warmup", type=int, default=5, help="untimed requests per scenario before the timed ones")
+    run_parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="scenario to run, all by default; may be repeated")
+    run_parser.add_argument("--output", default="benchmark.json")
+
+    compare_parser = commands.add_parser("compare", help="compare two results and fail on regressions")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="slowdown allowed, as a fraction")
+    compare_parser.add_argument("--metric", default="median_ms", choices=["median_ms", "p95_ms", "mean_ms", "min_ms", "max_ms"])
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        sys.exit(compare(args.base, args.new, args.threshold, args.metric))
+
+    parameters = {name: getattr(args, name) for name in (*DATA_PARAMETERS, "iterations", "warmup")}
+    # Deleting trainings needs those created before it
+    scenarios = [name for name in SCENARIOS if args.scenario is None or name in args.scenario]
+    if "delete_training" in scenarios and "create_training" not in scenarios:
+        parser.error("delete_training needs create_training")
+    asyncio.run(run(parameters, scenarios, args.output))
+
+
+if __name__ == "__main__":
+    main()
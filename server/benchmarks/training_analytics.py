@@ -0,0 +1,74 @@
+"""Measure the columnar training analytics on synthetic training exercise rows.
+
+Run from the server directory:
+
+    python -m benchmarks.training_analytics --rows 10000000
+"""
+
+import argparse
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from app.services.training_analytics import TrainingColumns, TrainingSnapshot
+
+
+USERS = 10_000
+CATALOG_SIZE = 200
+DAYS = 5 * 365
+
+
+def make_columns(rows: int) -> TrainingColumns:
+    """Build `rows` random training exercise rows, as they would be loaded from the database."""
+    rng = np.random.default_rng(rows)
+    return TrainingColumns(
+        {
+            "id": np.arange(1, rows + 1, dtype=np.int32),
+            "user_id": rng.integers(1, USERS + 1, rows, dtype=np.int32),
+            "exercise_id": rng.integers(1, CATALOG_SIZE + 1, rows, dtype=np.int32),
+            "day": rng.integers(19_000, 19_000 + DAYS, rows, dtype=np.int32),
+            "sets": rng.integers(1, 6, rows, dtype=np.int32),
+            "reps": rng.integers(1, 13, rows, dtype=np.int32),
+            "weight": rng.uniform(10, 200, rows).astype(np.float32),
+        }
+    )
+
+
+def measure(name: str, rows: int, function: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>22}: {elapsed:7.3f} s, {rows / elapsed:12.0f} rows/s")
+    return result
+
+
+def run(rows: int) -> None:
+    data = measure("generate", rows, lambda: make_columns(rows))
+    measure("volume percentiles", rows, lambda: data.percentiles(data.volume(), data.exercise_id, [50, 90, 99]))
+    measure("1rm percentiles", rows, lambda: data.percentiles(data.estimated_1rm(), data.exercise_id, [50, 90, 99]))
+    measure("rolling volume", rows, lambda: data.rolling_volume(1, 28))
+    records = measure("personal records", rows, data.personal_records)
+    print(f"{len(records)} personal records")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = TrainingSnapshot(Path(tmp))
+        measure("snapshot save", rows, lambda: snapshot.save(data, datetime.now(UTC)))
+        loaded = measure("snapshot mmap", rows, snapshot.load)
+        measure("mmap percentiles", rows, lambda: loaded.percentiles(loaded.volume(), loaded.exercise_id, [50, 90, 99]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000_000])
+    args = parser.parse_args()
+    for rows in args.rows:
+        print(f"{rows} rows")
+        run(rows)
+
+
+if __name__ == "__main__":
+    main()
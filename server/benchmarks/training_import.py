@@ -0,0 +1,108 @@
+"""Measure the bulk training import throughput in training exercise rows per second.
+
+Run from the server directory:
+
+    python -m benchmarks.training_import --rows 100000 --format ndjson csv json
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from app.models.base import Base
+from app.models.models import Exercise, MuscleGroup, User
+from app.services.training_import import CSV_FIELDS, IMPORT_READERS
+from app.services.training_service import TrainingService
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+
+EXERCISES_PER_TRAINING = 5
+CATALOG_SIZE = 50
+STREAM_CHUNK_SIZE = 64 * 1024
+
+CONTENT_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def make_body(rows: int, body_format: str) -> bytes:
+    """Build an import body of `rows` training exercise rows."""
+    rng = random.Random(rows)
+    now = datetime.now(UTC)
+    trainings: list[dict[str, Any]] = [
+        {
+            "date": (now - timedelta(days=i)).isoformat(),
+            "exercises": [
+                {"exercise_id": rng.randint(1, CATALOG_SIZE), "sets": rng.randint(1, 5), "reps": rng.randint(1, 12), "weight": round(rng.uniform(10, 200), 1)}
+                for _ in range(EXERCISES_PER_TRAINING)
+            ],
+        }
+        for i in range(rows // EXERCISES_PER_TRAINING)
+    ]
+    if body_format == "json":
+        return json.dumps(trainings).encode()
+    if body_format == "ndjson":
+        return "\n".join(json.dumps(training) for training in trainings).encode()
+    out = io.StringIO()
+    out.write(",".join(CSV_FIELDS) + "\n")
+    for training in trainings:
+        for exercise in training["exercises"]:
+            out.write(f"{training['date']},{exercise['exercise_id']},{exercise['sets']},{exercise['reps']},{exercise['weight']}\n")
+    return out.getvalue().encode()
+
+
+async def stream(body: bytes) -> AsyncIterator[bytes]:
+    for start in range(0, len(body), STREAM_CHUNK_SIZE):
+        yield body[start : start + STREAM_CHUNK_SIZE]
+
+
+async def populate(session: AsyncSession) -> int:
+    """Create the exercise catalog and a user, and return the user id."""
+    muscle_group_id = (await session.execute(insert(MuscleGroup).values(name="bench").returning(MuscleGroup.id))).scalar_one()
+    await session.execute(
+        insert(Exercise),
+        [{"name": f"exercise {i}", "description": "", "muscle_group_id": muscle_group_id, "aliases": []} for i in range(CATALOG_SIZE)],
+    )
+    user_id = (await session.execute(insert(User).values(email="bench@example.com", username="bench", hashed_password="-").returning(User.id))).scalar_one()
+    await session.commit()
+    return user_id
+
+
+async def run(rows: int, body_format: str) -> None:
+    body = make_body(rows, body_format)
+    reader = IMPORT_READERS[CONTENT_TYPES[body_format]]
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with sessionmaker() as session:
+            user_id = await populate(session)
+            start = time.perf_counter()
+            result = await TrainingService(session).import_trainings(user_id, reader(stream(body)), range(1, CATALOG_SIZE + 1))
+            elapsed = time.perf_counter() - start
+        await engine.dispose()
+
+    assert not result.errors, result.errors[:5]
+    print(f"{body_format:>6}: {rows} rows in {elapsed:6.2f} s, {rows / elapsed:9.0f} rows/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--format", choices=CONTENT_TYPES, nargs="+", default=list(CONTENT_TYPES))
+    args = parser.parse_args()
+    for rows in args.rows:
+        for body_format in args.format:
+            asyncio.run(run(rows, body_format))
+
+
+if __name__ == "__main__":
+    main()
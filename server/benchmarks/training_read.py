@@ -0,0 +1,122 @@
+"""Compare the ORM and the row projection training read paths.
+
+Run from the server directory:
+
+    python -m benchmarks.training_read --rows 10000 100000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from app.models.base import Base
+from app.models.models import Exercise, MuscleGroup, Training, TrainingExercise, User
+from app.schemas.training import TrainingListParams, TrainingRead
+from app.services.training_service import TrainingService
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+
+EXERCISES_PER_TRAINING = 5
+CATALOG_SIZE = 50
+
+
+async def populate(session: AsyncSession, rows: int) -> int:
+    """Create one user with `rows` training exercise rows and return the user id."""
+    rng = random.Random(rows)
+    now = datetime.now(UTC)
+
+    muscle_group_id = (await session.execute(insert(MuscleGroup).values(name="bench").returning(MuscleGroup.id))).scalar_one()
+    await session.execute(
+        insert(Exercise),
+        [{"name": f"exercise {i}", "description": "", "muscle_group_id": muscle_group_id, "aliases": []} for i in range(CATALOG_SIZE)],
+    )
+    user_id = (await session.execute(insert(User).values(email="bench@example.com", username="bench", hashed_password="-").returning(User.id))).scalar_one()
+
+    trainings = rows // EXERCISES_PER_TRAINING
+    await session.execute(insert(Training), [{"user_id": user_id, "date": now - timedelta(days=i)} for i in range(trainings)])
+    await session.execute(
+        insert(TrainingExercise),
+        [
+            {
+                "training_id": training_id,
+                "exercise_id": rng.randint(1, CATALOG_SIZE),
+                "sets": rng.randint(1, 5),
+                "reps": rng.randint(1, 12),
+                "weight": rng.uniform(10, 200),
+            }
+            for training_id in range(1, trainings + 1)
+            for _ in range(EXERCISES_PER_TRAINING)
+        ],
+    )
+    await session.commit()
+    return user_id
+
+
+async def read_orm(session: AsyncSession, user_id: int) -> list[TrainingRead]:
+    service = TrainingService(session)
+    query = service.get_training_query().filter(Training.user_id == user_id).order_by(Training.date.desc(), Training.id.desc())
+    result = await session.execute(query)
+    return [TrainingRead.from_orm(training) for training in result.scalars()]
+
+
+async def read_rows(session: AsyncSession, user_id: int) -> list[Any]:
+    # Bypass the page size limit to read the whole history, like `read_orm` does
+    params = TrainingListParams.model_construct(cursor=None, date_from=None, date_to=None, limit=10**9)
+    trainings, _ = await TrainingService(session).get_user_trainings(user_id, params)
+    return trainings
+
+
+async def measure(
+    sessionmaker: async_sessionmaker[AsyncSession],
+    read: Callable[[AsyncSession, int], Awaitable[list[Any]]],
+    user_id: int,
+    repeat: int,
+) -> tuple[float, float]:
+    """Return the median wall and CPU time in seconds of `read` over `repeat` runs."""
+    wall, cpu = [], []
+    for _ in range(repeat):
+        async with sessionmaker() as session:
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            await read(session, user_id)
+            wall.append(time.perf_counter() - wall_start)
+            cpu.append(time.process_time() - cpu_start)
+    return statistics.median(wall), statistics.median(cpu)
+
+
+async def run(rows: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with sessionmaker() as session:
+            user_id = await populate(session, rows)
+
+        orm_wall, orm_cpu = await measure(sessionmaker, read_orm, user_id, repeat)
+        rows_wall, rows_cpu = await measure(sessionmaker, read_rows, user_id, repeat)
+        await engine.dispose()
+
+    print(f"{rows} training exercise rows")
+    print(f"  orm:  wall {orm_wall * 1000:9.1f} ms  cpu {orm_cpu * 1000:9.1f} ms")
+    print(f"  rows: wall {rows_wall * 1000:9.1f} ms  cpu {rows_cpu * 1000:9.1f} ms  ({orm_cpu / rows_cpu:.1f}x less cpu)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for rows in args.rows:
+        asyncio.run(run(rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+from datetime import date
+
+import numpy as np
+from app.services.training_analytics import TrainingColumns, TrainingSnapshot, sort_order, to_date
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def columns(rows: list[tuple[int, int, int, int, int, int, float]]) -> TrainingColumns:
+    """Build columns from `(id, user_id, exercise_id, day, sets, reps, weight)` rows."""
+    values = np.array(rows, dtype=np.float64).T
+    names = ["id", "user_id", "exercise_id", "day", "sets", "reps", "weight"]
+    return TrainingColumns({name: column.astype(np.float32 if name == "weight" else np.int32) for name, column in zip(names, values, strict=True)})
+
+
+def test_percentiles_match_numpy():
+    """Test that grouped percentiles match `np.percentile` of every group."""
+    rng = np.random.default_rng(0)
+    by = rng.integers(1, 20, 5000).astype(np.int32)
+    values = rng.uniform(0, 200, 5000).astype(np.float32)
+
+    keys, percentiles = TrainingColumns.empty().percentiles(values, by, [0, 50, 90, 100])
+    assert list(keys) == sorted(set(by))
+    for key, row in zip(keys, percentiles, strict=True):
+        np.testing.assert_allclose(row, np.percentile(values[by == key].astype(np.float64), [0, 50, 90, 100]))
+
+
+def test_sort_order_matches_lexsort():
+    """Test that packed sort keys order rows like `np.lexsort`, also when they do not fit in 64 bits."""
+    rng = np.random.default_rng(0)
+    small = [rng.integers(0, 50, 1000).astype(np.int32) for _ in range(3)]
+    large = [rng.integers(-(2**30), 2**30, 1000).astype(np.int32) for _ in range(3)]
+    for columns in (small, large):
+        expected = np.lexsort([np.arange(1000), *reversed(columns)])
+        np.testing.assert_array_equal(sort_order(*columns), expected)
+
+
+def test_rolling_volume():
+    """Test the rolling average of daily volume, with rest days counted."""
+    data = columns([(1, 1, 1, 0, 1, 10, 10.0), (2, 1, 2, 0, 1, 10, 10.0), (3, 1, 1, 2, 2, 10, 10.0), (4, 2, 1, 1, 1, 1, 500.0)])
+
+    days, volume = data.rolling_volume(1, 2)
+    assert list(days) == [0, 1, 2]
+    assert list(volume) == [200.0, 100.0, 100.0]
+    assert to_date(days[0]) == date(1970, 1, 1)
+
+    days, volume = data.rolling_volume(3, 7)
+    assert len(days) == len(volume) == 0
+
+
+def test_personal_records():
+    """Test that a row is a record only if it beats every earlier lift of the same user and exercise."""
+    data = columns(
+        [
+            (1, 1, 1, 0, 1, 5, 50.0),
+            (2, 1, 1, 1, 1, 5, 50.0),
+            (3, 1, 1, 2, 1, 5, 60.0),
+            (4, 1, 2, 2, 1, 5, 20.0),
+            (5, 2, 1, 3, 1, 5, 40.0),
+            (6, 1, 1, 3, 1, 5, 55.0),
+        ]
+    )
+    assert sorted(data.id[data.personal_records()]) == [1, 3, 4, 5]
+
+
+async def test_snapshot_refresh(as_user: AsyncClient, db_session: AsyncSession, exercise, tmp_path):
+    """Test that a snapshot follows created, updated and deleted trainings."""
+    snapshot = TrainingSnapshot(tmp_path)
+    assert snapshot.load() is None
+    assert len(await snapshot.refresh(db_session)) == 0
+
+    exercises = [{"exercise_id": exercise.id, "sets": 3, "reps": 10, "weight": 50.0}, {"exercise_id": exercise.id, "sets": 1, "reps": 1, "weight": 80.0}]
+    first = (await as_user.post("/api/v1/trainings/", json={"date": "2024-03-05T10:00:00", "exercises": exercises})).json()
+    second = (await as_user.post("/api/v1/trainings/", json={"date": "2024-03-07T10:00:00", "exercises": exercises[:1]})).json()
+
+    data = await snapshot.refresh(db_session)
+    assert list(data.weight) == [50.0, 80.0, 50.0]
+    assert [to_date(day) for day in data.day] == [date(2024, 3, 5), date(2024, 3, 5), date(2024, 3, 7)]
+
+    await as_user.patch(f"/api/v1/trainings/{first['id']}", json={"date": "2024-03-06T10:00:00"})
+    await as_user.patch(f"/api/v1/trainings/{second['id']}", json={"exercises": [{**exercises[0], "weight": 55.0}]})
+    data = await snapshot.refresh(db_session)
+    assert list(data.weight) == [50.0, 80.0, 55.0]
+    assert [to_date(day) for day in data.day] == [date(2024, 3, 6), date(2024, 3, 6), date(2024, 3, 7)]
+
+    await as_user.delete(f"/api/v1/trainings/{first['id']}")
+    data = await snapshot.refresh(db_session)
+    assert list(data.weight) == [55.0]
+
+    # The snapshot is readable from disk without the database
+    loaded = snapshot.load()
+    assert loaded is not None
+    assert list(loaded.id) == list(data.id)
+    assert len(list(tmp_path.glob("gen-*"))) == 1
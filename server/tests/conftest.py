@@ -1,15 +1,16 @@
 import asyncio
 from collections.abc import AsyncGenerator, Generator
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 
 import pytest
 from app.core.security import create_access_token, get_password_hash
-from app.db.session import get_db
+from app.db.session import create_engine, get_db, get_read_db, instrument_engine
 from app.main import app
 from app.models.base import Base
-from app.models.models import Exercise, MuscleGroup, User
+from app.models.models import Exercise, MuscleGroup, Training, TrainingExercise, User
 from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 
@@ -18,7 +19,11 @@ TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
 
 # Create test engine
 test_engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+instrument_engine(test_engine)
 TestingSessionLocal = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+# Reader connections as in production: autocommit and query_only, so API tests read only what has been committed
+test_read_engine = create_engine(TEST_DATABASE_URL, writer=False)
+TestingReadSessionLocal = async_sessionmaker(test_read_engine, class_=AsyncSession, expire_on_commit=False)
 
 
 @pytest.fixture(scope="session")
@@ -47,10 +52,30 @@ async def test_app() -> FastAPI:
                 await session.rollback()
                 await session.close()
 
+    async def override_get_read_db():
+        async with TestingReadSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
     return app
 
 
+@pytest.fixture
+def statements() -> Generator[list[str]]:
+    """Collect the SQL statements executed while the test runs."""
+    executed: list[str] = []
+
+    def receive_before_cursor_execute(_conn, _cursor, statement, _parameters, _context, _executemany):
+        executed.append(statement)
+
+    for engine in (test_engine, test_read_engine):
+        event.listen(engine.sync_engine, "before_cursor_execute", receive_before_cursor_execute)
+    yield executed
+    for engine in (test_engine, test_read_engine):
+        event.remove(engine.sync_engine, "before_cursor_execute", receive_before_cursor_execute)
+
+
 @pytest.fixture
 async def db_session() -> AsyncGenerator[AsyncSession]:
     """Create a fresh database session for each test."""
@@ -101,6 +126,36 @@ async def exercise(db_session: AsyncSession, muscle_group: MuscleGroup) -> Exerc
     return exercise
 
 
+@pytest.fixture
+async def training(db_session: AsyncSession, user, exercise) -> Training:
+    """Create a test training."""
+    training = Training(
+        user_id=user.id,
+        date=datetime.now(UTC),
+    )
+    db_session.add(training)
+    await db_session.flush()
+
+    training_exercise = TrainingExercise(training_id=training.id, exercise_id=exercise.id, sets=3, reps=10, weight=50.0)
+    db_session.add(training_exercise)
+    await db_session.commit()
+    await db_session.refresh(training)
+    return training
+
+
+@pytest.fixture
+async def trainings(db_session: AsyncSession, user, exercise) -> list[Training]:
+    """Create three test trainings on consecutive days, newest first."""
+    now = datetime.now(UTC)
+    trainings = [Training(user_id=user.id, date=now - timedelta(days=days)) for days in range(3)]
+    db_session.add_all(trainings)
+    await db_session.flush()
+
+    db_session.add_all(TrainingExercise(training_id=training.id, exercise_id=exercise.id, sets=3, reps=10, weight=50.0) for training in trainings)
+    await db_session.commit()
+    return trainings
+
+
 @pytest.fixture
 async def user(db_session: AsyncSession) -> User:
     """Create a test user."""
@@ -0,0 +1,71 @@
+import asyncio
+
+from app.models.models import Exercise, MuscleGroup
+from app.services.exercise_catalog import ExerciseCatalog, exercise_catalog
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def test_catalog_is_reused_while_unchanged(db_session: AsyncSession, exercise: Exercise) -> None:
+    """Test that the catalog is loaded once and reused until the catalog tables change."""
+    catalog = await exercise_catalog.get(db_session)
+    assert await exercise_catalog.get(db_session) is catalog
+    assert catalog.by_id[exercise.id].name == exercise.name
+
+
+async def test_catalog_is_loaded_once_by_concurrent_requests(db_session: AsyncSession, exercise: Exercise) -> None:
+    """Test that requests waiting for the catalog while it reloads reuse the new catalog instead of loading it again."""
+    exercise_catalog.invalidate()
+
+    async def get() -> ExerciseCatalog:
+        async with AsyncSession(db_session.bind) as session:
+            return await exercise_catalog.get(session)
+
+    first, *others = await asyncio.gather(*(get() for _ in range(3)))
+    assert all(catalog is first for catalog in others)
+
+
+async def test_catalog_is_invalidated_by_orm_write(db_session: AsyncSession, exercise: Exercise) -> None:
+    """Test that committing a changed exercise reloads the catalog."""
+    catalog = await exercise_catalog.get(db_session)
+    exercise.name = "Renamed Exercise"
+    await db_session.commit()
+
+    reloaded = await exercise_catalog.get(db_session)
+    assert reloaded is not catalog
+    assert reloaded.by_id[exercise.id].name == "Renamed Exercise"
+
+
+async def test_catalog_is_invalidated_by_statement(db_session: AsyncSession, muscle_group: MuscleGroup, exercise: Exercise) -> None:
+    """Test that an UPDATE statement on a catalog table reloads the catalog."""
+    catalog = await exercise_catalog.get(db_session)
+    await db_session.execute(update(MuscleGroup).where(MuscleGroup.id == muscle_group.id).values(name="Renamed Group"))
+    await db_session.commit()
+
+    reloaded = await exercise_catalog.get(db_session)
+    assert reloaded is not catalog
+    assert reloaded.by_id[exercise.id].muscle_group.name == "Renamed Group"
+
+
+async def test_catalog_ignores_rolled_back_write(db_session: AsyncSession, exercise: Exercise) -> None:
+    """Test that a rolled back write keeps the current catalog."""
+    catalog = await exercise_catalog.get(db_session)
+    exercise.name = "Discarded Name"
+    await db_session.flush()
+    await db_session.rollback()
+
+    assert await exercise_catalog.get(db_session) is catalog
+
+
+async def test_get_exercise_detail_after_update(as_user: AsyncClient, db_session: AsyncSession, exercise: Exercise) -> None:
+    """Test that the exercise endpoint serves the updated exercise after a write."""
+    response = await as_user.get(f"/api/v1/exercises/{exercise.id}")
+    assert response.json()["name"] == exercise.name
+
+    exercise.description = "Updated description"
+    await db_session.commit()
+
+    response = await as_user.get(f"/api/v1/exercises/{exercise.id}")
+    assert response.status_code == 200
+    assert response.json()["description"] == "Updated description"
@@ -1,7 +1,10 @@
 from collections.abc import Callable
 
 import pytest
+from app.core import compression
+from app.core.config import settings
 from app.models.models import Exercise, MuscleGroup
+from app.services import exercise_catalog as catalog_module
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -97,3 +100,66 @@ async def test_filter_exercises_unauthorized(
     response = await as_anon.get("/api/v1/exercises/?muscle_group=test")
     assert response.status_code == 401
     assert response.json()["detail"] == "Not authenticated"
+
+
+@pytest.mark.parametrize("search", ["жим", "ЖИМ", "Жим"])
+async def test_search_exercises_ranked(
+    as_user: AsyncClient,
+    db_session: AsyncSession,
+    muscle_group: MuscleGroup,
+    search: str,
+) -> None:
+    """Test that a case-folded Cyrillic search ranks exact, prefix and alias matches."""
+    db_session.add_all(
+        [
+            Exercise(name="Армейский жим", description="", muscle_group=muscle_group, aliases=[]),
+            Exercise(name="Жим лежа", description="", muscle_group=muscle_group, aliases=[]),
+            Exercise(name="Отжимания", description="", muscle_group=muscle_group, aliases=["Жим от пола"]),
+            Exercise(name="Жим", description="", muscle_group=muscle_group, aliases=[]),
+            Exercise(name="Тяга", description="", muscle_group=muscle_group, aliases=[]),
+        ]
+    )
+    await db_session.commit()
+
+    response = await as_user.get("/api/v1/exercises/", params={"search": search})
+
+    assert response.status_code == 200
+    assert [e["name"] for e in response.json()] == ["Жим", "Жим лежа", "Отжимания", "Армейский жим"]
+
+
+async def test_list_exercises_not_modified(as_user: AsyncClient, db_session: AsyncSession, exercise: Exercise) -> None:
+    """Test that the catalog is revalidated with its ETag, which changes with the catalog."""
+    response = await as_user.get("/api/v1/exercises/")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, max-age=300"
+    etag = response.headers["ETag"]
+
+    for url in ("/api/v1/exercises/", f"/api/v1/exercises/{exercise.id}", "/api/v1/exercises/?search=test"):
+        response = await as_user.get(url, headers={"If-None-Match": f'"other", {etag}'})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+    exercise.description = "Changed"
+    await db_session.commit()
+    response = await as_user.get("/api/v1/exercises/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+async def test_list_exercises_precompressed(as_user: AsyncClient, exercise: Exercise, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the catalog is compressed once per encoding and catalog version, not per request."""
+    monkeypatch.setattr(settings, "COMPRESSION_MINIMUM_SIZE", 10)
+    calls: list[str] = []
+
+    def compress(data: bytes, encoding: str, level: int) -> bytes:
+        calls.append(encoding)
+        return compression.compress(data, encoding, level)
+
+    monkeypatch.setattr(catalog_module, "compress", compress)
+    plain = await as_user.get("/api/v1/exercises/", headers={"Accept-Encoding": "identity"})
+    for _ in range(2):
+        response = await as_user.get("/api/v1/exercises/", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["ETag"] == f"W/{plain.headers['ETag']}"
+        assert response.content == plain.content
+    assert calls == ["gzip"]
@@ -0,0 +1,51 @@
+import pytest
+from app.models.models import Exercise, MuscleGroup
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@pytest.fixture
+async def exercises(db_session: AsyncSession, muscle_group: MuscleGroup) -> list[Exercise]:
+    exercises = [
+        Exercise(name="Жим лежа", description="", muscle_group=muscle_group, aliases=["Barbell Bench Press"]),
+        Exercise(name="Армейский жим", description="", muscle_group=muscle_group, aliases=["Overhead Press"]),
+        Exercise(name="Становая тяга", description="", muscle_group=muscle_group, aliases=["Conventional Deadlift"]),
+    ]
+    db_session.add_all(exercises)
+    await db_session.commit()
+    return exercises
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("жим", [("Жим лежа", None), ("Армейский жим", None)]),
+        ("Жмм", [("Жим лежа", None), ("Армейский жим", None)]),
+        ("bench", [("Жим лежа", "Barbell Bench Press")]),
+        ("dedlift", [("Становая тяга", "Conventional Deadlift")]),
+        ("press", [("Армейский жим", "Overhead Press"), ("Жим лежа", "Barbell Bench Press")]),
+        ("squat", []),
+    ],
+)
+async def test_suggest_exercises(as_user: AsyncClient, exercises: list[Exercise], query: str, expected: list[tuple[str, str | None]]) -> None:
+    """Test suggesting exercises by name and alias prefixes, with typos."""
+    response = await as_user.get("/api/v1/exercises/suggest", params={"q": query})
+
+    assert response.status_code == 200
+    assert [(s["name"], s["matched_alias"]) for s in response.json()] == expected
+
+
+async def test_suggest_exercises_limit(as_user: AsyncClient, exercises: list[Exercise]) -> None:
+    """Test limiting the number of suggestions."""
+    response = await as_user.get("/api/v1/exercises/suggest", params={"q": "жим", "limit": 1})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data == [{"id": exercises[0].id, "name": "Жим лежа", "matched_alias": None}]
+
+
+async def test_suggest_exercises_unauthorized(as_anon: AsyncClient) -> None:
+    """Test suggesting exercises without authentication."""
+    response = await as_anon.get("/api/v1/exercises/suggest", params={"q": "жим"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Not authenticated"
@@ -0,0 +1,140 @@
+import bz2
+import csv
+import gzip
+import io
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from app.core.config import settings
+from app.db import seed_exercises as seed_module
+from app.db.seed_exercises import ExerciseData, read_catalog, read_json, seed_exercises
+from app.models.models import Exercise, MuscleGroup
+from app.services.exercise_catalog import exercise_catalog
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+EXERCISES: list[ExerciseData] = [
+    {"name": "Жим лежа", "description": "Грудь", "muscle_group": "грудь", "aliases": ["Bench Press", "Жим лежа"]},
+    {"name": "Становая тяга", "description": "Спина", "muscle_group": "спина", "aliases": []},
+]
+
+
+def write_catalog(path: Path, exercises: list[ExerciseData]) -> Path:
+    """Write a catalog file in the format given by the suffixes of its path."""
+    suffixes = path.suffixes
+    opener: Any = {".gz": gzip.open, ".bz2": bz2.open}.get(suffixes[-1], open)
+    with opener(path, "wt", encoding="utf-8", newline="") as file:
+        if ".csv" in suffixes:
+            writer = csv.DictWriter(file, ["name", "description", "muscle_group", "aliases"])
+            writer.writeheader()
+            writer.writerows({**exercise, "aliases": "|".join(exercise["aliases"])} for exercise in exercises)
+        elif ".ndjson" in suffixes:
+            file.writelines(json.dumps(exercise, ensure_ascii=False) + "\n" for exercise in exercises)
+        else:
+            json.dump(exercises, file, ensure_ascii=False, indent=2)
+    return path
+
+
+async def test_seed_default_catalog(db_session: AsyncSession, statements: list[str]) -> None:
+    """Test that the shipped catalog is seeded once and that an unchanged file is skipped with one query."""
+    result = await seed_exercises(db_session)
+    assert result is not None
+    assert result.inserted > 0
+    assert result.inserted == await db_session.scalar(select(func.count()).select_from(Exercise))
+
+    statements.clear()
+    assert await seed_exercises(db_session) is None
+    assert len(statements) == 1
+
+
+@pytest.mark.parametrize("name", ["catalog.json", "catalog.ndjson.gz", "catalog.csv.bz2"])
+async def test_seed_formats(db_session: AsyncSession, tmp_path: Path, name: str) -> None:
+    """Test that every supported format, compressed or not, seeds the same exercises."""
+    result = await seed_exercises(db_session, write_catalog(tmp_path / name, EXERCISES))
+    assert result is not None
+    assert result.inserted == len(EXERCISES)
+
+    catalog = await exercise_catalog.get(db_session)
+    assert [(e.name, e.description, e.muscle_group.name, e.aliases) for e in catalog.exercises] == [
+        (e["name"], e["description"], e["muscle_group"], e["aliases"]) for e in EXERCISES
+    ]
+
+
+async def test_seed_syncs_differences(db_session: AsyncSession, tmp_path: Path, exercise: Exercise) -> None:
+    """Test that seeding inserts new exercises, updates changed ones in place and leaves the rest alone."""
+    exercise_id, exercise_name = exercise.id, exercise.name
+    await seed_exercises(db_session, write_catalog(tmp_path / "v1.json", EXERCISES))
+    untouched = await db_session.scalar(select(Exercise).where(Exercise.name == EXERCISES[1]["name"]))
+    assert untouched is not None
+    untouched_updated_at = untouched.updated_at
+
+    changed: list[ExerciseData] = [
+        {**EXERCISES[0], "aliases": ["Bench Press"]},
+        EXERCISES[1],
+        {"name": exercise_name, "description": "Updated", "muscle_group": "Новая группа", "aliases": ["updated alias"]},
+        {"name": "Подтягивания", "description": "Спина", "muscle_group": "спина", "aliases": ["Pull-up"]},
+    ]
+    result = await seed_exercises(db_session, write_catalog(tmp_path / "v2.json", changed))
+    assert result is not None
+    assert (result.inserted, result.updated, result.unchanged) == (1, 2, 1)
+
+    catalog = await exercise_catalog.get(db_session)
+    detail = catalog.by_id[exercise_id]
+    assert (detail.description, detail.muscle_group.name, detail.aliases) == ("Updated", "Новая группа", ["updated alias"])
+    await db_session.refresh(untouched)
+    assert untouched.updated_at == untouched_updated_at
+    assert await db_session.scalar(select(func.count()).select_from(Exercise)) == 4
+    assert await db_session.scalar(select(func.count()).select_from(MuscleGroup)) == 4
+
+
+async def test_seed_invalid_entry(db_session: AsyncSession, tmp_path: Path) -> None:
+    """Test that an invalid entry is reported by its position and that nothing is written."""
+    exercises = [*EXERCISES, {"name": "Без группы", "description": "", "aliases": []}]
+    path = tmp_path / "catalog.ndjson"
+    path.write_text("".join(json.dumps(exercise) + "\n" for exercise in exercises))
+
+    with pytest.raises(ValueError, match=r"entry 3: muscle_group: Field required"):
+        list(read_catalog(path, chunk_size=2))
+    with pytest.raises(ValueError, match="entry 3"):
+        await seed_exercises(db_session, path)
+    await db_session.rollback()
+    assert await db_session.scalar(select(func.count()).select_from(Exercise)) == 0
+
+
+async def test_seed_unsupported_format(db_session: AsyncSession, tmp_path: Path) -> None:
+    path = tmp_path / "catalog.xml"
+    path.write_text("<exercises/>")
+    with pytest.raises(ValueError, match="expected a .json, .ndjson, .jsonl, .csv file"):
+        await seed_exercises(db_session, path)
+
+
+def test_read_json_in_small_buffers(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that JSON array items split across reads are decoded whole."""
+    monkeypatch.setattr(seed_module, "READ_SIZE", 3)
+    items = [*EXERCISES, 12345, "a, b]", [], {}]
+    for indent in (None, 2):
+        assert list(read_json(io.StringIO(json.dumps(items, indent=indent)))) == items
+    assert list(read_json(io.StringIO(" [ ] "))) == []
+    with pytest.raises(ValueError, match="Expected ',' or ']'"):
+        list(read_json(io.StringIO("[1 2]")))
+    with pytest.raises(ValueError, match="Unexpected end"):
+        list(read_json(io.StringIO("[1,")))
+
+
+async def test_seed_large_catalog(db_session: AsyncSession, tmp_path: Path, statements: list[str]) -> None:
+    """Test that a catalog of 10k exercises is synced in chunks, and that syncing it again costs one query."""
+    exercises: list[ExerciseData] = [
+        {"name": f"Exercise {i}", "description": f"Description {i}", "muscle_group": f"Group {i % 20}", "aliases": [f"Alias {i}"]} for i in range(10_000)
+    ]
+    path = write_catalog(tmp_path / "catalog.json.gz", exercises)
+    result = await seed_exercises(db_session, path)
+    assert result is not None
+    assert result.inserted == len(exercises)
+    assert len(statements) < len(exercises) // settings.CATALOG_CHUNK_SIZE * 10
+
+    statements.clear()
+    assert await seed_exercises(db_session, path) is None
+    assert len(statements) == 1
@@ -0,0 +1,78 @@
+from httpx import AsyncClient
+
+
+def training(date: str, exercise_id: int, sets: int, reps: int, weight: float) -> dict:
+    return {"date": date, "exercises": [{"exercise_id": exercise_id, "sets": sets, "reps": reps, "weight": weight}]}
+
+
+async def test_stats_follow_training_writes(as_user: AsyncClient, exercise, muscle_group):
+    """Test that weekly stats are updated on create, update and delete."""
+    first = (await as_user.post("/api/v1/trainings/", json=training("2024-03-05T10:00:00", exercise.id, 3, 10, 50.0))).json()
+    await as_user.post("/api/v1/trainings/", json=training("2024-03-07T10:00:00", exercise.id, 1, 1, 100.0))
+    await as_user.post("/api/v1/trainings/", json=training("2024-03-12T10:00:00", exercise.id, 2, 5, 60.0))
+
+    response = await as_user.get("/api/v1/users/me/stats")
+    assert response.status_code == 200
+    assert response.json() == {
+        "weeks": [
+            {
+                "week": "2024-03-04",
+                "sets": 4,
+                "reps": 31,
+                "volume": 1600.0,
+                "muscle_groups": [{"muscle_group": muscle_group.name, "sets": 4, "reps": 31, "volume": 1600.0}],
+            },
+            {
+                "week": "2024-03-11",
+                "sets": 2,
+                "reps": 10,
+                "volume": 600.0,
+                "muscle_groups": [{"muscle_group": muscle_group.name, "sets": 2, "reps": 10, "volume": 600.0}],
+            },
+        ]
+    }
+
+    # Moving a training to another week updates both weeks
+    await as_user.patch(f"/api/v1/trainings/{first['id']}", json={"date": "2024-03-13T10:00:00"})
+    response = await as_user.get(f"/api/v1/exercises/{exercise.id}/progress")
+    assert response.status_code == 200
+    weeks = response.json()["weeks"]
+    assert [(week["week"], week["trainings"], week["volume"], week["max_weight"]) for week in weeks] == [
+        ("2024-03-04", 1, 100.0, 100.0),
+        ("2024-03-11", 2, 2100.0, 60.0),
+    ]
+    assert weeks[1]["estimated_1rm"] == 70.0
+
+    await as_user.delete(f"/api/v1/trainings/{first['id']}")
+    response = await as_user.get(f"/api/v1/exercises/{exercise.id}/progress")
+    assert [(week["week"], week["volume"]) for week in response.json()["weeks"]] == [("2024-03-04", 100.0), ("2024-03-11", 600.0)]
+
+
+async def test_stats_after_import(as_user: AsyncClient, exercise):
+    """Test that imported trainings are counted in the stats."""
+    trainings = [training(f"2024-03-0{day}T10:00:00", exercise.id, 1, 10, 10.0) for day in range(4, 8)]
+    await as_user.post("/api/v1/trainings/import", json=trainings)
+
+    response = await as_user.get(f"/api/v1/exercises/{exercise.id}/progress")
+    assert [(week["week"], week["trainings"], week["volume"]) for week in response.json()["weeks"]] == [("2024-03-04", 4, 400.0)]
+
+
+async def test_stats_date_window(as_user: AsyncClient, exercise):
+    """Test limiting the stats to the weeks overlapping a date window."""
+    for date in ("2024-02-27T10:00:00", "2024-03-05T10:00:00", "2024-03-12T10:00:00"):
+        await as_user.post("/api/v1/trainings/", json=training(date, exercise.id, 1, 1, 10.0))
+
+    response = await as_user.get("/api/v1/users/me/stats", params={"from": "2024-03-07", "to": "2024-03-11"})
+    assert [week["week"] for week in response.json()["weeks"]] == ["2024-03-04"]
+
+
+async def test_exercise_progress_not_found(as_user: AsyncClient):
+    """Test the progress of a non-existent exercise."""
+    response = await as_user.get("/api/v1/exercises/999999/progress")
+    assert response.status_code == 404
+
+
+async def test_stats_unauthorized(as_anon: AsyncClient):
+    """Test reading stats without authentication."""
+    response = await as_anon.get("/api/v1/users/me/stats")
+    assert response.status_code == 401
@@ -1,6 +1,13 @@
+import re
+import time
+
 import pytest
+from app.core.security import password_hasher
 from app.models import User
+from app.schemas.token import Principal
+from app.services.token_cache import TokenCache
 from httpx import AsyncClient
+from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -47,6 +54,24 @@ async def test_login_success(as_anon: AsyncClient, db_session: AsyncSession, use
     assert data["token_type"] == "bearer"
 
 
+async def test_login_records_hash_metrics(as_anon: AsyncClient, db_session: AsyncSession, user: User) -> None:
+    """Test that password checks run in the hasher pool and are timed."""
+    count = password_hasher.hash_time.count
+    response = await as_anon.post("/api/v1/users/login", json={"username": user.username, "password": "testpassword123"})
+    assert response.status_code == 200
+    assert password_hasher.hash_time.count == count + 1
+    assert password_hasher.queue_wait.count == count + 1
+    assert password_hasher.pending == 0
+
+
+async def test_login_hasher_full(as_anon: AsyncClient, db_session: AsyncSession, user: User, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that logins are rejected with a 503 while the password check queue is full."""
+    monkeypatch.setattr(password_hasher, "pending", password_hasher.limit)
+    response = await as_anon.post("/api/v1/users/login", json={"username": user.username, "password": "testpassword123"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
 async def test_login_wrong_password(as_anon: AsyncClient, db_session: AsyncSession, user: User) -> None:
     """Test login with wrong password through the API."""
     response = await as_anon.post(
@@ -98,3 +123,44 @@ async def test_get_current_user_invalid_token(as_anon: AsyncClient) -> None:
     )
     assert response.status_code == 401
     assert response.json()["detail"] == "Could not validate credentials"
+
+
+async def test_verified_token_cached(as_user: AsyncClient, user: User, statements: list[str]) -> None:
+    """Test that a token verified once is not checked against the user table again."""
+    response = await as_user.get("/api/v1/trainings/")
+    assert response.status_code == 200
+    assert [statement for statement in statements if re.search(r"FROM user\b", statement)]
+    statements.clear()
+
+    response = await as_user.get("/api/v1/trainings/")
+    assert response.status_code == 200
+    assert not [statement for statement in statements if re.search(r"FROM user\b", statement)]
+
+
+async def test_verified_token_invalidated_on_user_delete(as_user: AsyncClient, db_session: AsyncSession, user: User) -> None:
+    """Test that the cached token of a deleted user is rejected."""
+    assert (await as_user.get("/api/v1/trainings/")).status_code == 200
+
+    await db_session.execute(delete(User).where(User.id == user.id))
+    await db_session.commit()
+
+    response = await as_user.get("/api/v1/trainings/")
+    assert response.status_code == 401
+
+
+def test_token_cache_bounds() -> None:
+    """Test that token cache entries expire with the token and that the least recently used are evicted."""
+    cache = TokenCache(size=2, ttl=60)
+    cache.put("expired", Principal(user_id=1), time.time() - 1)
+    assert cache.get("expired") is None
+
+    cache.put("a", Principal(user_id=1), time.time() + 3600)
+    cache.put("b", Principal(user_id=2), time.time() + 3600)
+    assert cache.get("a") == Principal(user_id=1)
+    cache.put("c", Principal(user_id=3), time.time() + 3600)
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    cache.invalidate_users({1})
+    assert cache.get("a") is None
+    assert cache.get("c") == Principal(user_id=3)
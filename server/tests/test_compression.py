@@ -0,0 +1,58 @@
+import pytest
+from app.core.compression import ENCODINGS, negotiate_encoding
+from app.core.config import settings
+from httpx import AsyncClient
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        (None, None),
+        ("identity", None),
+        ("GZIP", "gzip"),
+        ("gzip, br, zstd", "zstd"),
+        ("gzip;q=1, br;q=0.5", "gzip"),
+        ("*", "zstd"),
+        ("zstd;q=0, *;q=0.5", "br"),
+        ("gzip;q=0", None),
+        ("gzip;q=oops, br", "br"),
+    ],
+)
+def test_negotiate_encoding(accept_encoding: str | None, expected: str | None):
+    """Test that the client weights win and that ties go to the encoding the server prefers."""
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+async def test_compressed_response(as_user: AsyncClient, trainings, monkeypatch: pytest.MonkeyPatch, encoding: str):
+    """Test that a response is compressed in the accepted encoding and stays valid for conditional requests."""
+    monkeypatch.setattr(settings, "COMPRESSION_MINIMUM_SIZE", 100)
+    plain = await as_user.get("/api/v1/trainings/", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+
+    response = await as_user.get("/api/v1/trainings/", headers={"Accept-Encoding": encoding})
+    assert response.headers["Content-Encoding"] == encoding
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"] == f"W/{plain.headers['ETag']}"
+    assert response.json() == plain.json()
+
+    response = await as_user.get("/api/v1/trainings/", headers={"Accept-Encoding": encoding, "If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
+
+async def test_small_response_not_compressed(as_user: AsyncClient, training):
+    """Test that a body under the minimum size is sent as it is."""
+    response = await as_user.get("/api/v1/trainings/", headers={"Accept-Encoding": "gzip"})
+    assert len(response.content) < settings.COMPRESSION_MINIMUM_SIZE
+    assert "Content-Encoding" not in response.headers
+
+
+async def test_streamed_response_compressed(as_user: AsyncClient, trainings, monkeypatch: pytest.MonkeyPatch):
+    """Test that a streamed export is compressed chunk by chunk, whatever its size."""
+    monkeypatch.setattr(settings, "COMPRESSION_MINIMUM_SIZE", 10**9)
+    plain = await as_user.get("/api/v1/trainings/export", headers={"Accept-Encoding": "identity"})
+
+    response = await as_user.get("/api/v1/trainings/export", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert response.text == plain.text
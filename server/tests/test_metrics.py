@@ -0,0 +1,71 @@
+import logging
+import re
+
+import pytest
+from app.core.config import settings
+from app.core.metrics import parameter_shape
+from app.models.models import User
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+SERVER_TIMING = re.compile(r'app;dur=[\d.]+, db;dur=[\d.]+;desc="(\d+) queries, (\d+) rows", serialize;dur=[\d.]+')
+
+
+async def test_server_timing(as_user: AsyncClient, user: User, statements: list[str]):
+    """Test that a response tells the number of queries that it took and the rows that they fetched."""
+    response = await as_user.get("/api/v1/users/me")
+    assert response.status_code == 200
+    match = SERVER_TIMING.fullmatch(response.headers["Server-Timing"])
+    assert match is not None
+    assert int(match[1]) == len(statements)
+    assert int(match[2]) >= 1
+
+
+async def test_metrics(as_user: AsyncClient, user: User):
+    """Test that requests are counted by route in the Prometheus histograms."""
+
+    def count(text: str) -> int:
+        match = re.search(r'^http_request_duration_seconds_count\{route="read_users_me",method="GET",status="200"\} (\d+)$', text, re.MULTILINE)
+        return int(match[1]) if match else 0
+
+    before = count((await as_user.get("/metrics")).text)
+    await as_user.get("/api/v1/users/me")
+    response = await as_user.get("/metrics")
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert count(response.text) == before + 1
+    assert "# TYPE http_request_db_queries histogram" in response.text
+    assert 'http_request_db_rows_bucket{route="read_users_me",method="GET",le="+Inf"}' in response.text
+
+
+async def test_password_hash_metrics(client: AsyncClient, user: User):
+    """Test that the bcrypt thread pool is measured in the Prometheus metrics."""
+
+    def count(text: str) -> int:
+        match = re.search(r"^password_hash_duration_seconds_count (\d+)$", text, re.MULTILINE)
+        return int(match[1]) if match else 0
+
+    before = count((await client.get("/metrics")).text)
+    await client.post("/api/v1/users/login", json={"username": user.username, "password": "testpassword123"})
+    response = await client.get("/metrics")
+    assert count(response.text) == before + 1
+    assert "# TYPE password_hash_queue_wait_seconds summary" in response.text
+    assert re.search(r"^password_hash_rejected_total \d+$", response.text, re.MULTILINE)
+
+
+async def test_slow_query_log(db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture):
+    """Test that slow queries are logged with the types of their parameters, not their values."""
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD", 0)
+    with caplog.at_level(logging.WARNING, logger="app.core.metrics"):
+        await db_session.execute(select(User).where(User.email == "secret@example.com"))
+    assert "Slow query" in caplog.text
+    assert "FROM user" in caplog.text
+    assert "parameters: (str)" in caplog.text
+    assert "secret@example.com" not in caplog.text
+
+
+def test_parameter_shape():
+    assert parameter_shape({"name": "a", "id": 1}, executemany=False) == "{name: str, id: int}"
+    assert parameter_shape([(1, "a"), (2, "b")], executemany=True) == "2 x (int, str)"
+    assert parameter_shape((), executemany=False) == "()"
@@ -4,7 +4,9 @@ import pytest
 from app.core.security import get_password_hash
 from app.models import Exercise, MuscleGroup, Training, TrainingExercise, User
 from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateIndex, CreateTable
 
 
 async def test_create_user(db_session: AsyncSession) -> None:
@@ -172,3 +174,12 @@ async def test_create_training_with_exercises(db_session: AsyncSession) -> None:
     exercise_trainings = result.scalars().all()
     assert len(exercise_trainings) == 1
     assert exercise_trainings[0].training_id == training.id
+
+
+def test_postgresql_schema() -> None:
+    """Test that exercise aliases are JSONB with a GIN index on PostgreSQL."""
+    dialect = postgresql.dialect()  # type: ignore[no-untyped-call]
+    table = Exercise.__table__
+    assert "aliases JSONB NOT NULL" in str(CreateTable(table).compile(dialect=dialect))
+    (index,) = [index for index in table.indexes if index.name == "ix_exercise_aliases"]
+    assert "USING gin (aliases)" in str(CreateIndex(index).compile(dialect=dialect))
@@ -0,0 +1,77 @@
+import asyncio
+import time
+from collections.abc import Generator
+
+import orjson
+import pytest
+from app.core.config import settings
+from app.core.profiling import profiler
+from app.models.models import User
+from app.services import user as user_service
+from httpx import AsyncClient
+
+
+def busy_wait(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+@pytest.fixture
+def profiling(monkeypatch: pytest.MonkeyPatch, user: User) -> Generator[None]:
+    """Enable profiling with the test user as an admin, and slow down reading the current user."""
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "ADMIN_USER_IDS", {user.id})
+    get_user = user_service.get_user
+
+    async def slow_get_user(*args, **kwargs):
+        await asyncio.sleep(0.05)
+        busy_wait(0.05)
+        return await get_user(*args, **kwargs)
+
+    monkeypatch.setattr(user_service, "get_user", slow_get_user)
+    profiler.reset()
+    profiler.start()
+    yield
+    profiler.stop()
+    profiler.reset()
+
+
+@pytest.mark.usefixtures("profiling")
+async def test_profile_request(as_user: AsyncClient):
+    """Test that an admin gets the profile of a request instead of its response, through the await chain."""
+    response = await as_user.get("/api/v1/users/me", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert response.headers["X-Profile-Status"] == "200"
+    stacks = {line.rsplit(" ", 1)[0] for line in response.text.splitlines()}
+    assert any(stack.endswith("slow_get_user;asyncio.tasks:sleep;[await]") for stack in stacks)
+    assert any(stack.endswith(f"slow_get_user;{__name__}:busy_wait") for stack in stacks)
+    assert all("app.api.deps:get_current_user" in stack for stack in stacks if "slow_get_user" in stack)
+
+    response = await as_user.get("/api/v1/users/me", headers={"X-Profile": "speedscope"})
+    profile = orjson.loads(response.content)
+    frames = [frame["name"] for frame in profile["shared"]["frames"]]
+    sampled = profile["profiles"][0]
+    assert sampled["type"] == "sampled"
+    stacks = {";".join(frames[i] for i in sample) for sample in sampled["samples"]}
+    assert any(stack.endswith("slow_get_user;asyncio.tasks:sleep;[await]") for stack in stacks)
+    assert any(stack.endswith(f"slow_get_user;{__name__}:busy_wait") for stack in stacks)
+    assert len(sampled["weights"]) == len(sampled["samples"])
+    assert all(weight > 0 for weight in sampled["weights"])
+
+
+@pytest.mark.usefixtures("profiling")
+async def test_profile_by_route(as_user: AsyncClient, monkeypatch: pytest.MonkeyPatch):
+    """Test that requests are sampled into the profile of their route, which only admins may read."""
+    response = await as_user.get("/api/v1/users/me")
+    assert response.json()["username"]
+
+    response = await as_user.get("/api/v1/admin/profile", params={"route": "read_users_me"})
+    assert response.status_code == 200
+    assert "slow_get_user" in response.text
+
+    monkeypatch.setattr(settings, "ADMIN_USER_IDS", set())
+    response = await as_user.get("/api/v1/admin/profile")
+    assert response.status_code == 403
+    response = await as_user.get("/api/v1/users/me", headers={"X-Profile": "1"})
+    assert response.json()["username"]
@@ -0,0 +1,104 @@
+import asyncio
+import socket
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.core.config import Settings
+from app.core.workers import WorkerChannel, file_lock, worker_channel
+from app.models.models import User
+from app.schemas.token import Principal
+from app.services.exercise_catalog import CATALOG_TOPIC, exercise_catalog
+from app.services.token_cache import USERS_TOPIC, token_cache
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@contextmanager
+def other_worker(directory: Path) -> Iterator[WorkerChannel]:
+    """Start the channel of this worker, and return the channel of another worker in the same directory.
+
+    Started in the test rather than in a fixture, to receive on the event loop of the test.
+    """
+    worker_channel.start(directory, "this")
+    other = WorkerChannel()
+    other.start(directory, "other")
+    try:
+        yield other
+    finally:
+        other.stop()
+        worker_channel.stop()
+
+
+async def test_worker_channel(tmp_path: Path):
+    """Test that a message reaches the other workers but not its sender, and that stale sockets are removed."""
+    received: dict[str, list] = {"a": [], "b": []}
+    channels = {}
+    for name, messages in received.items():
+        channels[name] = WorkerChannel()
+        channels[name].subscribe("topic", messages.append)
+        channels[name].start(tmp_path, name)
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    stale.bind(str(tmp_path / "stale.sock"))
+    stale.close()
+
+    channels["a"].publish("topic", [1, 2])
+    await asyncio.sleep(0.01)
+    assert received == {"a": [], "b": [[1, 2]]}
+    assert not (tmp_path / "stale.sock").exists()
+
+    for channel in channels.values():
+        channel.stop()
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_other_worker_invalidates_caches(tmp_path: Path):
+    """Test that writes in another worker drop the cached tokens of their users and the catalog of this worker."""
+    token_cache.put("token1", Principal(user_id=1), exp=2e9)
+    token_cache.put("token2", Principal(user_id=2), exp=2e9)
+    version = exercise_catalog.version
+    with other_worker(tmp_path) as other:
+        other.publish(USERS_TOPIC, [1])
+        other.publish(CATALOG_TOPIC)
+        await asyncio.sleep(0.01)
+    assert token_cache.get("token1") is None
+    assert token_cache.get("token2") == Principal(user_id=2)
+    assert exercise_catalog.version == version + 1
+    token_cache.invalidate_users()
+
+
+async def test_writes_are_published(tmp_path: Path, db_session: AsyncSession, user: User):
+    """Test that the other workers are told about committed writes to users."""
+    received: list = []
+    with other_worker(tmp_path) as other:
+        other.subscribe(USERS_TOPIC, received.append)
+        user.username = "renamed"
+        await db_session.commit()
+        await asyncio.sleep(0.01)
+    assert received == [[user.id]]
+
+
+async def test_file_lock(tmp_path: Path):
+    """Test that a file lock is held by one holder at a time."""
+    events = []
+
+    async def hold(name: str) -> None:
+        async with file_lock(tmp_path / "seed.lock"):
+            events.append(f"{name} in")
+            await asyncio.sleep(0.05)
+            events.append(f"{name} out")
+
+    await asyncio.gather(hold("first"), hold("second"))
+    assert events in (["first in", "first out", "second in", "second out"], ["second in", "second out", "first in", "first out"])
+
+
+def test_secret_key_file(tmp_path: Path):
+    """Test that the secret key is read from its file, and only generated if not configured."""
+    path = tmp_path / "secret_key"
+    path.write_text("shared key\n")
+    settings = Settings(SECRET_KEY_FILE=path)
+    assert settings.SECRET_KEY == "shared key"
+    assert not settings.secret_key_generated
+
+    settings = Settings(SECRET_KEY="")
+    assert settings.SECRET_KEY
+    assert settings.secret_key_generated
@@ -0,0 +1,82 @@
+from typing import Any
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def get_changes(client: AsyncClient, since: int, limit: int = 500) -> dict:
+    response = await client.get("/api/v1/trainings/changes", params={"since": since, "limit": limit})
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_training_changes(as_user: AsyncClient, training_data, exercise):
+    """Test that changes after a cursor list created and updated trainings once, and deleted ones by id."""
+    first = (await as_user.post("/api/v1/trainings/", json=training_data)).json()
+    second = (await as_user.post("/api/v1/trainings/", json=training_data)).json()
+    changes = await get_changes(as_user, 0)
+    assert sorted(t["id"] for t in changes["trainings"]) == [first["id"], second["id"]]
+    assert changes["deleted"] == []
+    assert not changes["has_more"]
+    cursor = changes["cursor"]
+    assert await get_changes(as_user, cursor) == {"trainings": [], "deleted": [], "cursor": cursor, "has_more": False}
+
+    patch = {"exercises": [{"exercise_id": exercise.id, "sets": 5, "reps": 5, "weight": 100.0}]}
+    assert (await as_user.patch(f"/api/v1/trainings/{first['id']}", json=patch)).status_code == 200
+    assert (await as_user.patch(f"/api/v1/trainings/{first['id']}", json={"date": training_data["date"]})).status_code == 200
+    changes = await get_changes(as_user, cursor)
+    assert [(t["id"], t["exercises"][0]["sets"]) for t in changes["trainings"]] == [(first["id"], 5)]
+    assert changes["cursor"] == cursor + 1
+    cursor = changes["cursor"]
+
+    assert (await as_user.delete(f"/api/v1/trainings/{second['id']}")).status_code == 200
+    changes = await get_changes(as_user, cursor)
+    assert changes == {"trainings": [], "deleted": [second["id"]], "cursor": cursor + 1, "has_more": False}
+
+
+async def test_training_changes_paginated(as_user: AsyncClient, training_data):
+    """Test walking the changes page by page, across created and deleted trainings."""
+    ids = [(await as_user.post("/api/v1/trainings/", json=training_data)).json()["id"] for _ in range(3)]
+    assert (await as_user.delete(f"/api/v1/trainings/{ids[0]}")).status_code == 200
+
+    # The deleted training no longer has a change of its own, its deletion comes last
+    changes = await get_changes(as_user, 0, limit=2)
+    assert (sorted(t["id"] for t in changes["trainings"]), changes["deleted"], changes["has_more"]) == (ids[1:], [], True)
+    changes = await get_changes(as_user, changes["cursor"], limit=2)
+    assert (changes["trainings"], changes["deleted"], changes["has_more"]) == ([], [ids[0]], False)
+
+
+async def test_training_changes_written_while_read(as_user: AsyncClient, training_data, monkeypatch: pytest.MonkeyPatch):
+    """Test that changes committed while the changes are being read are not skipped by the cursor."""
+    first = (await as_user.post("/api/v1/trainings/", json=training_data)).json()
+    execute = AsyncSession.execute
+    written: dict[str, int] = {}
+
+    async def execute_then_write(self: AsyncSession, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        result = await execute(self, statement, *args, **kwargs)
+        if not written and "change_seq >" in str(statement):
+            # Right after the first read of the changes, create a training and delete another
+            written["created"] = 0
+            written["created"] = (await as_user.post("/api/v1/trainings/", json=training_data)).json()["id"]
+            assert (await as_user.delete(f"/api/v1/trainings/{first['id']}")).status_code == 200
+        return result
+
+    monkeypatch.setattr(AsyncSession, "execute", execute_then_write)
+    changes = await get_changes(as_user, 0)
+    monkeypatch.undo()
+    synced = {t["id"] for t in changes["trainings"]}
+    deleted = set(changes["deleted"])
+    while True:
+        changes = await get_changes(as_user, changes["cursor"])
+        synced.update(t["id"] for t in changes["trainings"])
+        deleted.update(changes["deleted"])
+        if not changes["has_more"]:
+            break
+    assert written["created"] in synced
+    assert first["id"] in deleted
+
+
+async def test_training_changes_unauthorized(as_anon: AsyncClient):
+    response = await as_anon.get("/api/v1/trainings/changes")
+    assert response.status_code == 401
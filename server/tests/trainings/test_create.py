@@ -19,6 +19,16 @@ async def test_create_training(as_user: AsyncClient, training_data, exercise, mu
     assert data["exercises"][0]["exercise"]["muscle_group"] == muscle_group.name
 
 
+async def test_create_training_unknown_exercise(as_user: AsyncClient, training_data):
+    """Test that a training with an exercise that does not exist is not created."""
+    training_data["exercises"][0]["exercise_id"] = 999999
+    response = await as_user.post("/api/v1/trainings/", json=training_data)
+    assert response.status_code == 404
+
+    response = await as_user.get("/api/v1/trainings/")
+    assert response.json() == []
+
+
 async def test_create_training_unauthorized(as_anon: AsyncClient, training_data):
     """Test creating a training without authentication."""
     response = await as_anon.post("/api/v1/trainings/", json=training_data)
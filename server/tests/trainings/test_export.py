@@ -0,0 +1,86 @@
+import csv
+import json
+
+import pytest
+from app.core.config import settings
+from app.models.models import Training
+from app.services.training_service import TrainingService
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def test_export_ndjson(as_user: AsyncClient, trainings, exercise):
+    """Test exporting the training history as NDJSON, oldest first."""
+    response = await as_user.get("/api/v1/trainings/export")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="trainings.ndjson"'
+
+    data = [json.loads(line) for line in response.text.splitlines()]
+    assert [training["id"] for training in data] == [training.id for training in reversed(trainings)]
+    assert data[0]["exercises"][0]["exercise"]["name"] == exercise.name
+
+
+async def test_export_batches(db_session: AsyncSession, user, trainings: list[Training], monkeypatch: pytest.MonkeyPatch):
+    """Test that the export reads the trainings in batches, including those of the same date, without holding a connection."""
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    same_date = Training(user_id=user.id, date=trainings[0].date)
+    db_session.add(same_date)
+    await db_session.commit()
+
+    exported = []
+    async with AsyncSession(db_session.bind) as session:
+        async for training in TrainingService(session).stream_user_trainings(user.id):
+            assert not session.in_transaction()
+            exported.append(training.id)
+    assert exported == [*(training.id for training in reversed(trainings)), same_date.id]
+
+
+async def test_export_csv(as_user: AsyncClient, trainings, exercise):
+    """Test exporting the training history as CSV, one line per training exercise."""
+    response = await as_user.get("/api/v1/trainings/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert [int(row["training_id"]) for row in rows] == [training.id for training in reversed(trainings)]
+    assert rows[0]["exercise_id"] == str(exercise.id)
+    assert rows[0]["exercise"] == exercise.name
+
+
+async def test_export_csv_import_roundtrip(as_user: AsyncClient, trainings, exercise):
+    """Test that an exported CSV is imported back as the same trainings, also without exercises or on the same date."""
+    date = trainings[0].date.isoformat()
+    await as_user.post("/api/v1/trainings/", json={"date": date, "exercises": []})
+    await as_user.post("/api/v1/trainings/", json={"date": date, "exercises": [{"exercise_id": exercise.id, "sets": 1, "reps": 2, "weight": 3.0}]})
+
+    def contents(data: list[dict]) -> list[tuple]:
+        return sorted((t["date"], [(e["exercise_id"], e["sets"], e["reps"], e["weight"]) for e in t["exercises"]]) for t in data)
+
+    exported = (await as_user.get("/api/v1/trainings/")).json()
+    response = await as_user.get("/api/v1/trainings/export", params={"format": "csv"})
+    for training in exported:
+        await as_user.delete(f"/api/v1/trainings/{training['id']}")
+
+    response = await as_user.post("/api/v1/trainings/import", content=response.content, headers={"Content-Type": "text/csv"})
+    assert response.json() == {"imported": len(exported), "errors": []}
+    assert contents((await as_user.get("/api/v1/trainings/")).json()) == contents(exported)
+
+
+async def test_export_empty(as_user: AsyncClient):
+    """Test exporting an empty training history."""
+    response = await as_user.get("/api/v1/trainings/export")
+    assert response.status_code == 200
+    assert response.text == ""
+
+
+async def test_export_invalid_format(as_user: AsyncClient):
+    """Test exporting in an unsupported format."""
+    response = await as_user.get("/api/v1/trainings/export", params={"format": "xml"})
+    assert response.status_code == 422
+
+
+async def test_export_unauthorized(as_anon: AsyncClient):
+    """Test exporting trainings without authentication."""
+    response = await as_anon.get("/api/v1/trainings/export")
+    assert response.status_code == 401
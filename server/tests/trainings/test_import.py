@@ -0,0 +1,75 @@
+import json
+
+from httpx import AsyncClient
+
+
+async def test_import_json(as_user: AsyncClient, exercise):
+    """Test importing a JSON array of trainings."""
+    trainings = [
+        {"date": f"2024-03-0{day}T10:00:00", "exercises": [{"exercise_id": exercise.id, "sets": 3, "reps": 10, "weight": 50.0}]} for day in range(1, 4)
+    ]
+
+    response = await as_user.post("/api/v1/trainings/import", json=trainings)
+    assert response.status_code == 200
+    assert response.json() == {"imported": 3, "errors": []}
+
+    response = await as_user.get("/api/v1/trainings/")
+    data = response.json()
+    assert [training["date"] for training in data] == ["2024-03-03T10:00:00", "2024-03-02T10:00:00", "2024-03-01T10:00:00"]
+    assert data[0]["exercises"][0]["exercise"]["name"] == exercise.name
+
+
+async def test_import_ndjson_errors(as_user: AsyncClient, exercise):
+    """Test that invalid NDJSON lines are reported and the valid ones imported."""
+    lines = [
+        json.dumps({"date": "2024-03-01T10:00:00", "exercises": [{"exercise_id": exercise.id, "sets": 3, "reps": 10, "weight": 50.0}]}),
+        "",
+        json.dumps({"date": "2024-03-02T10:00:00", "exercises": [{"exercise_id": exercise.id, "sets": 0, "reps": 10, "weight": 50.0}]}),
+        json.dumps({"date": "2024-03-03T10:00:00", "exercises": [{"exercise_id": 999999, "sets": 3, "reps": 10, "weight": 50.0}]}),
+        "{not json",
+    ]
+
+    response = await as_user.post("/api/v1/trainings/import", content="\n".join(lines), headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported"] == 1
+    assert [error["row"] for error in data["errors"]] == [3, 4, 5]
+    assert data["errors"][0]["detail"].startswith("exercises.0.sets:")
+    assert data["errors"][1]["detail"] == "Unknown exercise_id: 999999"
+
+
+async def test_import_csv(as_user: AsyncClient, exercise):
+    """Test that consecutive CSV lines with the same date make up one training."""
+    content = (
+        "date,exercise_id,sets,reps,weight\n"
+        f"2024-03-01T10:00:00,{exercise.id},3,10,50\n"
+        f"2024-03-01T10:00:00,{exercise.id},4,8,60\n"
+        f"2024-03-02T10:00:00,{exercise.id},5,5,70.5\n"
+    )
+
+    response = await as_user.post("/api/v1/trainings/import", content=content, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    assert response.json() == {"imported": 2, "errors": []}
+
+    response = await as_user.get("/api/v1/trainings/")
+    data = response.json()
+    assert [len(training["exercises"]) for training in data] == [1, 2]
+    assert data[0]["exercises"][0]["weight"] == 70.5
+
+
+async def test_import_csv_invalid_header(as_user: AsyncClient):
+    """Test importing a CSV without the expected columns."""
+    response = await as_user.post("/api/v1/trainings/import", content="date,weight\n", headers={"Content-Type": "text/csv"})
+    assert response.status_code == 400
+
+
+async def test_import_unsupported_content_type(as_user: AsyncClient):
+    """Test importing a body of an unsupported format."""
+    response = await as_user.post("/api/v1/trainings/import", content="<trainings/>", headers={"Content-Type": "application/xml"})
+    assert response.status_code == 415
+
+
+async def test_import_unauthorized(as_anon: AsyncClient):
+    """Test importing trainings without authentication."""
+    response = await as_anon.post("/api/v1/trainings/import", json=[])
+    assert response.status_code == 401
@@ -1,4 +1,10 @@
+from datetime import UTC, datetime, timedelta, timezone
+
+from app.models.models import Training
+from app.schemas.training import TrainingRead, dump_trainings, group_training_rows
 from httpx import AsyncClient
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 async def test_get_trainings(as_user: AsyncClient, training, exercise, muscle_group):
@@ -13,6 +19,46 @@ async def test_get_trainings(as_user: AsyncClient, training, exercise, muscle_gr
     assert data[0]["exercises"][0]["exercise"]["muscle_group"] == muscle_group.name
 
 
+def test_dump_trainings_matches_response_model():
+    """Test that trainings dumped from plain dicts are the same JSON the response model would give."""
+    rows = [
+        (1, 1, datetime(2024, 1, 2, 10, 30, 15, 123456, tzinfo=UTC), 1, 3, 4, 10, 52.5, "Жим лежа", "грудь"),
+        (1, 1, datetime(2024, 1, 2, 10, 30, 15, 123456, tzinfo=UTC), 2, 4, 3, 8, 100.0, 'Тяга "сумо"', "спина"),
+        (2, 1, datetime(2024, 1, 1, tzinfo=UTC), None, None, None, None, None, None, None),
+        (3, 1, datetime(2023, 12, 31, 23, 59), 3, 3, 1, 1, 0.1 + 0.2, "Жим лежа", "грудь"),
+        (4, 1, datetime(2023, 12, 30, 8, 0, tzinfo=timezone(timedelta(hours=3))), 4, 3, 5, 5, 1e-7, "Жим лежа", "грудь"),
+    ]
+    expected = TypeAdapter(list[TrainingRead]).dump_json(TrainingRead.from_rows(rows))
+    assert dump_trainings(group_training_rows(rows)) == expected
+
+
+async def test_get_trainings_paginated(as_user: AsyncClient, trainings):
+    """Test walking the training history page by page."""
+    response = await as_user.get("/api/v1/trainings/", params={"limit": 2})
+    assert response.status_code == 200
+    assert [t["id"] for t in response.json()] == [trainings[0].id, trainings[1].id]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = await as_user.get("/api/v1/trainings/", params={"limit": 2, "cursor": cursor})
+    assert response.status_code == 200
+    assert [t["id"] for t in response.json()] == [trainings[2].id]
+    assert "X-Next-Cursor" not in response.headers
+
+
+async def test_get_trainings_date_window(as_user: AsyncClient, trainings):
+    """Test filtering trainings by a date window."""
+    params = {"from": trainings[1].date.isoformat(), "to": trainings[0].date.isoformat()}
+    response = await as_user.get("/api/v1/trainings/", params=params)
+    assert response.status_code == 200
+    assert [t["id"] for t in response.json()] == [trainings[1].id]
+
+
+async def test_get_trainings_invalid_cursor(as_user: AsyncClient):
+    """Test listing trainings with a malformed cursor."""
+    response = await as_user.get("/api/v1/trainings/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 422
+
+
 async def test_get_training(as_user: AsyncClient, training, training_data, exercise, muscle_group):
     """Test getting a specific training."""
     response = await as_user.get(f"/api/v1/trainings/{training.id}")
@@ -25,7 +71,61 @@ async def test_get_training(as_user: AsyncClient, training, training_data, exerc
     assert data["exercises"][0]["exercise"]["muscle_group"] == muscle_group.name
 
 
+async def test_get_training_without_exercises(as_user: AsyncClient, db_session: AsyncSession, user):
+    """Test getting a training that has no exercises."""
+    training = Training(user_id=user.id, date=datetime.now(UTC))
+    db_session.add(training)
+    await db_session.commit()
+
+    response = await as_user.get(f"/api/v1/trainings/{training.id}")
+    assert response.status_code == 200
+    assert response.json()["exercises"] == []
+
+
 async def test_get_training_not_found(as_user: AsyncClient):
     """Test getting a non-existent training."""
     response = await as_user.get("/api/v1/trainings/999")
     assert response.status_code == 404
+
+
+async def test_get_trainings_pages_etags(as_user: AsyncClient, trainings):
+    """Test that every page of the list has its own entity tag, so that one page is not answered with 304 for another."""
+    first = await as_user.get("/api/v1/trainings/", params={"limit": 1})
+    params: dict[str, str | int] = {"limit": 1, "cursor": first.headers["X-Next-Cursor"]}
+    second = await as_user.get("/api/v1/trainings/", params=params, headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert (await as_user.get("/api/v1/trainings/", params=params, headers={"If-None-Match": second.headers["ETag"]})).status_code == 304
+
+    response = await as_user.get("/api/v1/trainings/", params={"limit": 1, "from": "2000-01-01T00:00:00"}, headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+
+
+async def test_get_trainings_not_modified(as_user: AsyncClient, training, exercise, statements: list[str]):
+    """Test that polling unchanged trainings is answered with 304 without loading them, until they change."""
+    response = await as_user.get("/api/v1/trainings/")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    etag = response.headers["ETag"]
+
+    statements.clear()
+    response = await as_user.get("/api/v1/trainings/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    assert not any("trainingexercise" in statement for statement in statements)
+    training_etag = (await as_user.get(f"/api/v1/trainings/{training.id}")).headers["ETag"]
+    assert training_etag != etag
+    assert (await as_user.get(f"/api/v1/trainings/{training.id}", headers={"If-None-Match": f"W/{training_etag}"})).status_code == 304
+
+    patch = {"exercises": [{"exercise_id": exercise.id, "sets": 5, "reps": 5, "weight": 100.0}]}
+    assert (await as_user.patch(f"/api/v1/trainings/{training.id}", json=patch)).status_code == 200
+    response = await as_user.get("/api/v1/trainings/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    etag = response.headers["ETag"]
+
+    assert (await as_user.delete(f"/api/v1/trainings/{training.id}")).status_code == 200
+    response = await as_user.get("/api/v1/trainings/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json() == []
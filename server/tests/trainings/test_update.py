@@ -1,3 +1,4 @@
+import re
 from datetime import UTC, datetime
 
 from httpx import AsyncClient
@@ -23,3 +24,89 @@ async def test_update_training_not_found(as_user: AsyncClient, training_data):
     """Test updating a non-existent training."""
     response = await as_user.put("/api/v1/trainings/999", json=training_data)
     assert response.status_code == 404
+
+
+def writes(statements: list[str], table: str) -> list[str]:
+    """Commands of the statements that write to the table."""
+    return [statement.split(None, 1)[0] for statement in statements if re.match(rf"(INSERT INTO|UPDATE|DELETE FROM) {table}\b", statement)]
+
+
+async def test_update_training_writes_changed_rows_only(as_user: AsyncClient, training_data, statements):
+    """Test that changing one weight updates that row only, keeping the ids of all rows."""
+    response = await as_user.post("/api/v1/trainings/", json=training_data)
+    created = response.json()
+    training_data["exercises"][1]["weight"] = 35.0
+
+    statements.clear()
+    response = await as_user.put(f"/api/v1/trainings/{created['id']}", json=training_data)
+    assert response.status_code == 200
+    data = response.json()
+    assert [exercise["id"] for exercise in data["exercises"]] == [exercise["id"] for exercise in created["exercises"]]
+    assert data["exercises"][1]["weight"] == 35.0
+    assert writes(statements, "trainingexercise") == ["UPDATE"]
+    assert writes(statements, "training") == ["UPDATE"]  # `updated_at`
+
+    response = await as_user.get(f"/api/v1/trainings/{created['id']}")
+    assert response.json() == data
+
+
+async def test_update_training_unchanged(as_user: AsyncClient, training_data, statements):
+    """Test that saving a training unchanged writes nothing."""
+    response = await as_user.post("/api/v1/trainings/", json=training_data)
+    created = response.json()
+
+    statements.clear()
+    response = await as_user.put(f"/api/v1/trainings/{created['id']}", json=training_data)
+    assert response.status_code == 200
+    assert all(statement.startswith("SELECT") for statement in statements)
+
+
+async def test_update_training_remove_first_exercise(as_user: AsyncClient, training_data, statements):
+    """Test that removing an exercise deletes its row without rewriting the others."""
+    response = await as_user.post("/api/v1/trainings/", json=training_data)
+    created = response.json()
+    training_data["exercises"] = training_data["exercises"][1:]
+
+    statements.clear()
+    response = await as_user.put(f"/api/v1/trainings/{created['id']}", json=training_data)
+    data = response.json()
+    assert [exercise["id"] for exercise in data["exercises"]] == [created["exercises"][1]["id"]]
+    assert writes(statements, "trainingexercise") == ["DELETE"]
+
+
+async def test_update_training_unknown_exercise(as_user: AsyncClient, training, training_data):
+    """Test updating a training with an exercise that does not exist."""
+    training_data["exercises"][0]["exercise_id"] = 999999
+    response = await as_user.put(f"/api/v1/trainings/{training.id}", json=training_data)
+    assert response.status_code == 404
+
+
+async def test_patch_training_date(as_user: AsyncClient, training):
+    """Test changing the date of a training only."""
+    response = await as_user.patch(f"/api/v1/trainings/{training.id}", json={"date": "2024-03-01T10:00:00"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["date"] == "2024-03-01T10:00:00"
+    assert len(data["exercises"]) == 1
+
+    response = await as_user.get(f"/api/v1/trainings/{training.id}")
+    assert response.json() == data
+
+
+async def test_patch_training_exercises(as_user: AsyncClient, training, exercise):
+    """Test replacing the exercises of a training only."""
+    response = await as_user.get(f"/api/v1/trainings/{training.id}")
+    date = response.json()["date"]
+    exercises = [{"exercise_id": exercise.id, "sets": 3, "reps": 10, "weight": 50.0}, {"exercise_id": exercise.id, "sets": 1, "reps": 1, "weight": 100.0}]
+
+    response = await as_user.patch(f"/api/v1/trainings/{training.id}", json={"exercises": exercises})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["date"] == date
+    assert [exercise["weight"] for exercise in data["exercises"]] == [50.0, 100.0]
+
+
+async def test_patch_training_not_found(as_user: AsyncClient):
+    """Test patching a non-existent training."""
+    response = await as_user.patch("/api/v1/trainings/999", json={"date": "2024-03-01T10:00:00"})
+    assert response.status_code == 404